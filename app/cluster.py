@@ -0,0 +1,230 @@
+# app/cluster.py
+# Mode multi-worker: satu proses koordinator menerima update Telegram (webhook atau
+# long polling) lalu membagikannya ke beberapa proses worker bot lewat antrean lokal.
+# Update dibagi (sharding) berdasarkan user_id pengirim, sehingga semua update satu user
+# selalu diproses worker yang sama: user_data (dikunci per user) dan state ConversationHandler
+# (dikunci per chat + user) tetap konsisten, sementara user berbeda diproses paralel.
+# Di chat pribadi chat_id sama dengan user_id. Di grup, update user berbeda bisa jatuh ke
+# worker berbeda, jadi chat_data grup TIDAK konsisten antar worker (bot ini tidak memakainya).
+#
+# Jalankan dari root proyek:
+#   BOT_WORKERS=4 TELEGRAM_MODE=webhook WEBHOOK_URL=https://bot.example.com python -m app.cluster
+
+import os
+import asyncio
+import logging
+import secrets
+import threading
+import multiprocessing
+import queue as queue_module
+from zlib import crc32
+
+from telegram import Bot, Update
+
+from app.main import load_environment, build_application
+
+logger = logging.getLogger(__name__)
+
+_WORKER_CHECK_INTERVAL = 5 # Detik; worker yang mati dijalankan ulang
+_DISPATCH_BACKOFF = 1 # Detik menunggu antrean worker yang penuh sebelum mencoba lagi
+
+def shard_key(data: dict):
+    """Kunci sharding sebuah update (dict JSON): user_id pengirim jika ada, lalu chat_id, terakhir update_id."""
+    payloads = [payload for payload in data.values() if isinstance(payload, dict)]
+    for payload in payloads:
+        sender = payload.get("from") or payload.get("user") # 'user' untuk message_reaction
+        if isinstance(sender, dict):
+            return sender["id"]
+    for payload in payloads: # channel_post dan update lain tanpa pengirim
+        chat = payload.get("chat") or payload.get("actor_chat")
+        if isinstance(chat, dict):
+            return chat["id"]
+    return data.get("update_id", 0)
+
+def shard_for(data: dict, workers: int) -> int:
+    # crc32 stabil antar proses (hash() Python diacak per proses untuk string)
+    return crc32(str(shard_key(data)).encode()) % workers
+
+# ===============================
+# 👷 Worker
+# ===============================
+
+async def _run_worker(application, update_queue):
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+    try:
+        while True:
+            batch = await asyncio.to_thread(update_queue.get)
+            if batch is None: # Sinyal berhenti dari koordinator
+                break
+            for data in batch:
+                update = Update.de_json(data, application.bot)
+                if update is not None:
+                    await application.update_queue.put(update)
+    finally:
+        await application.stop()
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+
+def _worker_main(index: int, token: str, update_queue, workers: int):
+    load_environment(process_name=f"worker-{index}")
+    # Worker 0 adalah worker utama: menjalankan job berkala dan refresh token Google
+    application = build_application(token, primary=index == 0, workers=workers)
+    try:
+        asyncio.run(_run_worker(application, update_queue))
+    except KeyboardInterrupt:
+        pass
+
+# ===============================
+# 🧭 Koordinator
+# ===============================
+
+class Coordinator:
+    def __init__(self, token: str, workers: int):
+        from app.utils.config import BOT_WORKER_QUEUE_SIZE
+
+        self.token = token
+        self.workers = workers
+        self._ctx = multiprocessing.get_context("spawn") # Tanpa fork: event loop & koneksi tidak ikut tersalin
+        self._queues = [self._ctx.Queue(maxsize=BOT_WORKER_QUEUE_SIZE) for _ in range(workers)]
+        self._processes = [None] * workers
+        self.dispatched = [0] * workers
+        self._check_lock = threading.Lock()
+
+    def _start_worker(self, index: int):
+        process = self._ctx.Process(
+            target=_worker_main, args=(index, self.token, self._queues[index], self.workers),
+            name=f"bot-worker-{index}", daemon=True,
+        )
+        process.start()
+        self._processes[index] = process
+
+    def start_workers(self):
+        for index in range(self.workers):
+            self._start_worker(index)
+        logger.info(f"{self.workers} worker bot berjalan")
+
+    def check_workers(self):
+        # Blocking (spawn proses); dipanggil lewat asyncio.to_thread, lock mencegah worker dijalankan ulang dua kali
+        with self._check_lock:
+            for index, process in enumerate(self._processes):
+                if not process.is_alive():
+                    logger.warning(f"Worker {index} berhenti (exit code {process.exitcode}), dijalankan ulang")
+                    self._start_worker(index)
+
+    async def dispatch(self, updates: list[dict]):
+        """Membagi update (sudah terurut) ke worker sesuai shard; satu put per worker per batch."""
+        shards = {}
+        for data in updates:
+            shards.setdefault(shard_for(data, self.workers), []).append(data)
+        for index, batch in shards.items():
+            # Antrean penuh: tunggu tanpa memblok event loop alih-alih membuang update. Selama menunggu,
+            # update baru tertahan di antrean webhook/polling (backpressure). Worker yang mati dijalankan
+            # ulang agar antreannya terkuras lagi.
+            while True:
+                try:
+                    self._queues[index].put_nowait(batch)
+                    break
+                except queue_module.Full:
+                    logger.warning(f"Antrean worker {index} penuh, menunggu untuk {len(batch)} update")
+                    await asyncio.to_thread(self.check_workers)
+                    await asyncio.sleep(_DISPATCH_BACKOFF)
+            self.dispatched[index] += len(batch)
+
+    def stop_workers(self, timeout: float = 30):
+        for update_queue in self._queues:
+            update_queue.put(None)
+        for process in self._processes:
+            if process:
+                process.join(timeout)
+                if process.is_alive():
+                    process.terminate()
+
+async def _monitor_workers(coordinator: Coordinator):
+    while True:
+        await asyncio.sleep(_WORKER_CHECK_INTERVAL)
+        await asyncio.to_thread(coordinator.check_workers)
+
+async def _poll_updates(bot: Bot, coordinator: Coordinator):
+    """Long polling di koordinator (tanpa WEBHOOK_URL), hasilnya dibagikan ke worker seperti webhook."""
+    await bot.delete_webhook()
+    offset = None
+    while True:
+        try:
+            updates = await bot.get_updates(offset=offset, timeout=30, allowed_updates=Update.ALL_TYPES)
+        except Exception as e:
+            logger.warning(f"getUpdates gagal: {e}")
+            await asyncio.sleep(3)
+            continue
+        if updates:
+            offset = updates[-1].update_id + 1
+            await coordinator.dispatch([update.to_dict() for update in updates])
+
+async def run_coordinator(token: str, workers: int):
+    import uvicorn
+    from app.utils.config import (
+        TELEGRAM_MODE, TELEGRAM_API_BASE_URL, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN,
+        WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_MAX_CONNECTIONS
+    )
+    from app.web.webhook import TelegramWebhookApp
+
+    coordinator = Coordinator(token, workers)
+    coordinator.start_workers()
+    monitor = asyncio.create_task(_monitor_workers(coordinator))
+
+    bot = Bot(token, base_url=TELEGRAM_API_BASE_URL) if TELEGRAM_API_BASE_URL else Bot(token)
+    await bot.initialize()
+    try:
+        if TELEGRAM_MODE != "webhook":
+            logger.info("🤖 Koordinator aktif (polling)")
+            await _poll_updates(bot, coordinator)
+            return
+
+        if not WEBHOOK_URL:
+            raise ValueError("WEBHOOK_URL wajib diisi untuk TELEGRAM_MODE=webhook")
+        secret_token = WEBHOOK_SECRET_TOKEN or secrets.token_urlsafe(32)
+
+        # Endpoint webhook yang sama, tetapi update diteruskan ke worker alih-alih ke bot lokal
+        webhook_app = TelegramWebhookApp(None, secret_token, deliver=coordinator.dispatch)
+        await webhook_app.start()
+        await bot.set_webhook(
+            url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+            secret_token=secret_token,
+            allowed_updates=Update.ALL_TYPES,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+        )
+        logger.info(f"🤖 Koordinator aktif (webhook) di {WEBHOOK_LISTEN}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+        server = uvicorn.Server(uvicorn.Config(
+            webhook_app, host=WEBHOOK_LISTEN, port=WEBHOOK_PORT, lifespan="off", log_level="info"
+        ))
+        try:
+            await server.serve() # Berhenti saat SIGINT/SIGTERM
+        finally:
+            await webhook_app.stop() # Sisa update yang sudah diterima tetap dibagikan
+    finally:
+        monitor.cancel()
+        await bot.shutdown()
+        await asyncio.to_thread(coordinator.stop_workers)
+
+def main():
+    try:
+        TELEGRAM_TOKEN, AGENDA_PATH = load_environment(process_name="coordinator")
+        os.makedirs(AGENDA_PATH, exist_ok=True)
+
+        from app.utils.config import BOT_WORKERS
+        from app.utils.data_manager import initialize_agenda_data
+
+        # Tabel dibuat sekali di sini sebelum worker mulai, bukan berebut di setiap worker
+        initialize_agenda_data(None)
+        asyncio.run(run_coordinator(TELEGRAM_TOKEN, BOT_WORKERS or os.cpu_count() or 1))
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        logger.error(f"Error saat menjalankan koordinator: {e}")
+        exit(1)
+
+if __name__ == "__main__":
+    main()
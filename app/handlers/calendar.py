@@ -0,0 +1,93 @@
+# app/handlers/calendar.py
+
+import asyncio
+
+from telegram import Update
+from telegram.ext import (
+    CommandHandler,
+    CallbackQueryHandler,
+    ConversationHandler,
+    ContextTypes,
+)
+
+# Import dari modul-modul yang sudah kita pisahkan
+from app.utils.config import SYNC_GOOGLE_SELECT_CALENDAR
+from app.utils.keyboards import _keyboard_kalender
+from app.utils.google_calendars import list_google_calendars, get_selected_calendars
+from app.utils.google_push import apply_calendar_selection
+from app.handlers.common import cancel_command
+
+# ===============================
+# 📚 Conversation Handler: /kalender (pilih kalender Google yang disinkronkan)
+# ===============================
+async def kalender_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Menampilkan daftar kalender Google user untuk dipilih."""
+    context.user_data.clear()
+    user_id = update.effective_user.id
+
+    # Panggilan Google API bersifat blocking, jalankan di thread
+    calendars = await asyncio.to_thread(list_google_calendars, user_id)
+    if not calendars:
+        await update.message.reply_text("⚠️ Daftar kalender Google tidak bisa diambil. Pastikan akun Google Anda sudah terhubung lewat dashboard web.")
+        return ConversationHandler.END
+
+    selected = set(await asyncio.to_thread(get_selected_calendars, user_id))
+    primary_alias = None
+    if "primary" in selected: # Pilihan default: petakan ke ID kalender utama yang sebenarnya
+        selected.discard("primary")
+        primary_alias = next((c["id"] for c in calendars if c.get("primary")), None)
+        if primary_alias:
+            selected.add(primary_alias)
+
+    context.user_data["kalender_list"] = calendars
+    context.user_data["kalender_primary_alias"] = primary_alias
+    context.user_data["kalender_dipilih"] = selected
+    await update.message.reply_text(
+        "Pilih kalender Google yang ingin disinkronkan:",
+        reply_markup=_keyboard_kalender(calendars, selected)
+    )
+    return SYNC_GOOGLE_SELECT_CALENDAR
+
+async def kalender_toggle(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Menandai/melepas kalender, atau menyimpan pilihan saat 'Simpan' ditekan."""
+    query = update.callback_query
+    calendars = context.user_data.get("kalender_list", [])
+    selected = context.user_data.get("kalender_dipilih", set())
+
+    _, value = query.data.split(":", 1)
+    if value == "done" and not selected:
+        await query.answer("Pilih minimal satu kalender.", show_alert=True)
+        return SYNC_GOOGLE_SELECT_CALENDAR
+    await query.answer()
+
+    if value == "done":
+        chosen = [c for c in calendars if c["id"] in selected]
+        # Simpan kembali sebagai 'primary' jika tadinya tersimpan begitu, agar tidak terhitung
+        # sebagai kalender baru (yang memicu sinkron ulang penuh) padahal pilihannya tidak berubah
+        primary_alias = context.user_data.get("kalender_primary_alias")
+        saved = [{**c, "id": "primary"} if c["id"] == primary_alias else c for c in chosen]
+        await asyncio.to_thread(apply_calendar_selection, update.effective_user.id, saved)
+        nama = ", ".join(c.get("summary", c["id"]) for c in chosen)
+        await query.edit_message_text(f"✅ Kalender yang disinkronkan: {nama}")
+        context.user_data.clear()
+        return ConversationHandler.END
+
+    index = int(value)
+    if 0 <= index < len(calendars):
+        selected ^= {calendars[index]["id"]}
+    await query.edit_message_reply_markup(reply_markup=_keyboard_kalender(calendars, selected))
+    return SYNC_GOOGLE_SELECT_CALENDAR
+
+# Definisi ConversationHandler untuk /kalender
+kalender_handler = ConversationHandler(
+    entry_points=[CommandHandler("kalender", kalender_start)],
+    states={
+        SYNC_GOOGLE_SELECT_CALENDAR: [CallbackQueryHandler(kalender_toggle, pattern="^cal:")],
+    },
+    fallbacks=[
+        CommandHandler("batal", cancel_command),
+        CallbackQueryHandler(cancel_command, pattern="^cancel$")
+    ],
+    name="kalender_convo",
+    persistent=True,
+)
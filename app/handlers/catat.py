@@ -207,5 +207,5 @@ catat_handler = ConversationHandler(
         CallbackQueryHandler(cancel_command, pattern="^cancel$")
     ],
     name="catat_convo",
-    persistent=False,
+    persistent=True,
 )
\ No newline at end of file
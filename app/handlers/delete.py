@@ -11,11 +11,11 @@ from telegram.ext import (
     ContextTypes,
 )
 from telegram.constants import ParseMode
-import pandas as pd # Tetap diperlukan untuk pd.to_datetime
 
 # Import dari modul-modul yang sudah kita pisahkan
 from app.utils.config import CONFIRM_DELETE
-from app.utils.data_manager import get_agenda_items, delete_agenda_item # BARU: Impor get_agenda_items dan delete_agenda_item
+from app.utils.data_manager import get_agenda_item, delete_agenda_item
+from app.utils.parsers import parse_agenda_datetime
 from app.handlers.common import cancel_command # Impor cancel_command
 
 # ===============================
@@ -32,19 +32,19 @@ async def pre_confirm_delete_via_button(update: Update, context: ContextTypes.DE
     # Extract Event ID dari callback_data
     event_id_to_delete = query.data.split(":", 1)[1]
     
-    # BARU: Ambil data langsung dari database
-    agenda_to_delete_df = get_agenda_items(event_id=event_id_to_delete)
+    # Ambil data agenda (biasanya dari cache, karena baru saja ditampilkan oleh /lihat)
+    agenda_to_delete = get_agenda_item(event_id_to_delete)
 
-    if agenda_to_delete_df.empty:
+    if agenda_to_delete is None:
         await query.edit_message_text(f"⚠️ Agenda dengan Event ID <code>{event_id_to_delete}</code> tidak ditemukan lagi.",
                                         parse_mode=ParseMode.HTML)
         return ConversationHandler.END
 
     # Simpan agenda yang akan dihapus di user_data untuk konfirmasi
-    context.user_data["agenda_to_delete"] = agenda_to_delete_df.iloc[0].to_dict()
+    context.user_data["agenda_to_delete"] = agenda_to_delete
 
     row = context.user_data["agenda_to_delete"]
-    tgl_dt_obj = pd.to_datetime(row['Tanggal'])
+    tgl_dt_obj = parse_agenda_datetime(row['Tanggal'])
     
     pesan_konfirmasi = (
         f"<b>Anda yakin ingin menghapus agenda ini?</b>\n"
@@ -104,5 +104,5 @@ hapus_via_tombol_handler = ConversationHandler(
         CallbackQueryHandler(cancel_command, pattern="^cancel$")
     ],
     name="hapus_via_tombol_convo",
-    persistent=False,
+    persistent=True,
 )
\ No newline at end of file
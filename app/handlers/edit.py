@@ -10,8 +10,8 @@ from telegram.ext import (
     filters,
 )
 from telegram.constants import ParseMode
-from datetime import datetime, date, time, timedelta
-import pandas as pd # Tetap diperlukan untuk pd.to_datetime
+from datetime import datetime, timedelta
+import asyncio
 
 # Import dari modul-modul yang sudah kita pisahkan
 from app.utils.config import (
@@ -24,13 +24,39 @@ from app.utils.keyboards import (
     _keyboard_edit_fields, _keyboard_kategori, _keyboard_tanggal,
     _keyboard_jam, _keyboard_prioritas, _keyboard_status
 )
-from app.utils.parsers import parse_custom_date, parse_custom_time, cleanup_description
-from app.utils.data_manager import get_agenda_items, update_agenda_field # BARU: Impor get_agenda_items, update_agenda_field
+from app.utils.parsers import parse_custom_date, parse_custom_time, cleanup_description, parse_agenda_datetime
+from app.utils.data_manager import get_agenda_item, apply_agenda_changes
+from app.utils.google_calendar_api import get_google_service, patch_google_event, build_google_event_patch
 from app.handlers.common import cancel_command # Impor cancel_command
 
 # ===============================
 # ✏️ Conversation Handler: Edit Agenda
 # ===============================
+# Perubahan tiap bidang hanya ditampung di user_data["pending_changes"] dan baru ditulis
+# saat "Selesai Edit": satu UPDATE multi-kolom (dengan cek bentrok) dan satu sinkronisasi Google.
+
+_PESAN_TANGGAL_TIDAK_VALID = "⚠️ Tanggal agenda <code>{event_id}</code> tidak valid, agenda ini tidak bisa diedit lewat bot."
+
+def _start_edit_session(context: ContextTypes.DEFAULT_TYPE, agenda: dict):
+    context.user_data["original_agenda_data"] = dict(agenda) # Nilai awal untuk cek bentrok saat menyimpan
+    context.user_data["current_agenda_data"] = dict(agenda) # Tampilan termasuk perubahan yang belum disimpan
+    context.user_data["pending_changes"] = {}
+    context.user_data["event_id_to_edit"] = agenda["EventID"]
+
+async def _sync_google_after_edit(user_id, agenda: dict, changes: dict):
+    """Satu panggilan patch ke Google Calendar untuk semua perubahan, jika agenda terhubung."""
+    google_event_id = agenda.get("GoogleEventID")
+    body = build_google_event_patch(agenda, changes)
+    if not google_event_id or not body:
+        return
+    service = await asyncio.to_thread(get_google_service, user_id)
+    if service:
+        await patch_google_event(service, google_event_id, body, user_id=user_id)
+
+def _current_datetime(agenda: dict) -> datetime:
+    """Tanggal agenda yang sedang diedit; jika tidak valid, sekarang (tanggal/jam lain tetap bisa diganti)."""
+    return parse_agenda_datetime(agenda["Tanggal"]) or datetime.now(TZ).replace(second=0, microsecond=0)
+
 async def edit_agenda_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Memulai alur mengedit agenda. Dapat dipicu dari /edit atau tombol 'Edit'."""
     context.user_data.clear() # Bersihkan data sesi sebelumnya
@@ -42,16 +68,19 @@ async def edit_agenda_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         event_id = query.data.split(":", 1)[1]
         
         # Dapatkan detail agenda dari database
-        agenda_data_df = get_agenda_items(event_id=event_id)
-        if agenda_data_df.empty:
+        agenda = await asyncio.to_thread(get_agenda_item, event_id)
+        if agenda is None:
             await query.edit_message_text(f"⚠️ Agenda dengan Event ID <code>{event_id}</code> tidak ditemukan.", parse_mode=ParseMode.HTML)
             return ConversationHandler.END
 
-        context.user_data["current_agenda_data"] = agenda_data_df.iloc[0].to_dict()
-        context.user_data["event_id_to_edit"] = event_id
+        _start_edit_session(context, agenda)
         
         row = context.user_data["current_agenda_data"]
-        tgl_dt_obj = pd.to_datetime(row['Tanggal'])
+        tgl_dt_obj = parse_agenda_datetime(row['Tanggal'])
+        if tgl_dt_obj is None:
+            context.user_data.clear()
+            await query.edit_message_text(_PESAN_TANGGAL_TIDAK_VALID.format(event_id=row['EventID']), parse_mode=ParseMode.HTML)
+            return ConversationHandler.END
         
         pesan_detail = (
             f"<b>Detail Agenda Saat Ini:</b>\n"
@@ -80,18 +109,21 @@ async def input_event_id_edit(update: Update, context: ContextTypes.DEFAULT_TYPE
     event_id_to_edit = update.message.text.strip()
     
     # Dapatkan detail agenda dari database
-    agenda_data_df = get_agenda_items(event_id=event_id_to_edit)
+    agenda = await asyncio.to_thread(get_agenda_item, event_id_to_edit)
 
-    if agenda_data_df.empty:
+    if agenda is None:
         await update.message.reply_text(f"⚠️ Event ID <code>{event_id_to_edit}</code> tidak ditemukan. Mohon coba lagi atau batalkan.",
                                         parse_mode=ParseMode.HTML)
         return INPUT_EVENT_ID_EDIT # Tetap di state ini agar pengguna bisa coba lagi
 
-    context.user_data["current_agenda_data"] = agenda_data_df.iloc[0].to_dict()
-    context.user_data["event_id_to_edit"] = event_id_to_edit
+    _start_edit_session(context, agenda)
 
     row = context.user_data["current_agenda_data"]
-    tgl_dt_obj = pd.to_datetime(row['Tanggal'])
+    tgl_dt_obj = parse_agenda_datetime(row['Tanggal'])
+    if tgl_dt_obj is None:
+        context.user_data.clear()
+        await update.message.reply_text(_PESAN_TANGGAL_TIDAK_VALID.format(event_id=row['EventID']), parse_mode=ParseMode.HTML)
+        return ConversationHandler.END
     
     pesan_detail = (
         f"<b>Detail Agenda Saat Ini:</b>\n"
@@ -127,11 +159,38 @@ async def choose_edit_field(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return ConversationHandler.END
     
     if query.data == "edit_field:done":
-        # Jika selesai edit, tampilkan detail terakhir dan akhiri
+        # Simpan semua perubahan yang ditampung sekaligus, lalu tampilkan detail terakhir
+        event_id = context.user_data["event_id_to_edit"]
+        pending_changes = context.user_data.get("pending_changes", {})
+        if pending_changes:
+            result = await asyncio.to_thread(
+                apply_agenda_changes, event_id, pending_changes, context.user_data["original_agenda_data"]
+            )
+            if result != "ok":
+                alasan = "sudah dihapus" if result == "missing" else "sudah diubah dari tempat lain"
+                await query.edit_message_text(
+                    f"⚠️ Perubahan tidak disimpan karena agenda <code>{event_id}</code> {alasan} "
+                    f"sejak Anda mulai mengedit. Silakan /edit lagi.",
+                    parse_mode=ParseMode.HTML
+                )
+                context.user_data.clear()
+                return ConversationHandler.END
+            await _sync_google_after_edit(
+                update.effective_user.id, context.user_data["current_agenda_data"], pending_changes
+            )
+
         edited_data = context.user_data["current_agenda_data"]
-        tgl_dt_obj = pd.to_datetime(edited_data['Tanggal'])
+        context.user_data.clear() # Perubahan sudah tersimpan; jangan sisakan sesi edit di user_data
+        tgl_dt_obj = parse_agenda_datetime(edited_data['Tanggal'])
+        if tgl_dt_obj is None:
+            await query.edit_message_text(
+                f"⚠️ Pengeditan selesai, tetapi tanggal agenda <code>{edited_data['EventID']}</code> tidak valid "
+                f"sehingga detailnya tidak bisa ditampilkan.",
+                parse_mode=ParseMode.HTML
+            )
+            return ConversationHandler.END
         pesan_konfirmasi = (
-            f"✅ Pengeditan selesai. Detail agenda saat ini:\n"
+            f"✅ Pengeditan selesai{'' if pending_changes else ' (tidak ada perubahan)'}. Detail agenda saat ini:\n"
             f"---\n"
             f"🗓️ Hari: <b>{tgl_dt_obj.strftime('%A')}</b> ({tgl_dt_obj.strftime('%d %b %Y')})\n"
             f"🕒 Waktu: <b>{tgl_dt_obj.strftime('%H:%M')}</b>\n"
@@ -142,7 +201,6 @@ async def choose_edit_field(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"🆔 Event ID: <code>{edited_data['EventID']}</code>\n"
         )
         await query.edit_message_text(pesan_konfirmasi, parse_mode=ParseMode.HTML)
-        context.user_data.clear()
         return ConversationHandler.END
 
     _, field = query.data.split(":", 1)
@@ -176,18 +234,17 @@ async def choose_edit_field(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def process_edit_field(update: Update, context: ContextTypes.DEFAULT_TYPE, next_state_on_error: int):
     """
-    Fungsi pembantu untuk memproses input edit, mengupdate database,
-    dan kembali ke menu pilihan bidang.
+    Fungsi pembantu untuk memproses input edit, menampung perubahan (belum ditulis ke
+    database sampai "Selesai Edit"), dan kembali ke menu pilihan bidang.
     """
-    event_id = context.user_data["event_id_to_edit"]
     field = context.user_data["field_to_edit"]
-    new_value_for_db = None # Ini yang akan disimpan ke DB
+    new_value_for_db = None # Ini yang akan disimpan ke DB saat Selesai Edit
     display_value = None # Ini yang akan ditampilkan ke user
 
     current_agenda_data = context.user_data["current_agenda_data"]
     
     is_callback = update.callback_query is not None
-    reply_target = update.callback_query if is_callback else update.message
+    reply_target = update.callback_query.message if is_callback else update.message
 
     if is_callback:
         query = update.callback_query
@@ -218,7 +275,7 @@ async def process_edit_field(update: Update, context: ContextTypes.DEFAULT_TYPE,
                 return EDIT_CUSTOM_TANGGAL
             
             # Gabungkan dengan jam yang sudah ada
-            current_time = pd.to_datetime(current_agenda_data["Tanggal"], errors='coerce').time()
+            current_time = _current_datetime(current_agenda_data).time()
             new_dt_obj = datetime.combine(new_date, current_time, tzinfo=TZ)
             new_value_for_db = new_dt_obj.isoformat(timespec='minutes')
             display_value = new_date.strftime('%d %b %Y')
@@ -234,7 +291,7 @@ async def process_edit_field(update: Update, context: ContextTypes.DEFAULT_TYPE,
                 return next_state_on_error # Kembali ke state pemilihan jam
             
             # Gabungkan dengan tanggal yang sudah ada
-            current_date = pd.to_datetime(current_agenda_data["Tanggal"], errors='coerce').date()
+            current_date = _current_datetime(current_agenda_data).date()
             new_dt_obj = datetime.combine(current_date, parsed_jam, tzinfo=TZ)
             new_value_for_db = new_dt_obj.isoformat(timespec='minutes')
             display_value = parsed_jam.strftime('%H:%M')
@@ -265,7 +322,7 @@ async def process_edit_field(update: Update, context: ContextTypes.DEFAULT_TYPE,
             if not parsed_date:
                 await update.message.reply_text("⚠️ Format tanggal tidak dikenali. Coba lagi (contoh: 20 Juli 2025).")
                 return next_state_on_error
-            current_time = pd.to_datetime(current_agenda_data["Tanggal"], errors='coerce').time()
+            current_time = _current_datetime(current_agenda_data).time()
             new_dt_obj = datetime.combine(parsed_date, current_time, tzinfo=TZ)
             new_value_for_db = new_dt_obj.isoformat(timespec='minutes')
             display_value = parsed_date.strftime('%d %b %Y')
@@ -274,7 +331,7 @@ async def process_edit_field(update: Update, context: ContextTypes.DEFAULT_TYPE,
             if not parsed_time:
                 await update.message.reply_text("⚠️ Format jam tidak dikenali. Coba lagi (contoh: 14:30 atau jam 9).")
                 return next_state_on_error
-            current_date = pd.to_datetime(current_agenda_data["Tanggal"], errors='coerce').date()
+            current_date = _current_datetime(current_agenda_data).date()
             new_dt_obj = datetime.combine(current_date, parsed_time, tzinfo=TZ)
             new_value_for_db = new_dt_obj.isoformat(timespec='minutes')
             display_value = parsed_time.strftime('%H:%M')
@@ -282,31 +339,22 @@ async def process_edit_field(update: Update, context: ContextTypes.DEFAULT_TYPE,
             await update.message.reply_text("Input tidak valid. Mohon coba lagi.")
             return next_state_on_error
 
-    # Jika new_value_for_db berhasil ditentukan, update database
+    # Jika new_value_for_db berhasil ditentukan, tampung perubahannya
     if new_value_for_db is not None:
         column_name = field.capitalize() # Nama kolom di DB
         if field in ["tanggal", "jam"]: # Kolom 'Tanggal' menyimpan datetime gabungan
             column_name = "Tanggal"
-        
-        success = update_agenda_field(event_id, column_name, new_value_for_db)
-        
-        if success:
-            # Update current_agenda_data di user_data untuk refleksi perubahan
-            if field in ["tanggal", "jam"]:
-                # Simpan datetime ISO string di current_agenda_data
-                current_agenda_data["Tanggal"] = new_value_for_db 
-            else:
-                current_agenda_data[column_name] = new_value_for_db
-            
-            await reply_target.reply_text(
-                f"✅ Bidang '{field.capitalize()}' berhasil diupdate menjadi: <b>{display_value}</b>\n\nPilih bidang lain untuk diedit atau Selesai Edit:",
-                reply_markup=_keyboard_edit_fields(), parse_mode=ParseMode.HTML
-            )
-            return CHOOSE_EDIT_FIELD
-        else:
-            await reply_target.reply_text("❌ Gagal menyimpan perubahan ke database.")
-            context.user_data.clear()
-            return ConversationHandler.END # Akhiri jika ada masalah serius
+
+        # current_agenda_data ikut diperbarui agar edit tanggal/jam berikutnya memakai nilai terbaru
+        context.user_data["pending_changes"][column_name] = new_value_for_db
+        current_agenda_data[column_name] = new_value_for_db
+
+        await reply_target.reply_text(
+            f"📝 Bidang '{field.capitalize()}' diubah menjadi: <b>{display_value}</b> (belum disimpan)\n\n"
+            f"Pilih bidang lain untuk diedit, atau Selesai Edit untuk menyimpan semua perubahan:",
+            reply_markup=_keyboard_edit_fields(), parse_mode=ParseMode.HTML
+        )
+        return CHOOSE_EDIT_FIELD
     else:
         # Jika new_value_for_db masih None, berarti ada error parsing/input
         await reply_target.reply_text("⚠️ Input tidak valid. Mohon coba lagi.")
@@ -380,5 +428,5 @@ edit_handler = ConversationHandler(
         CallbackQueryHandler(cancel_command, pattern="^cancel$") # Batal umum
     ],
     name="edit_convo",
-    persistent=False,
+    persistent=True,
 )
\ No newline at end of file
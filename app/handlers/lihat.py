@@ -1,10 +1,8 @@
 # app/handlers/lihat.py
 
-from telegram import (
-    Update,
-    InlineKeyboardButton,
-    InlineKeyboardMarkup,
-)
+import logging
+
+from telegram import Update
 from telegram.ext import (
     CommandHandler,
     CallbackQueryHandler,
@@ -13,9 +11,7 @@ from telegram.ext import (
     ContextTypes,
     filters,
 )
-from telegram.constants import ParseMode
 from datetime import datetime, date, timedelta
-import pandas as pd # Tetap diperlukan untuk pd.to_datetime dan DataFrame
 
 # Import dari modul-modul yang sudah kita pisahkan
 from app.utils.config import (
@@ -23,10 +19,13 @@ from app.utils.config import (
     LIHAT_MENU, LIHAT_TANGGAL_CUSTOM
 )
 from app.utils.keyboards import _keyboard_lihat
+from app.utils.message_builder import build_messages, format_agenda_items, send_messages
 from app.utils.parsers import parse_custom_date
 from app.utils.data_manager import get_agenda_items # BARU: Impor get_agenda_items
 from app.handlers.common import cancel_command # Impor cancel_command
 
+logger = logging.getLogger(__name__)
+
 # ===============================
 # 📅 /lihat Handler (terintegrasi dengan tombol hapus & edit)
 # ===============================
@@ -44,9 +43,9 @@ async def handle_lihat_tombol(update: Update, context: ContextTypes.DEFAULT_TYPE
     _, opsi = query.data.split(":", 1)
 
     today = datetime.now(TZ).date()
-    # Hapus keyboard setelah pilihan tombol untuk tampilan bersih
-    await query.edit_message_reply_markup(reply_markup=None) 
-    
+    # Tidak perlu menghapus keyboard terpisah: setiap cabang di bawah mengedit teks pesan ini,
+    # dan edit teks tanpa reply_markup ikut menghapus keyboard (hemat satu request Bot API)
+
     if opsi == "today":
         return await tampilkan_agenda_dari_tanggal(update, context, today, today)
     elif opsi == "besok":
@@ -95,68 +94,10 @@ async def tampilkan_agenda_dari_tanggal(update: Update, context: ContextTypes.DE
         pesan_header += f"<b> s.d. {end_date.strftime('%d %b %Y')}</b>"
     pesan_header += "\n\n"
 
-    all_agenda_text = ""
-    keyboards_for_actions = [] # List untuk menyimpan InlineKeyboardButtons untuk Edit/Hapus
-
-    for _, row in df_filtered.iterrows():
-        tgl_display = row["Tanggal"].strftime('%d %b %Y')
-        waktu_display = row["Tanggal"].strftime('%H:%M')
-        
-        hari_ini = datetime.now(TZ).date()
-        selisih_hari = (row["Tanggal"].date() - hari_ini).days
-        
-        if selisih_hari == 0:
-            jarak_waktu = "Hari Ini"
-        elif selisih_hari == 1:
-            jarak_waktu = "Besok"
-        elif selisih_hari > 1:
-            jarak_waktu = f"Dalam {selisih_hari} hari"
-        elif selisih_hari < 0:
-            jarak_waktu = f"{abs(selisih_hari)} hari yang lalu"
-        else:
-            jarak_waktu = ""
-            
-        nama_hari = row["Tanggal"].strftime("%A")
-
-        # Bangun pesan untuk satu agenda
-        agenda_text = (
-            f"🗓️ Hari: <b>{nama_hari}</b> ({jarak_waktu})\n"
-            f"🕒 Waktu: <b>{tgl_display}</b> {waktu_display}\n"
-            f"📌 Deskripsi: <b>{row['Deskripsi']}</b>\n"
-            f"📂 Kategori: <b>{row['Kategori']}</b> | 🔥 Prioritas: <b>{row['Prioritas']}</b>\n"
-            f"🆔 Event ID: <code>{row['EventID']}</code>\n"
-            f"📊 Status: {row['Status']}\n"
-        )
-        
-        all_agenda_text += agenda_text + "---\n\n" # Tambahkan pesan agenda ke string utama
-
-        # --- Tambahkan deskripsi ke tombol edit & hapus ---
-        deskripsi_singkat = str(row['Deskripsi']) # Pastikan string
-        if len(deskripsi_singkat) > 20: # Batas 20 karakter untuk tombol, bisa disesuaikan
-            deskripsi_singkat = deskripsi_singkat[:17] + "..." # Ambil 17 karakter pertama + "..."
-
-        keyboards_for_actions.append(
-            [
-                InlineKeyboardButton(f"✏️ Edit: {deskripsi_singkat}", callback_data=f"edit_id:{row['EventID']}"),
-                InlineKeyboardButton(f"🗑️ Hapus: {deskripsi_singkat}", callback_data=f"hapus_id:{row['EventID']}")
-            ]
-        )
-    
-    final_reply_markup = InlineKeyboardMarkup(keyboards_for_actions) # Buat InlineKeyboardMarkup dari list tombol
-
-    # Mengirim pesan
-    try:
-        if update.callback_query:
-            await update.callback_query.edit_message_text(pesan_header + all_agenda_text, reply_markup=final_reply_markup, parse_mode=ParseMode.HTML)
-        else:
-            await update.message.reply_text(pesan_header + all_agenda_text, reply_markup=final_reply_markup, parse_mode=ParseMode.HTML)
-    except Exception as e:
-        print(f"Error editing message, sending new one: {e}")
-        # Jika gagal edit (misal: pesan terlalu panjang atau sudah terlalu lama), kirim pesan baru
-        if update.callback_query:
-            await update.callback_query.message.reply_text(pesan_header + all_agenda_text, reply_markup=final_reply_markup, parse_mode=ParseMode.HTML)
-        else:
-            await update.message.reply_text(pesan_header + all_agenda_text, reply_markup=final_reply_markup, parse_mode=ParseMode.HTML)
+    # Daftar panjang dipecah di batas item agar tiap pesan muat dalam batas teks & tombol Telegram
+    # (flood control & retry RetryAfter ditangani antrean kirim, app/utils/telegram_send_queue.py)
+    messages = build_messages(pesan_header, format_agenda_items(df_filtered))
+    await send_messages(update, messages)
 
     return ConversationHandler.END # Setelah menampilkan agenda, Conversation /lihat selesai.
 
@@ -172,5 +113,5 @@ lihat_handler = ConversationHandler(
         CallbackQueryHandler(cancel_command, pattern="^cancel$")
     ],
     name="lihat_convo",
-    persistent=False,
+    persistent=True,
 )
\ No newline at end of file
@@ -1,6 +1,6 @@
 # app/handlers/search.py
 
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import (
     CommandHandler,
     MessageHandler,
@@ -8,14 +8,12 @@ from telegram.ext import (
     ContextTypes,
     filters,
 )
-from telegram.constants import ParseMode
-from datetime import datetime, date, timedelta # Perlu diimpor langsung jika digunakan
-import pandas as pd # Tetap diperlukan untuk DataFrame dan pd.to_datetime
-import re
+import html
 
 # Import dari modul-modul yang sudah kita pisahkan
-from app.utils.config import INPUT_SEARCH_QUERY, TZ
+from app.utils.config import INPUT_SEARCH_QUERY
 from app.utils.data_manager import get_agenda_items # BARU: Impor get_agenda_items
+from app.utils.message_builder import build_messages, format_agenda_items, send_messages
 from app.handlers.common import cancel_command
 
 # ===============================
@@ -42,59 +40,9 @@ async def process_search_query(update: Update, context: ContextTypes.DEFAULT_TYP
         context.user_data.clear()
         return ConversationHandler.END
 
-    pesan_header = f"<b>🔎 Hasil Pencarian untuk '{query_text}'</b>\n\n"
-    all_agenda_text = ""
-    keyboards_for_actions = []
-
-    for _, row in df_filtered.iterrows():
-        tgl_display = row["Tanggal"].strftime('%d %b %Y')
-        waktu_display = row["Tanggal"].strftime('%H:%M')
-        
-        hari_ini = datetime.now(TZ).date()
-        selisih_hari = (row["Tanggal"].date() - hari_ini).days
-        
-        if selisih_hari == 0:
-            jarak_waktu = "Hari Ini"
-        elif selisih_hari == 1:
-            jarak_waktu = "Besok"
-        elif selisih_hari > 1:
-            jarak_waktu = f"Dalam {selisih_hari} hari"
-        elif selisih_hari < 0:
-            jarak_waktu = f"{abs(selisih_hari)} hari yang lalu"
-        else:
-            jarak_waktu = ""
-            
-        nama_hari = row["Tanggal"].strftime("%A")
-
-        agenda_text = (
-            f"🗓️ Hari: <b>{nama_hari}</b> ({jarak_waktu})\n"
-            f"🕒 Waktu: <b>{tgl_display}</b> {waktu_display}\n"
-            f"📌 Deskripsi: <b>{row['Deskripsi']}</b>\n"
-            f"📂 Kategori: <b>{row['Kategori']}</b> | 🔥 Prioritas: <b>{row['Prioritas']}</b>\n"
-            f"🆔 Event ID: <code>{row['EventID']}</code>\n"
-            f"📊 Status: {row['Status']}\n"
-        )
-        
-        all_agenda_text += agenda_text + "---\n\n"
-
-        deskripsi_singkat = str(row['Deskripsi'])
-        if len(deskripsi_singkat) > 20:
-            deskripsi_singkat = deskripsi_singkat[:17] + "..."
-
-        keyboards_for_actions.append(
-            [
-                InlineKeyboardButton(f"✏️ Edit: {deskripsi_singkat}", callback_data=f"edit_id:{row['EventID']}"),
-                InlineKeyboardButton(f"🗑️ Hapus: {deskripsi_singkat}", callback_data=f"hapus_id:{row['EventID']}")
-            ]
-        )
-    
-    final_reply_markup = InlineKeyboardMarkup(keyboards_for_actions)
-
-    await update.message.reply_text(
-        pesan_header + all_agenda_text,
-        reply_markup=final_reply_markup,
-        parse_mode=ParseMode.HTML
-    )
+    pesan_header = f"<b>🔎 Hasil Pencarian untuk '{html.escape(query_text, quote=False)}'</b>\n\n"
+    # Hasil banyak dipecah di batas item agar tiap pesan muat dalam batas teks & tombol Telegram
+    await send_messages(update, build_messages(pesan_header, format_agenda_items(df_filtered)))
     context.user_data.clear()
     return ConversationHandler.END
 
@@ -108,5 +56,5 @@ search_handler = ConversationHandler(
         CommandHandler("batal", cancel_command),
     ],
     name="search_convo",
-    persistent=False,
+    persistent=True,
 )
\ No newline at end of file
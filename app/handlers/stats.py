@@ -0,0 +1,123 @@
+# app/handlers/stats.py
+
+import html
+
+from telegram import Update
+from telegram.ext import CommandHandler, ContextTypes
+from telegram.constants import ParseMode
+
+from app.utils.config import ADMIN_USER_IDS
+from app.utils.metrics import metrics_registry, instrumented_handler_names
+from app.utils.profiling import handler_profiler
+
+# ===============================
+# 📈 Command Handler: /stats (khusus admin)
+# ===============================
+# Ringkasan metrik proses bot ini (lihat app/utils/metrics.py). Di mode multi-worker,
+# angka yang tampil hanya milik worker yang menangani update admin.
+
+_TOP_ROWS = 8
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}"
+
+def _format_operations(title: str, metric: str, label: str) -> str:
+    lines = [f"<b>{title}</b>"]
+    for row in metrics_registry.summary(metric)[:_TOP_ROWS]:
+        lines.append(
+            f"<code>{row['labels'].get(label, '-')}</code>: {row['count']}x, avg {_ms(row['avg'])} ms, "
+            f"p95 ≤{_ms(row['p95'])} ms, max {_ms(row['max'])} ms"
+        )
+    if len(lines) == 1:
+        lines.append("Belum ada data.")
+    return "\n".join(lines)
+
+def _format_handlers() -> str:
+    phase_avg = {
+        (row["labels"]["handler"], row["labels"]["phase"]): row["avg"]
+        for row in metrics_registry.summary("agenda_handler_phase_seconds")
+    }
+    lines = ["<b>Handler</b> (rata-rata db / telegram / google / render)"]
+    for row in metrics_registry.summary("agenda_handler_duration_seconds")[:_TOP_ROWS]:
+        handler = row["labels"]["handler"]
+        phases = " / ".join(_ms(phase_avg.get((handler, phase), 0.0)) for phase in ("db", "telegram", "google", "render"))
+        lines.append(
+            f"<code>{handler}</code>: {row['count']}x, avg {_ms(row['avg'])} ms ({phases}), "
+            f"p95 ≤{_ms(row['p95'])} ms"
+        )
+    if len(lines) == 1:
+        lines.append("Belum ada data.")
+    return "\n".join(lines)
+
+def _format_loop_lag() -> str:
+    rows = metrics_registry.summary("agenda_event_loop_lag_seconds")
+    if not rows:
+        return "<b>Event-loop lag</b>\nBelum ada data."
+    lag = rows[0]
+    return (f"<b>Event-loop lag</b>\n"
+            f"avg {_ms(lag['avg'])} ms, p95 ≤{_ms(lag['p95'])} ms, max {_ms(lag['max'])} ms ({lag['count']} sampel)")
+
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Menampilkan ringkasan latensi handler, DB, Bot API, Google dan event-loop lag."""
+    if update.effective_user.id not in ADMIN_USER_IDS:
+        await update.message.reply_text("⚠️ Perintah ini hanya untuk admin.")
+        return
+
+    sections = [
+        "📈 <b>Statistik proses bot</b>",
+        _format_handlers(),
+        _format_operations("Database", "agenda_db_duration_seconds", "operation"),
+        _format_operations("Telegram Bot API", "agenda_telegram_api_duration_seconds", "method"),
+        _format_operations("Google Calendar API", "agenda_google_api_duration_seconds", "operation"),
+        _format_loop_lag(),
+    ]
+    await update.message.reply_text("\n\n".join(sections), parse_mode=ParseMode.HTML)
+
+stats_handler = CommandHandler("stats", stats_command)
+
+# ===============================
+# 🔬 Command Handler: /profile (khusus admin)
+# ===============================
+# /profile                 -> status profiler
+# /profile 0.05            -> profil 5% update di semua handler
+# /profile 0.5 <handler>   -> profil 50% update handler tertentu (nama fungsi seperti di /stats)
+# /profile off             -> matikan
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Mengatur profiling tersampling di proses bot ini (lihat app/utils/profiling.py)."""
+    if update.effective_user.id not in ADMIN_USER_IDS:
+        await update.message.reply_text("⚠️ Perintah ini hanya untuk admin.")
+        return
+
+    args = context.args or []
+    if args:
+        if args[0].lower() == "off":
+            handler_profiler.set_rate(0.0)
+        else:
+            try:
+                rate = float(args[0])
+            except ValueError:
+                rate = -1.0
+            if not 0.0 <= rate <= 1.0:
+                await update.message.reply_text("Format: /profile [off | fraksi 0-1] [nama_handler]")
+                return
+            handler = args[1] if len(args) > 1 else None
+            if handler and handler not in instrumented_handler_names():
+                await update.message.reply_text(
+                    f"⚠️ Handler <code>{html.escape(handler)}</code> tidak dikenal. Pilihan: "
+                    + ", ".join(f"<code>{name}</code>" for name in instrumented_handler_names()),
+                    parse_mode=ParseMode.HTML,
+                )
+                return
+            handler_profiler.set_rate(rate, handler)
+
+    overrides = ", ".join(f"<code>{name}</code>={rate:g}" for name, rate in sorted(handler_profiler.handler_rates.items()))
+    await update.message.reply_text(
+        f"🔬 <b>Profiler</b>: {'aktif' if handler_profiler.enabled else 'mati'} (mode {handler_profiler.mode})\n"
+        f"Sampling global: {handler_profiler.sample_rate:g}" + (f"\nPer handler: {overrides}" if overrides else "") +
+        f"\nDiprofil: {handler_profiler.profiled}, dilewati (sedang sibuk): {handler_profiler.skipped_busy}\n"
+        f"Folder: <code>{handler_profiler.directory}</code>",
+        parse_mode=ParseMode.HTML,
+    )
+
+profile_handler = CommandHandler("profile", profile_command)
@@ -10,11 +10,11 @@ from telegram.ext import (
     filters,
 )
 from telegram.constants import ParseMode
-import pandas as pd # Tetap diperlukan untuk pd.to_datetime
 
 # Import dari modul-modul yang sudah kita pisahkan
 from app.utils.config import INPUT_EVENT_ID_STATUS, CHOOSE_STATUS, PRESET_STATUS
-from app.utils.data_manager import get_agenda_items, update_agenda_field # BARU: Impor get_agenda_items dan update_agenda_field
+from app.utils.data_manager import get_agenda_item, update_agenda_fields
+from app.utils.parsers import parse_agenda_datetime
 from app.handlers.common import cancel_command
 
 # ===============================
@@ -30,18 +30,17 @@ async def input_event_id_status(update: Update, context: ContextTypes.DEFAULT_TY
     """Menerima Event ID untuk perubahan status."""
     event_id = update.message.text.strip()
     
-    # BARU: Ambil data agenda dari database
-    agenda_data_df = get_agenda_items(event_id=event_id)
+    # Ambil data agenda (dari cache jika ada)
+    agenda_info = get_agenda_item(event_id)
     
-    if agenda_data_df.empty:
+    if agenda_info is None:
         await update.message.reply_text("Event ID tidak ditemukan. Mohon masukkan Event ID yang valid.")
         return INPUT_EVENT_ID_STATUS
     
     context.user_data["status_event_id"] = event_id
 
     # Tampilkan informasi agenda yang dipilih
-    agenda_info = agenda_data_df.iloc[0] # Ambil baris pertama sebagai Series
-    tgl_dt_obj = pd.to_datetime(agenda_info['Tanggal'])
+    tgl_dt_obj = parse_agenda_datetime(agenda_info['Tanggal'])
     
     pesan_info = (
         f"Anda memilih agenda:\n"
@@ -73,12 +72,12 @@ async def choose_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
         context.user_data.clear()
         return ConversationHandler.END
 
-    # BARU: Perbarui status di database menggunakan update_agenda_field
-    success = update_agenda_field(event_id, "Status", new_status)
+    # Baris hasil update langsung dipakai untuk konfirmasi, tanpa membaca ulang database
+    updated = update_agenda_fields(event_id, Status=new_status)
     
-    if success:
+    if updated:
         await query.edit_message_text(
-            f"✅ Status agenda dengan Event ID <code>{event_id}</code> berhasil diubah menjadi: <b>{new_status}</b>",
+            f"✅ Status agenda <b>{updated['Deskripsi']}</b> (<code>{event_id}</code>) berhasil diubah menjadi: <b>{updated['Status']}</b>",
             parse_mode=ParseMode.HTML
         )
     else:
@@ -99,5 +98,5 @@ status_handler = ConversationHandler(
         CallbackQueryHandler(cancel_command, pattern="^cancel$")
     ],
     name="status_convo",
-    persistent=False,
+    persistent=True,
 )
\ No newline at end of file
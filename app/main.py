@@ -1,5 +1,5 @@
 import os
-from dotenv import load_dotenv
+import asyncio
 from telegram import Update
 from telegram.ext import (
     ApplicationBuilder,
@@ -9,29 +9,19 @@ from telegram.ext import (
 )
 import logging
 
-# Setup logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+# Logging dikonfigurasi di load_environment() (setelah .env dimuat), lihat app/utils/logging_config.py
 logger = logging.getLogger(__name__)
 
 # Load environment variables
-def load_environment():
-    """Load and validate environment variables"""
+def load_environment(process_name: str = None):
+    """Memuat & memvalidasi settings (env/.env, sekali per proses), lalu pasang logging terstruktur"""
+    from app.utils.logging_config import setup_logging # Ikut memuat .env lewat app.utils.config
+    from app.utils.settings import validate_settings
+
+    setup_logging(process_name)
     try:
-        # Adjust path according to your project structure
-        env_path = os.path.join(os.path.dirname(__file__), '..', 'env', '.env')
-        load_dotenv(env_path)
-        
-        TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
-        AGENDA_PATH = os.getenv('AGENDA_PATH', 'data')
-        
-        if not TELEGRAM_TOKEN:
-            raise ValueError("TELEGRAM_TOKEN tidak ditemukan di file .env")
-            
-        return TELEGRAM_TOKEN, AGENDA_PATH
-        
+        settings = validate_settings()
+        return settings.telegram_token, settings.agenda_path
     except Exception as e:
         logger.error(f"Gagal memuat environment variables: {e}")
         raise
@@ -46,6 +36,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         "/hapus - Menghapus agenda\n"
         "/cari - Mencari agenda\n"
         "/status - Mengubah status agenda\n"
+        "/kalender - Memilih kalender Google yang disinkronkan\n"
         "/batal - Membatalkan percakapan saat ini"
     )
 
@@ -67,6 +58,8 @@ def setup_handlers(application):
     from app.handlers.edit import edit_handler
     from app.handlers.search import search_handler
     from app.handlers.status import status_handler
+    from app.handlers.calendar import kalender_handler
+    from app.handlers.stats import stats_handler, profile_handler
     
     application.add_handler(catat_handler)
     application.add_handler(lihat_handler)
@@ -74,6 +67,163 @@ def setup_handlers(application):
     application.add_handler(edit_handler)
     application.add_handler(search_handler)
     application.add_handler(status_handler)
+    application.add_handler(kalender_handler)
+    application.add_handler(stats_handler)
+    application.add_handler(profile_handler)
+
+async def renew_google_watch_channels_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Job berkala: daftarkan/perbarui watch channel Google Calendar sebelum kedaluwarsa"""
+    from app.utils.google_push import renew_expiring_channels
+
+    # Panggilan Google API bersifat blocking, jalankan di thread agar event loop tidak tertahan
+    registered = await asyncio.to_thread(renew_expiring_channels)
+    if registered:
+        logger.info(f"{registered} Google watch channel didaftarkan/diperbarui")
+
+def setup_jobs(application):
+    """Register scheduled jobs"""
+    from app.utils.config import GOOGLE_PUSH_ADDRESS, GOOGLE_WATCH_RENEW_INTERVAL
+    from app.utils.google_push import initialize_push_tables
+
+    if not GOOGLE_PUSH_ADDRESS:
+        logger.info("GOOGLE_PUSH_ADDRESS tidak diset, push notification Google Calendar dinonaktifkan")
+        return
+    if application.job_queue is None:
+        logger.warning("JobQueue tidak tersedia (install python-telegram-bot[job-queue]), watch channel tidak akan diperbarui")
+        return
+
+    initialize_push_tables()
+    application.job_queue.run_repeating(
+        renew_google_watch_channels_job,
+        interval=GOOGLE_WATCH_RENEW_INTERVAL,
+        first=10,
+        name="renew_google_watch_channels",
+    )
+
+async def post_init(application) -> None:
+    """Dijalankan sekali setelah Application diinisialisasi"""
+    from app.utils.data_manager import initialize_agenda_data
+    from app.utils.metrics import loop_lag_monitor
+    from app.utils.preload import start_background_preload
+    from app.utils.token_refresher import token_refresher
+
+    await loop_lag_monitor.start()
+
+    # Pastikan tabel agenda dan index-nya ada (migrasi CSV juga dijalankan di sini)
+    await asyncio.to_thread(initialize_agenda_data, application)
+
+    # Refresh token Google di background agar request user tidak menunggu refresh
+    # (di mode multi-worker hanya worker utama, agar token tidak di-refresh berkali-kali)
+    if application.bot_data.get("primary_worker", True):
+        await token_refresher.start()
+
+    # pandas/dateparser/Google diimpor saat dipakai; muat di background agar update pertama tidak menunggu
+    start_background_preload()
+
+async def post_shutdown(application) -> None:
+    """Dijalankan sekali saat Application berhenti"""
+    from app.utils.data_manager import close_db_pool
+    from app.utils.metrics import loop_lag_monitor
+    from app.utils.token_refresher import token_refresher
+
+    await token_refresher.stop()
+    await loop_lag_monitor.stop()
+    close_db_pool()
+
+async def run_server(application, web_app=None, host: str = None, port: int = None, use_webhook: bool = True) -> None:
+    """
+    Menjalankan bot bersama server ASGI (uvicorn) dalam satu event loop.
+    use_webhook=True: Telegram mengirim update ke endpoint webhook; False: bot tetap long polling.
+    web_app (aplikasi ASGI, misal dashboard Flask) melayani semua path selain endpoint webhook.
+    """
+    import secrets
+    import uvicorn
+    from app.utils.config import (
+        WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_MAX_CONNECTIONS
+    )
+    from app.web.webhook import TelegramWebhookApp
+
+    webhook_app = None
+    if use_webhook:
+        if not WEBHOOK_URL:
+            raise ValueError("WEBHOOK_URL wajib diisi untuk TELEGRAM_MODE=webhook")
+        # Token rahasia acak cukup karena webhook didaftarkan ulang setiap start
+        secret_token = WEBHOOK_SECRET_TOKEN or secrets.token_urlsafe(32)
+        webhook_app = TelegramWebhookApp(application, secret_token)
+
+    async def asgi_app(scope, receive, send):
+        if webhook_app and (web_app is None or (scope["type"] == "http" and scope["path"] == webhook_app.path)):
+            return await webhook_app(scope, receive, send)
+        return await web_app(scope, receive, send)
+
+    # Urutan siklus hidup sama dengan run_polling(): initialize -> post_init -> start
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+    try:
+        if webhook_app:
+            await webhook_app.start()
+            await application.bot.set_webhook(
+                url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+                secret_token=secret_token,
+                allowed_updates=Update.ALL_TYPES,
+                max_connections=WEBHOOK_MAX_CONNECTIONS,
+            )
+        else:
+            await application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
+
+        host, port = host or WEBHOOK_LISTEN, port or WEBHOOK_PORT
+        logger.info(f"🤖 Bot aktif ({'webhook' if webhook_app else 'polling'}), server HTTP di {host}:{port}")
+        server = uvicorn.Server(uvicorn.Config(asgi_app, host=host, port=port, lifespan="off", log_level="info"))
+        await server.serve() # Berhenti saat SIGINT/SIGTERM
+    finally:
+        if webhook_app:
+            await webhook_app.stop()
+        if application.updater and application.updater.running:
+            await application.updater.stop()
+        await application.stop()
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+
+def build_application(token: str, primary: bool = True, workers: int = 1):
+    """
+    Membuat Application bot lengkap dengan handler dan job.
+    primary=False untuk worker tambahan di mode multi-worker: handler sama, tanpa job
+    berkala dan refresh token background (cukup dijalankan sekali oleh worker utama).
+    workers: jumlah proses bot, agar batas kirim global Telegram dibagi rata antar worker.
+    """
+    from app.utils.config import TELEGRAM_API_BASE_URL, TELEGRAM_GLOBAL_RATE
+    from app.utils.metrics import InstrumentedRequest, instrument_handlers, metrics_registry
+    from app.utils.persistence import SQLitePersistence
+    from app.utils.telegram_send_queue import TelegramSendQueue
+
+    # Semua pesan keluar (handler, notifikasi, job) melewati antrean ini: batas global/per chat & retry RetryAfter
+    send_queue = TelegramSendQueue(global_rate=TELEGRAM_GLOBAL_RATE / max(workers, 1))
+    metrics_registry.register_collector("agenda_telegram_send_queue", send_queue.get_metrics)
+
+    builder = (
+        ApplicationBuilder()
+        .token(token)
+        .request(InstrumentedRequest(connection_pool_size=256)) # Sama dengan default builder, plus metrik per metode
+        .rate_limiter(send_queue)
+        .persistence(SQLitePersistence()) # State percakapan tetap ada setelah restart/deploy
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+    )
+    if TELEGRAM_API_BASE_URL: # Misal server Bot API lokal atau tools/fake_telegram_api.py
+        builder = builder.base_url(TELEGRAM_API_BASE_URL)
+    application = builder.build()
+
+    application.bot_data["primary_worker"] = primary
+
+    # Setup handlers
+    setup_handlers(application)
+    instrument_handlers(application) # Durasi per handler (db / telegram / google / render) untuk /metrics & /stats
+    if primary:
+        setup_jobs(application)
+    return application
 
 def main():
     try:
@@ -83,14 +233,16 @@ def main():
         # Setup database directory
         os.makedirs(AGENDA_PATH, exist_ok=True)
         
+        from app.utils.config import TELEGRAM_MODE
+
         # Create application
-        application = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
-        
-        # Setup handlers
-        setup_handlers(application)
+        application = build_application(TELEGRAM_TOKEN)
         
-        logger.info("🤖 Bot aktif dan siap melayani...")
-        application.run_polling()
+        if TELEGRAM_MODE == "webhook":
+            asyncio.run(run_server(application))
+        else:
+            logger.info("🤖 Bot aktif dan siap melayani...")
+            application.run_polling()
         
     except Exception as e:
         logger.error(f"Error saat menjalankan bot: {e}")
@@ -0,0 +1,45 @@
+# app/server.py
+# Server terpadu: bot Telegram (webhook atau polling), dashboard web, REST API, dan
+# callback OAuth Google dalam satu proses dan satu event loop. Modul data_manager,
+# credential_store, dan cache Google hanya dimuat sekali, sehingga bot dan dashboard
+# berbagi pool koneksi SQLite serta cache kredensial yang sama.
+#
+# Jalankan dari root proyek:
+#   python -m app.server
+# (menggantikan app/main.py + app_server.py + oauth_callback_server.py yang terpisah)
+
+import os
+import asyncio
+import logging
+
+from a2wsgi import WSGIMiddleware
+
+from app.main import load_environment, build_application, run_server
+
+logger = logging.getLogger(__name__)
+
+def main():
+    try:
+        TELEGRAM_TOKEN, AGENDA_PATH = load_environment()
+        os.makedirs(AGENDA_PATH, exist_ok=True)
+
+        from app.utils.config import TELEGRAM_MODE, SERVER_LISTEN, SERVER_PORT, SERVER_WSGI_THREADS
+        from app_server import app as flask_app # Rute dashboard, API, OAuth callback, push Google
+
+        application = build_application(TELEGRAM_TOKEN)
+        # Flask (WSGI) dijalankan di thread pool a2wsgi agar tidak memblok event loop bot
+        web_app = WSGIMiddleware(flask_app, workers=SERVER_WSGI_THREADS)
+
+        asyncio.run(run_server(
+            application,
+            web_app=web_app,
+            host=SERVER_LISTEN,
+            port=SERVER_PORT,
+            use_webhook=TELEGRAM_MODE == "webhook",
+        ))
+    except Exception as e:
+        logger.error(f"Error saat menjalankan server terpadu: {e}")
+        exit(1)
+
+if __name__ == "__main__":
+    main()
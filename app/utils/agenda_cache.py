@@ -0,0 +1,132 @@
+# app/utils/agenda_cache.py
+
+import time
+import threading
+from collections import OrderedDict
+
+from app.utils.config import AGENDA_CACHE_MAX_ITEMS, AGENDA_CACHE_MAX_RANGES, AGENDA_CACHE_VERSION_CHECK_INTERVAL
+
+# ===============================
+# ⚡ Cache Baca Agenda (per proses)
+# ===============================
+# Menyimpan baris agenda per EventID dan hasil query per rentang tanggal (seperti yang
+# ditampilkan /lihat), sehingga tombol Edit/Hapus/Status tidak perlu query ulang baris yang
+# baru saja ditampilkan.
+# - Tulis dari proses ini (save/update/delete di data_manager) langsung memperbarui atau
+#   membuang entri (write-through) dan mengosongkan cache rentang tanggal. Versi agenda yang
+#   ikut naik karena tulis itu dilaporkan lewat local_write(), jadi tidak mengosongkan cache.
+# - Tulis dari proses lain (app_server, worker bot lain) terdeteksi dari versi agenda
+#   (agenda_meta, dinaikkan trigger SQLite) yang dicek paling sering sekali per
+#   AGENDA_CACHE_VERSION_CHECK_INTERVAL; jika berubah, seluruh cache dikosongkan.
+# Nilai yang dikembalikan selalu salinan, jadi pemanggil bebas mengubahnya.
+
+class AgendaReadCache:
+    def __init__(self, version_source, max_items: int = AGENDA_CACHE_MAX_ITEMS, max_ranges: int = AGENDA_CACHE_MAX_RANGES,
+                 version_check_interval: float = AGENDA_CACHE_VERSION_CHECK_INTERVAL):
+        self._version_source = version_source # Callable -> versi agenda saat ini
+        self.max_items = max_items
+        self.max_ranges = max_ranges
+        self.version_check_interval = version_check_interval
+        self._items = OrderedDict() # EventID -> dict baris; urutan = LRU
+        self._ranges = OrderedDict() # (start_date, end_date) -> list dict baris
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        # Naik setiap ada tulis/pengosongan; hasil query yang dimulai sebelumnya tidak disimpan
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_version(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.version_check_interval:
+            return
+        version = self._version_source()
+        with self._lock:
+            self._checked_at = now
+            if version != self._version:
+                if self._version is not None:
+                    self._clear_locked()
+                self._version = version
+
+    def _clear_locked(self):
+        self._items.clear()
+        self._ranges.clear()
+        self._generation += 1
+        self.invalidations += 1
+
+    @staticmethod
+    def _store(entries: OrderedDict, key, value, max_entries: int):
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > max_entries:
+            entries.popitem(last=False)
+
+    def _lookup(self, entries: OrderedDict, key):
+        self._check_version()
+        with self._lock:
+            value = entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None, self._generation
+            entries.move_to_end(key)
+            self.hits += 1
+            return value, self._generation
+
+    # --- Baca ---
+
+    def get_item(self, event_id: str):
+        """Mengembalikan (salinan item atau None jika tidak ada di cache, generation untuk put_item)."""
+        item, generation = self._lookup(self._items, event_id)
+        return (dict(item) if item is not None else None), generation
+
+    def put_item(self, event_id: str, item: dict, generation: int):
+        with self._lock:
+            if generation == self._generation:
+                self._store(self._items, event_id, dict(item), self.max_items)
+
+    def get_range(self, key):
+        """Mengembalikan (salinan list baris atau None jika tidak ada di cache, generation untuk put_range)."""
+        rows, generation = self._lookup(self._ranges, key)
+        return ([dict(row) for row in rows] if rows is not None else None), generation
+
+    def put_range(self, key, rows: list, generation: int):
+        with self._lock:
+            if generation == self._generation:
+                rows = [dict(row) for row in rows]
+                self._store(self._ranges, key, rows, self.max_ranges)
+                for row in rows: # Baris dari rentang juga mengisi cache per EventID (tombol di /lihat)
+                    self._store(self._items, row["EventID"], row, self.max_items)
+
+    # --- Tulis (write-through) ---
+
+    def item_written(self, event_id: str, item: dict = None):
+        """Dipanggil setelah agenda disimpan/diubah (item = baris terbaru) atau dihapus (item None)."""
+        with self._lock:
+            self._generation += 1
+            self._ranges.clear() # Tanggal/isi baris bisa berubah, rentang mana pun bisa terpengaruh
+            if item is None:
+                self._items.pop(event_id, None)
+            else:
+                self._store(self._items, event_id, dict(item), self.max_items)
+
+    def local_write(self, version_before: int, version_after: int):
+        """
+        Versi agenda naik dari version_before ke version_after karena tulis proses ini (keduanya
+        dibaca di transaksi tulis yang sama). Jika cache masih di version_before, versi baru
+        diadopsi tanpa pengosongan; selain itu ada tulis proses lain dan cek versi berikutnya
+        tetap mengosongkan cache.
+        """
+        with self._lock:
+            if self._version == version_before:
+                self._version = version_after
+
+    def clear(self):
+        with self._lock:
+            self._clear_locked()
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            return {"items": len(self._items), "ranges": len(self._ranges), "hits": self.hits,
+                    "misses": self.misses, "invalidations": self.invalidations, "version": self._version}
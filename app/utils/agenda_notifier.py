@@ -0,0 +1,72 @@
+# app/utils/agenda_notifier.py
+
+import logging
+import time
+import threading
+
+from app.utils.config import AGENDA_CHANGE_POLL_INTERVAL, AGENDA_CHANGES_RETENTION
+from app.utils.data_manager import get_latest_change_seq, prune_agenda_changes
+
+logger = logging.getLogger(__name__)
+
+# ===============================
+# 🔔 Notifikasi Perubahan Agenda
+# ===============================
+# Agenda bisa diubah oleh proses bot maupun app_server, jadi perubahan dideteksi dari log
+# agenda_changes (diisi trigger SQLite). Satu thread per proses memeriksa MAX(Seq) secara
+# berkala dan membangunkan semua penunggu, sehingga jumlah query tidak bertambah seiring
+# jumlah browser yang terhubung.
+
+_PRUNE_EVERY = 3600 # Detik
+
+class AgendaChangeNotifier:
+    def __init__(self, poll_interval: float = AGENDA_CHANGE_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._cond = threading.Condition()
+        self._latest_seq = 0
+        self._thread = None
+        self._last_prune = 0.0
+
+    def _ensure_started(self):
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._latest_seq = get_latest_change_seq()
+            self._thread = threading.Thread(target=self._run, name="agenda_change_notifier", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                seq = get_latest_change_seq()
+                if time.monotonic() - self._last_prune > _PRUNE_EVERY:
+                    prune_agenda_changes(AGENDA_CHANGES_RETENTION)
+                    self._last_prune = time.monotonic()
+            except Exception as e:
+                logger.error(f"Error checking agenda changes: {e}")
+                seq = None
+            if seq is not None:
+                with self._cond:
+                    if seq != self._latest_seq:
+                        self._latest_seq = seq
+                        self._cond.notify_all()
+            time.sleep(self.poll_interval)
+
+    def latest_seq(self) -> int:
+        self._ensure_started()
+        with self._cond:
+            return self._latest_seq
+
+    def wait(self, after_seq: int, timeout: float) -> int:
+        """Memblok sampai ada perubahan dengan Seq > after_seq atau timeout; mengembalikan Seq terbaru."""
+        self._ensure_started()
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._latest_seq <= after_seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self._latest_seq
+
+agenda_notifier = AgendaChangeNotifier()
@@ -4,6 +4,11 @@ import os
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
+from app.utils.settings import load_env_file
+
+# .env di-parse sekali per proses, sebelum konstanta berbasis env di bawah dibaca (lihat settings.py)
+load_env_file()
+
 # ===============================
 # 🔧 Konfigurasi & Konstanta
 # ===============================
@@ -100,3 +105,117 @@ GOOGLE_SCOPES = [
     'openid', # Tambahkan scope ini
 ]
 GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI") # Pastikan baris ini ada dan tidak dikomentari
+GOOGLE_EVENT_DEFAULT_DURATION = timedelta(hours=1) # Durasi event Google untuk agenda (agenda lokal hanya punya jam mulai)
+
+# KONSTANTA GOOGLE CALENDAR PUSH NOTIFICATION (watch channels)
+GOOGLE_PUSH_ADDRESS = os.getenv("GOOGLE_PUSH_ADDRESS") # URL HTTPS publik ke endpoint /google_push di app_server.py
+GOOGLE_WATCH_TTL = timedelta(days=7) # Masa berlaku channel yang diminta ke Google (maksimum yang diizinkan)
+GOOGLE_WATCH_RENEW_MARGIN = timedelta(hours=12) # Channel diperbarui jika akan kedaluwarsa dalam rentang ini
+GOOGLE_WATCH_RENEW_INTERVAL = timedelta(hours=1) # Seberapa sering scheduler bot memeriksa channel
+
+# KONSTANTA CREDENTIAL STORE
+GOOGLE_CREDENTIALS_CACHE_TTL = 300 # Detik; kredensial di cache memori dimuat ulang dari DB setelah ini
+
+# KONSTANTA BACKGROUND TOKEN REFRESH
+GOOGLE_TOKEN_REFRESH_MARGIN = timedelta(minutes=10) # Token di-refresh selambatnya sekian sebelum kedaluwarsa
+GOOGLE_TOKEN_REFRESH_JITTER = timedelta(minutes=3) # Acak tambahan agar refresh banyak user tidak serempak
+GOOGLE_TOKEN_REFRESH_CONCURRENCY = 4 # Maksimum refresh yang berjalan bersamaan
+GOOGLE_TOKEN_REFRESH_RETRY = timedelta(minutes=1) # Jeda sebelum mencoba lagi refresh yang gagal
+
+# KONSTANTA RATE LIMIT GOOGLE API
+GOOGLE_API_QPS = 10.0 # Kuota global per project (request/detik) yang dijaga bot
+GOOGLE_API_BURST = 20 # Kapasitas token bucket global
+GOOGLE_API_USER_QPS = 2.0 # Batas per user agar satu user tidak menghabiskan kuota project
+GOOGLE_API_USER_BURST = 5
+GOOGLE_API_MAX_RETRIES = 5 # Percobaan ulang untuk rateLimitExceeded / 429 / 5xx
+GOOGLE_API_BACKOFF_BASE = 1.0 # Detik, dikali 2 setiap percobaan
+GOOGLE_API_BACKOFF_MAX = 64.0
+
+# KONSTANTA MULTI-CALENDAR
+GOOGLE_CALENDAR_LIST_CACHE_TTL = 600 # Detik; hasil calendarList per user di-cache selama ini
+
+# KONSTANTA REST API (app_server.py, /api/v1)
+API_TOKEN = os.getenv("API_TOKEN") # Jika diisi, setiap request API wajib membawa header 'Authorization: Bearer <API_TOKEN>'; jika kosong API hanya-baca
+API_DEFAULT_LIMIT = 50 # Jumlah agenda per halaman jika ?limit tidak diisi
+API_MAX_LIMIT = 200
+API_MAX_BULK = 500 # Maksimum operasi dalam satu request bulk
+API_GZIP_MIN_SIZE = 500 # Byte; respons yang lebih kecil tidak dikompres
+
+# KONSTANTA CACHE RESPONS WEB
+RESPONSE_CACHE_MAX_ENTRIES = 256 # Jumlah halaman/respons API yang disimpan di memori per proses
+
+# KONSTANTA CACHE BACA AGENDA
+AGENDA_CACHE_MAX_ITEMS = 2048 # Baris agenda (per EventID) yang disimpan di memori per proses
+AGENDA_CACHE_MAX_RANGES = 128 # Hasil query rentang tanggal (/lihat) yang disimpan
+AGENDA_CACHE_VERSION_CHECK_INTERVAL = 1.0 # Detik; perubahan dari proses lain terlihat paling lambat sekian
+
+# KONSTANTA METRIK & INSTRUMENTASI
+METRICS_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0) # Detik
+EVENT_LOOP_LAG_INTERVAL = 0.5 # Detik antar pengukuran event-loop lag bot
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") # Jika diisi, /metrics wajib header Authorization: Bearer <token>
+ADMIN_USER_IDS = {int(user_id) for user_id in os.getenv("ADMIN_USER_IDS", "").split(",") if user_id.strip()} # Boleh memakai /stats
+
+# KONSTANTA LOGGING
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower() # 'json' (satu objek per baris) atau 'text'
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01")) # Fraksi update yang log DEBUG-nya ditulis (1.0 = semua)
+
+# KONSTANTA PROFILING HANDLER (opt-in)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0")) # Fraksi update per handler yang diprofil; 0 = mati (bisa diubah lewat /profile)
+PROFILE_MODE = os.getenv("PROFILE_MODE", "stack").lower() # 'stack' (sampel stack, siap flame graph) atau 'cprofile'
+PROFILE_DIR = os.getenv("PROFILE_DIR", "").strip() # Folder file profil; kosong = <AGENDA_PATH>/profiles
+PROFILE_MAX_FILES = 500 # File profil terlama dihapus jika melebihi jumlah ini
+PROFILE_STACK_INTERVAL = 0.005 # Detik antar sampel stack pada mode 'stack'
+
+# KONSTANTA STARTUP
+HEAVY_MODULE_PRELOAD_DELAY = float(os.getenv("HEAVY_MODULE_PRELOAD_DELAY", "1.0")) # Detik setelah bot siap sebelum pandas/dateparser/Google dimuat di background; < 0 = tidak dipreload
+
+# KONSTANTA LIVE UPDATE DASHBOARD (Server-Sent Events)
+AGENDA_CHANGE_POLL_INTERVAL = 0.5 # Detik; satu thread per proses memeriksa log perubahan agenda
+SSE_HEARTBEAT_INTERVAL = 15 # Detik; komentar ping agar proxy tidak menutup koneksi idle
+SSE_MAX_STREAM_DURATION = 600 # Detik; stream ditutup lalu browser menyambung ulang dengan Last-Event-ID
+SSE_MAX_CLIENTS = 50 # Maksimum stream bersamaan per proses (masing-masing memakai satu thread)
+AGENDA_CHANGES_RETENTION = 86400 # Detik; log perubahan yang lebih tua dihapus
+
+# KONSTANTA MODE WEBHOOK TELEGRAM
+TELEGRAM_MODE = os.getenv("TELEGRAM_MODE", "polling").lower() # 'polling' atau 'webhook'
+TELEGRAM_API_BASE_URL = os.getenv("TELEGRAM_API_BASE_URL") # Misal http://127.0.0.1:8081/bot untuk tools/fake_telegram_api.py
+WEBHOOK_URL = os.getenv("WEBHOOK_URL") # URL HTTPS publik (tanpa path), misal https://bot.example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+WEBHOOK_SECRET_TOKEN = os.getenv("WEBHOOK_SECRET_TOKEN") # Jika kosong, dibuat acak setiap start
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_MAX_CONNECTIONS = 40 # Koneksi paralel maksimum dari Telegram ke webhook
+WEBHOOK_MAX_BODY_SIZE = 1024 * 1024 # Byte; update Telegram jauh lebih kecil dari ini
+WEBHOOK_BATCH_MAX = 100 # Update maksimum yang didekode & diantrekan sekaligus
+WEBHOOK_BATCH_WINDOW = 0.0 # Detik menunggu update tambahan sebelum batch diproses (0 = hanya yang sudah tiba)
+
+# KONSTANTA ANTREAN KIRIM TELEGRAM (flood control)
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30")) # Pesan/detik untuk seluruh bot (dibagi rata antar worker); 0 = tanpa batas
+TELEGRAM_GLOBAL_BURST = 10
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1")) # Pesan/detik per chat (Telegram mentoleransi burst singkat); 0 = tanpa batas
+TELEGRAM_CHAT_BURST = 3
+TELEGRAM_GROUP_PER_MINUTE = 20 # Batas tambahan untuk grup/channel
+TELEGRAM_GROUP_BURST = 3
+TELEGRAM_SEND_MAX_RETRIES = 3 # Percobaan ulang setelah RetryAfter (429)
+TELEGRAM_RETRY_AFTER_MAX = 60.0 # Detik; RetryAfter yang lebih lama langsung dilempar ke pemanggil
+
+# KONSTANTA BATAS PESAN TELEGRAM (app/utils/message_builder.py)
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096 # Unit UTF-16 setelah tag HTML di-parse
+TELEGRAM_MAX_INLINE_BUTTONS = 100 # Total tombol inline keyboard per pesan
+
+# KONSTANTA DATABASE & SERVER TERPADU
+DB_POOL_SIZE = 8 # Koneksi SQLite menganggur yang disimpan per proses
+DB_BUSY_TIMEOUT_MS = 5000 # Lama menunggu lock database sebelum 'database is locked'
+SERVER_LISTEN = os.getenv("SERVER_LISTEN", "0.0.0.0") # Server terpadu (python -m app.server)
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_WSGI_THREADS = 64 # Thread untuk dashboard Flask; stream SSE masing-masing memakai satu thread
+
+# KONSTANTA MODE MULTI-WORKER (python -m app.cluster)
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", "0")) # Jumlah proses worker bot; 0 = jumlah core CPU
+BOT_WORKER_QUEUE_SIZE = 10000 # Batch update maksimum yang mengantre per worker
+
+# KONSTANTA PERSISTENCE PERCAKAPAN (SQLite)
+PERSISTENCE_UPDATE_INTERVAL = 2 # Detik; seberapa sering python-telegram-bot menyerahkan data yang berubah
+PERSISTENCE_FLUSH_INTERVAL = 5 # Detik; perubahan yang tertunda ditulis paling lambat sekian
+PERSISTENCE_FLUSH_THRESHOLD = 100 # Perubahan tertunda sebanyak ini langsung ditulis
@@ -0,0 +1,202 @@
+# app/utils/credential_store.py
+
+import logging
+import os
+import json
+import time
+import pickle
+import threading
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from app.utils.config import TZ, GOOGLE_SCOPES, GOOGLE_TOKEN_DIR, GOOGLE_CREDENTIALS_CACHE_TTL
+from app.utils.data_manager import get_db_connection
+from app.utils.settings import get_settings
+
+if TYPE_CHECKING: # google.oauth2 (beserta google.auth) baru dimuat saat kredensial pertama dibaca
+    from google.oauth2.credentials import Credentials
+
+try: # Enkripsi bersifat opsional, hanya aktif jika GOOGLE_CREDENTIALS_KEY diset
+    from cryptography.fernet import Fernet
+except ImportError:
+    Fernet = None
+
+logger = logging.getLogger(__name__)
+
+# ===============================
+# 🔐 Credential Store (Google OAuth tokens)
+# ===============================
+# Menggantikan file data/google_tokens/token_{user_id}.pickle.
+# Kredensial disimpan sebagai JSON (opsional terenkripsi) di tabel SQLite google_credentials,
+# dengan cache di memori agar lookup berulang tidak menyentuh disk.
+
+_ENCRYPTED_PREFIX = "enc:"
+
+_cache = {} # user_id -> (Credentials, waktu dimuat)
+_lock = threading.RLock()
+_initialized = False
+_save_listeners = [] # Callback(user_id, creds) yang dipanggil setiap kali kredensial disimpan
+
+def _get_fernet():
+    key = get_settings().google_credentials_key
+    if not key:
+        return None
+    if Fernet is None:
+        raise RuntimeError("GOOGLE_CREDENTIALS_KEY diset tetapi paket 'cryptography' belum terinstal.")
+    return Fernet(key.encode())
+
+def _serialize(creds: "Credentials") -> str:
+    data = creds.to_json()
+    fernet = _get_fernet()
+    if fernet:
+        return _ENCRYPTED_PREFIX + fernet.encrypt(data.encode()).decode()
+    return data
+
+def _deserialize(raw: str) -> "Credentials":
+    from google.oauth2.credentials import Credentials
+
+    if raw.startswith(_ENCRYPTED_PREFIX):
+        fernet = _get_fernet()
+        if fernet is None:
+            raise RuntimeError("Kredensial tersimpan terenkripsi tetapi GOOGLE_CREDENTIALS_KEY tidak diset.")
+        raw = fernet.decrypt(raw[len(_ENCRYPTED_PREFIX):].encode()).decode()
+    # Bukan from_authorized_user_info: itu mewajibkan refresh_token, sedangkan Google tidak selalu
+    # mengirimnya (to_json() lalu menghilangkan field-nya). Token akses tanpa refresh_token tetap
+    # valid sampai kedaluwarsa, seperti perilaku store pickle lama.
+    info = json.loads(raw)
+    expiry = info.get("expiry")
+    if expiry: # to_json() menulis UTC tanpa zona, misal '2025-07-20T10:00:00.123456Z'; Credentials memakai datetime naif UTC
+        expiry = datetime.strptime(expiry.rstrip("Z").split(".")[0], "%Y-%m-%dT%H:%M:%S")
+    return Credentials(
+        token=info.get("token"),
+        refresh_token=info.get("refresh_token"),
+        token_uri=info.get("token_uri"),
+        client_id=info.get("client_id"),
+        client_secret=info.get("client_secret"),
+        scopes=info.get("scopes") or GOOGLE_SCOPES,
+        expiry=expiry or None,
+    )
+
+def _ensure_initialized():
+    """Membuat tabel dan menjalankan migrasi pickle satu kali per proses."""
+    global _initialized
+    if _initialized:
+        return
+    with _lock:
+        if _initialized:
+            return
+        conn = get_db_connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS google_credentials (
+                UserID TEXT PRIMARY KEY,
+                Credentials TEXT NOT NULL, -- JSON dari Credentials.to_json(), opsional terenkripsi
+                UpdatedAt TEXT NOT NULL
+            )
+        """)
+        conn.commit()
+        conn.close()
+        _initialized = True
+        migrate_pickle_tokens()
+
+def migrate_pickle_tokens() -> int:
+    """
+    Migrasi satu kali dari file token_{user_id}.pickle ke tabel google_credentials.
+    File yang berhasil dimigrasi diganti namanya menjadi *.pickle.migrated sebagai backup.
+    Mengembalikan jumlah token yang dimigrasi.
+    """
+    if not os.path.isdir(GOOGLE_TOKEN_DIR):
+        return 0
+    migrated = 0
+    for filename in os.listdir(GOOGLE_TOKEN_DIR):
+        if not (filename.startswith("token_") and filename.endswith(".pickle")):
+            continue
+        user_id = filename[len("token_"):-len(".pickle")]
+        token_path = os.path.join(GOOGLE_TOKEN_DIR, filename)
+        try:
+            # Satu-satunya tempat pickle masih dibaca: file lama buatan bot sendiri
+            with open(token_path, 'rb') as token_file:
+                creds = pickle.load(token_file)
+            save_credentials(user_id, creds)
+            os.rename(token_path, token_path + ".migrated")
+            migrated += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Gagal migrasi token Google {filename}: {e}")
+    if migrated:
+        logger.info(f"✅ {migrated} token Google dimigrasi dari file pickle ke credential store.")
+    return migrated
+
+def load_credentials(user_id):
+    """Mengembalikan Credentials milik user (dari cache bila masih segar), atau None jika belum terhubung."""
+    _ensure_initialized()
+    user_id = str(user_id)
+    with _lock:
+        cached = _cache.get(user_id)
+        # TTL menjaga cache tetap sinkron jika proses lain (bot/app_server) mengubah atau mencabut token
+        if cached and time.monotonic() - cached[1] < GOOGLE_CREDENTIALS_CACHE_TTL:
+            return cached[0]
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT Credentials FROM google_credentials WHERE UserID = ?", (user_id,))
+    row = cursor.fetchone()
+    conn.close()
+    if not row:
+        with _lock:
+            _cache.pop(user_id, None)
+        return None
+
+    try:
+        creds = _deserialize(row["Credentials"])
+    except Exception as e:
+        logger.warning(f"Stored Google credentials for user {user_id} are invalid: {e}")
+        return None
+    with _lock:
+        _cache[user_id] = (creds, time.monotonic())
+    return creds
+
+def save_credentials(user_id, creds: "Credentials"):
+    """Menyimpan (insert/update) kredensial user secara atomik dan memperbarui cache."""
+    _ensure_initialized()
+    user_id = str(user_id)
+    data = _serialize(creds)
+    conn = get_db_connection()
+    with conn: # Satu transaksi: commit jika sukses, rollback jika gagal
+        conn.execute("""
+            INSERT INTO google_credentials (UserID, Credentials, UpdatedAt) VALUES (?, ?, ?)
+            ON CONFLICT(UserID) DO UPDATE SET Credentials = excluded.Credentials, UpdatedAt = excluded.UpdatedAt
+        """, (user_id, data, datetime.now(TZ).isoformat(timespec='seconds')))
+    conn.close()
+    with _lock:
+        _cache[user_id] = (creds, time.monotonic())
+    for listener in list(_save_listeners):
+        listener(user_id, creds)
+
+def add_save_listener(callback):
+    """Mendaftarkan callback(user_id, creds) yang dipanggil setelah kredensial disimpan (dari thread mana pun)."""
+    _save_listeners.append(callback)
+
+def remove_save_listener(callback):
+    if callback in _save_listeners:
+        _save_listeners.remove(callback)
+
+def delete_credentials(user_id) -> bool:
+    """Menghapus kredensial user dari store dan cache. True jika ada yang dihapus."""
+    _ensure_initialized()
+    user_id = str(user_id)
+    conn = get_db_connection()
+    with conn:
+        cursor = conn.execute("DELETE FROM google_credentials WHERE UserID = ?", (user_id,))
+    conn.close()
+    with _lock:
+        _cache.pop(user_id, None)
+    return cursor.rowcount > 0
+
+def list_user_ids() -> list[str]:
+    """Mengembalikan daftar user_id yang memiliki kredensial Google tersimpan."""
+    _ensure_initialized()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT UserID FROM google_credentials")
+    user_ids = [row["UserID"] for row in cursor.fetchall()]
+    conn.close()
+    return user_ids
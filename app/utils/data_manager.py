@@ -1,46 +1,95 @@
 # app/utils/data_manager.py
 
+import logging
 import os
 import sqlite3
-import pandas as pd
-from datetime import datetime, date, time, timedelta
+import threading
+from datetime import datetime, date, time, timedelta, timezone
 from telegram.ext import ContextTypes
 import uuid
-from dotenv import load_dotenv # Pastikan find_dotenv DIHAPUS dari import di sini
+from functools import lru_cache
+from contextlib import contextmanager
 
 # Impor TZ dan SQLITE_DB_NAME dari config
-from app.utils.config import TZ, SQLITE_DB_NAME
+from app.utils.config import TZ, DB_POOL_SIZE, DB_BUSY_TIMEOUT_MS
+from app.utils.settings import get_settings
+from app.utils.agenda_cache import AgendaReadCache
+from app.utils.metrics import timed_db, metrics_registry
+
+logger = logging.getLogger(__name__)
 
 # ===============================
 # 🔧 Konfigurasi & Konstanta (Dimuat di sini)
 # ===============================
 
-# Panggil load_dotenv() di tingkat modul ini untuk memastikan variabel lingkungan
-# tersedia saat modul ini diimpor dan variabel globalnya disetel.
-# Ini akan melengkapi panggilan di main.py untuk memastikan variabel tersedia di semua konteks.
-project_root_for_dm = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-dotenv_path_for_dm = os.path.join(project_root_for_dm, 'env', '.env')
-load_dotenv(dotenv_path=dotenv_path_for_dm)
-
-# Ambil variabel lingkungan langsung dari os.environ
-AGENDA_FOLDER_PATH = os.getenv("AGENDA_PATH")
-GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
-GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
-
-# Path lengkap ke file database SQLite
-DB_FILE_PATH = os.path.join(AGENDA_FOLDER_PATH, SQLITE_DB_NAME)
+# Path folder data dan file database dari settings (dimuat & divalidasi sekali per proses;
+# gagal cepat dengan SettingsError jika AGENDA_PATH tidak diisi)
+AGENDA_FOLDER_PATH = get_settings().agenda_path
+DB_FILE_PATH = get_settings().db_path
 
 # ===============================
 # 🔁 Helper Functions (Data Management - SQLite)
 # ===============================
 
+# --- Pool koneksi SQLite ---
+# Membuka koneksi SQLite (plus PRAGMA) di setiap panggilan cukup mahal untuk request web
+# dan handler bot yang sering. get_db_connection() meminjam koneksi dari pool per proses;
+# conn.close() mengembalikannya ke pool, jadi kode pemanggil tidak perlu berubah.
+
+class _PooledConnection(sqlite3.Connection):
+    _released = False # True selama koneksi menganggur di pool (diset ulang saat dipinjam)
+
+    def close(self):
+        if self._released: # close() ganda: koneksi mungkin sudah dipinjam pemanggil lain
+            return
+        self._released = True
+        _release_connection(self)
+
+    def really_close(self):
+        super().close()
+
+_pool = []
+_pool_lock = threading.Lock()
+_pool_pid = os.getpid()
+
+def _new_connection():
+    conn = sqlite3.connect(DB_FILE_PATH, factory=_PooledConnection, check_same_thread=False)
+    conn.row_factory = sqlite3.Row # Mengembalikan baris sebagai objek mirip dict
+    conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}") # Tunggu lock dari proses/thread lain
+    conn.execute("PRAGMA journal_mode = WAL") # Pembaca tidak memblok penulis (bot + dashboard + SSE)
+    conn.execute("PRAGMA synchronous = NORMAL") # Aman dengan WAL, fsync jauh lebih jarang
+    return conn
+
+def _release_connection(conn):
+    if conn.in_transaction:
+        conn.rollback() # Jangan wariskan transaksi yang lupa di-commit ke peminjam berikutnya
+    conn.row_factory = sqlite3.Row
+    with _pool_lock:
+        if _pool_pid == os.getpid() and len(_pool) < DB_POOL_SIZE:
+            _pool.append(conn)
+            return
+    conn.really_close()
+
 def get_db_connection():
-    """Membuka koneksi ke database SQLite."""
+    """Meminjam koneksi ke database SQLite dari pool (dikembalikan dengan conn.close())."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool_pid != os.getpid(): # Setelah fork (misal worker gunicorn), jangan pakai koneksi milik parent
+            _pool, _pool_pid = [], os.getpid()
+        if _pool:
+            conn = _pool.pop()
+            conn._released = False
+            return conn
     # Pastikan folder 'data' ada sebelum mencoba membuat DB
     os.makedirs(os.path.dirname(DB_FILE_PATH), exist_ok=True) 
-    conn = sqlite3.connect(DB_FILE_PATH)
-    conn.row_factory = sqlite3.Row # Mengembalikan baris sebagai objek mirip dict
-    return conn
+    return _new_connection()
+
+def close_db_pool():
+    """Menutup semua koneksi yang menganggur di pool (dipanggil saat proses berhenti)."""
+    with _pool_lock:
+        connections, _pool[:] = list(_pool), []
+    for conn in connections:
+        conn.really_close()
 
 def initialize_agenda_data(context: ContextTypes.DEFAULT_TYPE):
     """
@@ -64,6 +113,48 @@ def initialize_agenda_data(context: ContextTypes.DEFAULT_TYPE):
             GoogleEventID TEXT -- Untuk menyimpan ID event di Google Calendar
         )
     """)
+    # Index untuk filter & pengurutan dashboard serta lookup dari push Google
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_agenda_tanggal ON agenda (Tanggal)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_agenda_status_tanggal ON agenda (Status, Tanggal)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_agenda_kategori_tanggal ON agenda (Kategori, Tanggal)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_agenda_prioritas ON agenda (Prioritas)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_agenda_google_event_id ON agenda (GoogleEventID)")
+
+    # Versi perubahan tabel agenda, dinaikkan trigger pada setiap INSERT/UPDATE/DELETE
+    # (termasuk dari proses lain), dipakai sebagai kunci cache respons dashboard & API
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS agenda_meta (
+            ID INTEGER PRIMARY KEY CHECK (ID = 1),
+            Version INTEGER NOT NULL,
+            UpdatedAt INTEGER NOT NULL -- Unix timestamp perubahan terakhir
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO agenda_meta (ID, Version, UpdatedAt) VALUES (1, 0, CAST(strftime('%s', 'now') AS INTEGER))")
+    for operation in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_agenda_version_{operation.lower()} AFTER {operation} ON agenda
+            BEGIN
+                UPDATE agenda_meta SET Version = Version + 1, UpdatedAt = CAST(strftime('%s', 'now') AS INTEGER) WHERE ID = 1;
+            END
+        """)
+
+    # Log perubahan agenda (diisi trigger), dibaca stream SSE dashboard berdasarkan Seq
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS agenda_changes (
+            Seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            EventID TEXT NOT NULL,
+            Operation TEXT NOT NULL, -- 'upsert' atau 'delete'
+            ChangedAt INTEGER NOT NULL
+        )
+    """)
+    for operation, row_ref, change in (("INSERT", "NEW", "upsert"), ("UPDATE", "NEW", "upsert"), ("DELETE", "OLD", "delete")):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_agenda_changes_{operation.lower()} AFTER {operation} ON agenda
+            BEGIN
+                INSERT INTO agenda_changes (EventID, Operation, ChangedAt)
+                VALUES ({row_ref}.EventID, '{change}', CAST(strftime('%s', 'now') AS INTEGER));
+            END
+        """)
     conn.commit()
 
     # --- Logika Migrasi Satu Kali dari CSV ke SQLite ---
@@ -74,7 +165,8 @@ def initialize_agenda_data(context: ContextTypes.DEFAULT_TYPE):
             # Periksa apakah tabel 'agenda' sudah terisi (untuk menghindari migrasi berulang)
             cursor.execute("SELECT COUNT(*) FROM agenda")
             if cursor.fetchone()[0] == 0: # Jika tabel kosong, lakukan migrasi
-                print("⏳ Melakukan migrasi data dari agenda.csv ke SQLite...")
+                logger.info("⏳ Melakukan migrasi data dari agenda.csv ke SQLite...")
+                import pandas as pd
                 df_csv = pd.read_csv(csv_file_path)
 
                 # Pastikan kolom Tanggal, Tag, EventID, Status ada di CSV dan diformat dengan benar
@@ -103,64 +195,145 @@ def initialize_agenda_data(context: ContextTypes.DEFAULT_TYPE):
                 # Masukkan data dari DataFrame ke tabel SQLite
                 df_csv.to_sql('agenda', conn, if_exists='append', index=False)
                 conn.commit()
-                print("✅ Migrasi data dari agenda.csv selesai. Mengganti nama file CSV lama sebagai backup...")
+                logger.info("✅ Migrasi data dari agenda.csv selesai. Mengganti nama file CSV lama sebagai backup...")
                 os.rename(csv_file_path, csv_file_path + ".bak") # Rename CSV file as backup
             else:
-                print("Database sudah berisi data, migrasi dari agenda.csv dilewati.")
+                logger.info("Database sudah berisi data, migrasi dari agenda.csv dilewati.")
             
         except Exception as e:
-            print(f"⚠️ Error saat migrasi data dari agenda.csv: {e}")
-            print("Pastikan format agenda.csv benar atau hapus/pindahkan file tersebut jika ingin memulai dari database kosong.")
+            logger.error(f"⚠️ Error saat migrasi data dari agenda.csv: {e}")
+            logger.error("Pastikan format agenda.csv benar atau hapus/pindahkan file tersebut jika ingin memulai dari database kosong.")
     # --- End Migration Logic ---
     
     conn.close()
-    print("Database SQLite siap.")
+    logger.info("Database SQLite siap.")
 
-def save_agenda_item(item_data: dict):
-    """
-    Menyimpan atau memperbarui item agenda di database SQLite.
-    Item_data harus berisi setidaknya 'EventID'.
-    """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+AGENDA_COLUMNS = (
+    "Timestamp", "Tanggal", "Kategori", "Prioritas", "Deskripsi",
+    "Tag", "EventID", "Status", "Keterangan", "GoogleEventID"
+)
 
-    # Kolom yang akan diupdate/insert. Pastikan sesuai dengan nama kolom di DB.
+# Cache baris agenda & rentang tanggal di memori proses ini (lihat app/utils/agenda_cache.py)
+agenda_cache = AgendaReadCache(lambda: get_agenda_version()[0])
+metrics_registry.register_collector("agenda_read_cache", agenda_cache.get_metrics)
+
+def _agenda_row(item_data: dict):
+    """Mengisi nilai default item agenda dan mengembalikan tuple sesuai urutan AGENDA_COLUMNS."""
     # Default value for columns that might not always be present
     item_data.setdefault('Timestamp', datetime.now(TZ).strftime("%Y-%m-%d %H:%M:%S"))
     item_data.setdefault('Tag', 'Tidak ada')
     item_data.setdefault('Status', 'Belum')
     item_data.setdefault('Keterangan', None)
     item_data.setdefault('GoogleEventID', None) # Default None for GoogleEventID
+    # Tanggal must be in ISO format (string)
+    return tuple(item_data[column] for column in AGENDA_COLUMNS)
 
-    # Use INSERT OR REPLACE INTO to update if EventID already exists, or insert new
-    # This requires all columns to be mentioned
-    cursor.execute("""
-        INSERT OR REPLACE INTO agenda (
-            Timestamp, Tanggal, Kategori, Prioritas, Deskripsi,
-            Tag, EventID, Status, Keterangan, GoogleEventID
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        item_data['Timestamp'],
-        item_data['Tanggal'], # Must be in ISO format (string)
-        item_data['Kategori'],
-        item_data['Prioritas'],
-        item_data['Deskripsi'],
-        item_data['Tag'],
-        item_data['EventID'],
-        item_data['Status'],
-        item_data['Keterangan'],
-        item_data['GoogleEventID']
-    ))
-    conn.commit()
-    conn.close()
+# Use INSERT OR REPLACE INTO to update if EventID already exists, or insert new
+# This requires all columns to be mentioned
+_UPSERT_AGENDA_SQL = f"""
+    INSERT OR REPLACE INTO agenda ({", ".join(AGENDA_COLUMNS)})
+    VALUES ({", ".join("?" for _ in AGENDA_COLUMNS)})
+"""
+
+@contextmanager
+def _agenda_write_transaction():
+    """
+    Transaksi tulis tabel agenda (BEGIN IMMEDIATE). Versi agenda_meta dibaca sebelum dan sesudah
+    tulis di transaksi yang sama, lalu dilaporkan ke agenda_cache agar kenaikan versi oleh tulis
+    proses ini sendiri tidak mengosongkan cache.
+    """
+    conn = get_db_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        version_before = conn.execute("SELECT Version FROM agenda_meta WHERE ID = 1").fetchone()["Version"]
+        yield conn
+        version_after = conn.execute("SELECT Version FROM agenda_meta WHERE ID = 1").fetchone()["Version"]
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    agenda_cache.local_write(version_before, version_after)
+
+@timed_db
+def save_agenda_item(item_data: dict):
+    """
+    Menyimpan atau memperbarui item agenda di database SQLite.
+    Item_data harus berisi setidaknya 'EventID'.
+    """
+    row = _agenda_row(item_data)
+    with _agenda_write_transaction() as conn:
+        conn.execute(_UPSERT_AGENDA_SQL, row)
+    agenda_cache.item_written(item_data['EventID'], dict(zip(AGENDA_COLUMNS, row)))
     return item_data['EventID']
 
-def get_agenda_items(event_id: str = None, start_date: date = None, end_date: date = None, search_query: str = None):
+@timed_db
+def bulk_write_agenda(upserts: list[dict] = (), deletes: list[str] = (), updates: list[tuple] = ()):
     """
-    Mengambil item agenda dari database.
-    Dapat difilter berdasarkan EventID, rentang tanggal, atau kueri pencarian.
-    Mengembalikan DataFrame Pandas.
+    Menyimpan item agenda baru/lengkap (upserts), memperbarui kolom tertentu agenda yang sudah ada
+    (updates: list (EventID, dict kolom -> nilai)) dan menghapus beberapa EventID dalam satu transaksi.
+    Updates ditulis per kolom (UPDATE, bukan INSERT OR REPLACE baris lama), jadi kolom lain yang diubah
+    bot/dashboard di antara baca dan tulis tidak tertimpa. LookupError (seluruh transaksi dibatalkan)
+    jika EventID update tidak ada; ValueError jika nama kolom tidak dikenal.
+    Mengembalikan (list EventID yang disimpan: upserts lalu updates, jumlah baris yang dihapus).
     """
+    rows = [_agenda_row(item) for item in upserts]
+    updates = [(event_id, changes, _update_columns(changes)) for event_id, changes in updates]
+    updated = {}
+    with _agenda_write_transaction() as conn:
+        conn.executemany(_UPSERT_AGENDA_SQL, rows)
+        for event_id, changes, columns in updates:
+            if columns:
+                row = conn.execute(
+                    _update_agenda_sql(columns, False), [changes[column] for column in columns] + [event_id]
+                ).fetchone()
+            else:
+                row = conn.execute("SELECT * FROM agenda WHERE EventID = ?", (event_id,)).fetchone()
+            if not row:
+                raise LookupError(event_id)
+            updated[event_id] = dict(row)
+        deleted = conn.executemany("DELETE FROM agenda WHERE EventID = ?", [(event_id,) for event_id in deletes]).rowcount
+    for item, row in zip(upserts, rows):
+        agenda_cache.item_written(item['EventID'], dict(zip(AGENDA_COLUMNS, row)))
+    for event_id, item in updated.items():
+        agenda_cache.item_written(event_id, item)
+    for event_id in deletes:
+        agenda_cache.item_written(event_id)
+    return [item['EventID'] for item in upserts] + [event_id for event_id, _, _ in updates], max(deleted, 0)
+
+@timed_db
+def get_agenda_item(event_id: str):
+    """Mengambil satu item agenda sebagai dict (Tanggal tetap string ISO), atau None jika tidak ada."""
+    item, generation = agenda_cache.get_item(event_id)
+    if item is not None:
+        return item
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM agenda WHERE EventID = ?", (event_id,))
+    row = cursor.fetchone()
+    conn.close()
+    if not row:
+        return None
+    item = dict(row)
+    agenda_cache.put_item(event_id, item, generation)
+    return item
+
+@timed_db
+def get_agenda_items_many(event_ids: list[str]):
+    """Mengambil beberapa item agenda sekaligus; mengembalikan dict EventID -> item."""
+    if not event_ids:
+        return {}
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    placeholders = ", ".join("?" for _ in event_ids)
+    cursor.execute(f"SELECT * FROM agenda WHERE EventID IN ({placeholders})", list(event_ids))
+    items = {row["EventID"]: dict(row) for row in cursor.fetchall()}
+    conn.close()
+    return items
+
+def _query_agenda_rows(event_id: str = None, start_date: date = None, end_date: date = None, search_query: str = None):
+    """Query agenda dengan filter opsional; mengembalikan list dict (Tanggal tetap string ISO), urut Tanggal."""
     conn = get_db_connection()
     query = "SELECT * FROM agenda WHERE 1=1"
     params = []
@@ -189,32 +362,268 @@ def get_agenda_items(event_id: str = None, start_date: date = None, end_date: da
     
     query += " ORDER BY Tanggal" # Order by Tanggal
 
-    df = pd.read_sql_query(query, conn, params=params)
+    rows = [dict(row) for row in conn.execute(query, params).fetchall()]
     conn.close()
+    return rows
+
+@timed_db
+def get_agenda_range(start_date: date = None, end_date: date = None):
+    """Agenda dalam rentang tanggal (inklusif) sebagai list dict, urut Tanggal; hasilnya di-cache per rentang."""
+    key = (start_date, end_date)
+    rows, generation = agenda_cache.get_range(key)
+    if rows is not None:
+        return rows
+    rows = _query_agenda_rows(start_date=start_date, end_date=end_date)
+    agenda_cache.put_range(key, rows, generation)
+    return rows
+
+@timed_db
+def get_agenda_items(event_id: str = None, start_date: date = None, end_date: date = None, search_query: str = None):
+    """
+    Mengambil item agenda dari database.
+    Dapat difilter berdasarkan EventID, rentang tanggal, atau kueri pencarian.
+    Mengembalikan DataFrame Pandas.
+    """
+    import pandas as pd # Diimpor saat dipakai; modulnya dimuat di background setelah startup
+
+    # Lookup satu EventID dan rentang tanggal (/lihat) dilayani dari cache jika ada
+    if event_id and not (start_date or end_date or search_query):
+        item = get_agenda_item(event_id)
+        rows = [item] if item else []
+    elif (start_date or end_date) and not (event_id or search_query):
+        rows = get_agenda_range(start_date, end_date)
+    else:
+        rows = _query_agenda_rows(event_id, start_date, end_date, search_query)
+
+    df = pd.DataFrame(rows, columns=list(AGENDA_COLUMNS))
 
     # Convert 'Tanggal' column back to datetime objects for easy use in handlers
     df["Tanggal"] = pd.to_datetime(df["Tanggal"], errors='coerce')
     
     return df
 
+# Kolom yang boleh dipakai untuk pengurutan dashboard (nama kolom tidak bisa memakai placeholder)
+AGENDA_SORT_COLUMNS = ("Tanggal", "Kategori", "Prioritas", "Status", "Timestamp")
+
+def _agenda_filter_clause(start_date: date = None, end_date: date = None, status: str = None, kategori: str = None):
+    """Membangun klausa WHERE (dan parameternya) untuk filter tanggal/status/kategori."""
+    clause = " WHERE 1=1"
+    params = []
+    if start_date:
+        clause += " AND Tanggal >= ?"
+        params.append(datetime.combine(start_date, datetime.min.time(), tzinfo=TZ).isoformat(timespec='minutes'))
+    if end_date:
+        clause += " AND Tanggal < ?"
+        params.append(datetime.combine(end_date + timedelta(days=1), datetime.min.time(), tzinfo=TZ).isoformat(timespec='minutes'))
+    if status:
+        clause += " AND Status = ?"
+        params.append(status)
+    if kategori:
+        clause += " AND Kategori = ?"
+        params.append(kategori)
+    return clause, params
+
+@timed_db
+def get_agenda_page(page: int = 1, per_page: int = 25, start_date: date = None, end_date: date = None,
+                    status: str = None, kategori: str = None, sort_by: str = "Tanggal", descending: bool = False):
+    """
+    Mengambil satu halaman agenda dengan filter dan pengurutan dilakukan di SQLite.
+    Mengembalikan (list of dict, total baris yang cocok dengan filter).
+    """
+    if sort_by not in AGENDA_SORT_COLUMNS:
+        sort_by = "Tanggal"
+    direction = "DESC" if descending else "ASC"
+    where, params = _agenda_filter_clause(start_date, end_date, status, kategori)
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM agenda" + where, params)
+    total = cursor.fetchone()[0]
+    # EventID sebagai pengurut kedua agar urutan halaman stabil
+    cursor.execute(
+        f"SELECT * FROM agenda{where} ORDER BY {sort_by} {direction}, EventID {direction} LIMIT ? OFFSET ?",
+        params + [per_page, (max(page, 1) - 1) * per_page]
+    )
+    rows = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return rows, total
+
+@timed_db
+def get_agenda_after(after: tuple = None, limit: int = 50, start_date: date = None, end_date: date = None,
+                     status: str = None, kategori: str = None):
+    """
+    Pagination keyset: mengambil maksimal `limit` agenda berurutan (Tanggal, EventID)
+    setelah posisi `after` = (Tanggal, EventID). Memakai index Tanggal, jadi biayanya
+    tidak bertambah untuk halaman yang jauh seperti OFFSET.
+    """
+    where, params = _agenda_filter_clause(start_date, end_date, status, kategori)
+    if after:
+        where += " AND (Tanggal, EventID) > (?, ?)"
+        params.extend(after)
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM agenda{where} ORDER BY Tanggal, EventID LIMIT ?", params + [limit])
+    rows = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return rows
+
+@timed_db
+def get_agenda_version():
+    """Mengembalikan (versi perubahan agenda, waktu perubahan terakhir sebagai datetime UTC)."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT Version, UpdatedAt FROM agenda_meta WHERE ID = 1")
+    row = cursor.fetchone()
+    conn.close()
+    if not row:
+        return 0, None
+    return row["Version"], datetime.fromtimestamp(row["UpdatedAt"], tz=timezone.utc)
+
+@timed_db
+def get_latest_change_seq() -> int:
+    """Seq perubahan agenda terakhir (0 jika belum ada perubahan)."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(MAX(Seq), 0) FROM agenda_changes")
+    seq = cursor.fetchone()[0]
+    conn.close()
+    return seq
+
+@timed_db
+def get_agenda_changes(after_seq: int, limit: int = 500):
+    """
+    Mengambil perubahan agenda setelah after_seq, satu entri per EventID (perubahan terakhirnya).
+    Mengembalikan list dict {'Seq', 'EventID', 'Operation', 'Item'}; Item berisi baris agenda
+    terbaru untuk 'upsert', atau None untuk 'delete' (atau jika agenda sudah terhapus lagi).
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT c.Seq, c.EventID AS ChangedEventID, a.*
+        FROM agenda_changes c
+        JOIN (SELECT EventID, MAX(Seq) AS Seq FROM agenda_changes WHERE Seq > ? GROUP BY EventID) latest
+            ON latest.Seq = c.Seq
+        LEFT JOIN agenda a ON a.EventID = c.EventID
+        ORDER BY c.Seq
+        LIMIT ?
+    """, (after_seq, limit))
+    changes = []
+    for row in cursor.fetchall():
+        row = dict(row)
+        seq, event_id = row.pop("Seq"), row.pop("ChangedEventID")
+        item = row if row.get("EventID") is not None else None
+        changes.append({"Seq": seq, "EventID": event_id, "Operation": "upsert" if item else "delete", "Item": item})
+    conn.close()
+    return changes
+
+@timed_db
+def prune_agenda_changes(keep_seconds: int):
+    """Menghapus log perubahan yang lebih tua dari keep_seconds (klien selambat itu cukup memuat ulang halaman)."""
+    conn = get_db_connection()
+    conn.execute("DELETE FROM agenda_changes WHERE ChangedAt < CAST(strftime('%s', 'now') AS INTEGER) - ?", (keep_seconds,))
+    conn.commit()
+    conn.close()
+
+@timed_db
+def get_agenda_categories():
+    """Mengembalikan daftar kategori unik (untuk pilihan filter dashboard)."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT DISTINCT Kategori FROM agenda ORDER BY Kategori")
+    categories = [row["Kategori"] for row in cursor.fetchall()]
+    conn.close()
+    return categories
+
+@timed_db
 def delete_agenda_item(event_id: str):
     """Menghapus item agenda dari database berdasarkan EventID."""
+    with _agenda_write_transaction() as conn:
+        deleted = conn.execute("DELETE FROM agenda WHERE EventID = ?", (event_id,)).rowcount
+    agenda_cache.item_written(event_id)
+    return deleted > 0 # Returns True if any rows were deleted
+
+@timed_db
+def get_event_id_by_google_event_id(google_event_id: str):
+    """Mengembalikan EventID lokal yang terhubung dengan event Google tertentu, atau None."""
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("DELETE FROM agenda WHERE EventID = ?", (event_id,))
-    conn.commit()
+    cursor.execute("SELECT EventID FROM agenda WHERE GoogleEventID = ?", (google_event_id,))
+    row = cursor.fetchone()
     conn.close()
-    return cursor.rowcount > 0 # Returns True if any rows were deleted
+    return row["EventID"] if row else None
 
+# Kolom yang boleh diubah lewat update_agenda_fields (EventID adalah kunci, tidak boleh diubah)
+UPDATABLE_AGENDA_COLUMNS = frozenset(AGENDA_COLUMNS) - {"EventID"}
+
+def _update_columns(changes: dict) -> tuple:
+    """Memvalidasi nama kolom terhadap whitelist; urutan dibakukan agar SQL yang sama dipakai ulang."""
+    invalid = set(changes) - UPDATABLE_AGENDA_COLUMNS
+    if invalid:
+        raise ValueError(f"Kolom agenda tidak dikenal atau tidak boleh diubah: {', '.join(sorted(invalid))}")
+    return tuple(sorted(changes))
+
+@lru_cache(maxsize=128)
+def _update_agenda_sql(columns: tuple, checked: bool) -> str:
+    # Satu string SQL per kombinasi kolom, sehingga statement cache sqlite3 (per koneksi pool)
+    # bisa memakai ulang statement yang sudah di-prepare
+    set_clause = ", ".join(f"{column} = ?" for column in columns)
+    sql = f"UPDATE agenda SET {set_clause} WHERE EventID = ?"
+    if checked:
+        # 'IS ?' agar nilai NULL (misal Keterangan) ikut terbandingkan dengan benar
+        sql += "".join(f" AND {column} IS ?" for column in columns)
+    return sql + " RETURNING *"
+
+@timed_db
+def update_agenda_fields(event_id: str, **changes):
+    """
+    Memperbarui beberapa kolom agenda sekaligus dalam satu transaksi.
+    Nama kolom divalidasi terhadap UPDATABLE_AGENDA_COLUMNS (ValueError jika tidak dikenal).
+    Mengembalikan baris setelah diperbarui sebagai dict, atau None jika EventID tidak ada.
+    """
+    columns = _update_columns(changes)
+    if not columns:
+        return get_agenda_item(event_id)
+
+    with _agenda_write_transaction() as conn:
+        row = conn.execute(
+            _update_agenda_sql(columns, False), [changes[column] for column in columns] + [event_id]
+        ).fetchone()
+    if not row:
+        return None
+    item = dict(row)
+    agenda_cache.item_written(event_id, item)
+    return item
+
+@timed_db
 def update_agenda_field(event_id: str, field_name: str, new_value):
     """
     Memperbarui satu bidang agenda di database.
     field_name harus sesuai dengan nama kolom di database.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    # Avoid SQL Injection with placeholders
-    cursor.execute(f"UPDATE agenda SET {field_name} = ? WHERE EventID = ?", (new_value, event_id))
-    conn.commit()
-    conn.close()
-    return cursor.rowcount > 0
+    return update_agenda_fields(event_id, **{field_name: new_value}) is not None
+
+@timed_db
+def apply_agenda_changes(event_id: str, changes: dict, expected: dict):
+    """
+    Menerapkan beberapa perubahan kolom sekaligus dalam satu UPDATE (optimistic concurrency).
+    Baris hanya diubah jika kolom yang diedit masih bernilai sama dengan `expected`
+    (nilai saat user mulai mengedit), jadi perubahan dari dashboard/bot lain tidak tertimpa.
+    Mengembalikan "ok", "conflict" (sudah diubah pihak lain), atau "missing" (agenda terhapus).
+    """
+    columns = _update_columns(changes)
+    if not columns:
+        return "ok"
+
+    params = [changes[column] for column in columns] + [event_id] + [expected.get(column) for column in columns]
+    with _agenda_write_transaction() as conn:
+        row = conn.execute(_update_agenda_sql(columns, True), params).fetchone()
+        if row:
+            row = dict(row)
+            result = "ok"
+        else:
+            exists = conn.execute("SELECT 1 FROM agenda WHERE EventID = ?", (event_id,)).fetchone()
+            result = "conflict" if exists else "missing"
+    if row:
+        agenda_cache.item_written(event_id, row)
+    return result
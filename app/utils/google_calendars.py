@@ -0,0 +1,160 @@
+# app/utils/google_calendars.py
+
+import time
+import logging
+import threading
+from datetime import datetime
+
+from googleapiclient.errors import HttpError
+
+from app.utils.config import TZ, GOOGLE_CALENDAR_LIST_CACHE_TTL
+from app.utils.data_manager import get_db_connection
+from app.utils.google_calendar_api import get_google_service
+from app.utils.google_rate_limiter import google_scheduler
+
+logger = logging.getLogger(__name__)
+
+# ===============================
+# 📚 Multi-Calendar: pilihan kalender per user
+# ===============================
+# Pilihan kalender disimpan di tabel google_calendar_selection; user tanpa pilihan
+# memakai 'primary'. Sync state (syncToken, LastSync) disimpan per kalender di tabel
+# google_sync_state, jadi hanya kalender terpilih yang disinkronkan, masing-masing inkremental.
+
+_calendar_list_cache = {} # user_id -> (daftar kalender, waktu diambil)
+_cache_lock = threading.Lock()
+_initialized = False
+
+def initialize_calendar_tables():
+    """Membuat tabel pilihan kalender dan sync state per kalender jika belum ada."""
+    global _initialized
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS google_calendar_selection (
+            UserID TEXT NOT NULL,
+            CalendarID TEXT NOT NULL,
+            Summary TEXT,
+            PRIMARY KEY (UserID, CalendarID)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS google_sync_state (
+            UserID TEXT NOT NULL,
+            CalendarID TEXT NOT NULL,
+            SyncToken TEXT,
+            LastSync TEXT,
+            PRIMARY KEY (UserID, CalendarID)
+        )
+    """)
+    conn.commit()
+    conn.close()
+    _initialized = True
+
+def _ensure_initialized():
+    if not _initialized:
+        initialize_calendar_tables()
+
+def list_google_calendars(user_id, force_refresh: bool = False) -> list[dict]:
+    """
+    Mengembalikan daftar kalender user (id, summary, primary, accessRole) dari calendarList,
+    di-cache selama GOOGLE_CALENDAR_LIST_CACHE_TTL detik. List kosong jika user belum terhubung.
+    """
+    user_id = str(user_id)
+    with _cache_lock:
+        cached = _calendar_list_cache.get(user_id)
+        if cached and not force_refresh and time.monotonic() - cached[1] < GOOGLE_CALENDAR_LIST_CACHE_TTL:
+            return cached[0]
+
+    service = get_google_service(user_id)
+    if not service:
+        return []
+
+    calendars = []
+    page_token = None
+    try:
+        while True:
+            result = google_scheduler.execute(service.calendarList().list(
+                pageToken=page_token,
+                fields="items(id,summary,primary,accessRole),nextPageToken",
+            ), user_id)
+            calendars.extend(result.get("items", []))
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                break
+    except HttpError as e: # Misal token dicabut atau scope kurang: perlakukan seperti belum terhubung
+        logger.warning(f"Gagal mengambil daftar kalender Google user {user_id}: {e}")
+        return []
+
+    with _cache_lock:
+        _calendar_list_cache[user_id] = (calendars, time.monotonic())
+    return calendars
+
+def get_selected_calendars(user_id) -> list[str]:
+    """Mengembalikan CalendarID yang dipilih user, atau ['primary'] jika belum memilih."""
+    _ensure_initialized()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT CalendarID FROM google_calendar_selection WHERE UserID = ? ORDER BY CalendarID",
+                   (str(user_id),))
+    calendar_ids = [row["CalendarID"] for row in cursor.fetchall()]
+    conn.close()
+    return calendar_ids or ['primary']
+
+def set_selected_calendars(user_id, calendars: list[dict]):
+    """
+    Menyimpan pilihan kalender user (list dict dengan 'id' dan 'summary') dalam satu transaksi.
+    Mengembalikan (CalendarID yang ditambahkan, CalendarID yang dilepas).
+    """
+    _ensure_initialized()
+    user_id = str(user_id)
+    previous = set(get_selected_calendars(user_id))
+    selected = {calendar["id"] for calendar in calendars}
+
+    conn = get_db_connection()
+    with conn:
+        conn.execute("DELETE FROM google_calendar_selection WHERE UserID = ?", (user_id,))
+        conn.executemany(
+            "INSERT INTO google_calendar_selection (UserID, CalendarID, Summary) VALUES (?, ?, ?)",
+            [(user_id, calendar["id"], calendar.get("summary")) for calendar in calendars]
+        )
+    conn.close()
+
+    selected = selected or {'primary'}
+    return selected - previous, previous - selected
+
+# --- Sync state (syncToken per user & kalender) ---
+
+def get_sync_state(user_id, calendar_id: str = 'primary'):
+    """Mengembalikan dict {'SyncToken', 'LastSync'} untuk kalender user, atau None jika belum pernah sinkron."""
+    _ensure_initialized()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT SyncToken, LastSync FROM google_sync_state WHERE UserID = ? AND CalendarID = ?",
+                   (str(user_id), calendar_id))
+    row = cursor.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+def get_sync_token(user_id, calendar_id: str = 'primary'):
+    state = get_sync_state(user_id, calendar_id)
+    return state["SyncToken"] if state else None
+
+def save_sync_token(user_id, calendar_id: str, sync_token):
+    """Menyimpan syncToken terbaru kalender user beserta waktu sinkron terakhir."""
+    _ensure_initialized()
+    conn = get_db_connection()
+    conn.execute("""
+        INSERT OR REPLACE INTO google_sync_state (UserID, CalendarID, SyncToken, LastSync)
+        VALUES (?, ?, ?, ?)
+    """, (str(user_id), calendar_id, sync_token, datetime.now(TZ).isoformat(timespec='seconds')))
+    conn.commit()
+    conn.close()
+
+def clear_sync_state(user_id, calendar_id: str):
+    """Menghapus sync state kalender yang tidak lagi dipilih user."""
+    _ensure_initialized()
+    conn = get_db_connection()
+    conn.execute("DELETE FROM google_sync_state WHERE UserID = ? AND CalendarID = ?", (str(user_id), calendar_id))
+    conn.commit()
+    conn.close()
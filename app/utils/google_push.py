@@ -0,0 +1,301 @@
+# app/utils/google_push.py
+
+import logging
+import secrets
+import contextvars
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from googleapiclient.errors import HttpError
+
+from app.utils.config import (
+    TZ, GOOGLE_PUSH_ADDRESS, GOOGLE_WATCH_TTL, GOOGLE_WATCH_RENEW_MARGIN
+)
+from app.utils.data_manager import (
+    get_db_connection, get_event_id_by_google_event_id,
+    update_agenda_fields, delete_agenda_item
+)
+from app.utils.google_calendar_api import get_google_service, list_connected_user_ids
+from app.utils.google_rate_limiter import google_scheduler
+from app.utils.google_calendars import (
+    initialize_calendar_tables, get_selected_calendars, set_selected_calendars,
+    get_sync_token, save_sync_token, clear_sync_state
+)
+
+logger = logging.getLogger(__name__)
+
+# ===============================
+# 🔔 Google Calendar Push Notifications (watch channels)
+# ===============================
+# Alur:
+# 1. Bot mendaftarkan watch channel per user terhubung (register_watch_channel)
+#    dan memperbaruinya sebelum kedaluwarsa (renew_expiring_channels, dipanggil scheduler).
+# 2. Google mengirim POST ke /google_push di app_server.py setiap kali kalender berubah.
+# 3. handle_push_notification memvalidasi header lalu menjadwalkan fetch inkremental
+#    (pakai syncToken) hanya untuk user/kalender yang berubah.
+
+# Fetch inkremental dijalankan di background agar endpoint push bisa langsung membalas 200.
+_fetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="google_push")
+_pending_fetches = set() # (user_id, calendar_id) yang sudah antre, untuk menggabungkan notifikasi beruntun
+_pending_lock = threading.Lock()
+
+def initialize_push_tables():
+    """Membuat tabel watch channel (dan tabel kalender/sync state) jika belum ada."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS google_watch_channels (
+            ChannelID TEXT PRIMARY KEY,
+            UserID TEXT NOT NULL,
+            CalendarID TEXT NOT NULL DEFAULT 'primary',
+            ResourceID TEXT,
+            Token TEXT NOT NULL,
+            Expiration TEXT NOT NULL -- ISO datetime
+        )
+    """)
+    conn.commit()
+    conn.close()
+    initialize_calendar_tables()
+
+# --- Watch channels ---
+
+def get_watch_channel(channel_id: str):
+    """Mengembalikan data channel (dict) berdasarkan ChannelID, atau None."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM google_watch_channels WHERE ChannelID = ?", (channel_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+def _get_user_channels(user_id: str, calendar_id: str = None):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    if calendar_id:
+        cursor.execute("SELECT * FROM google_watch_channels WHERE UserID = ? AND CalendarID = ?",
+                       (str(user_id), calendar_id))
+    else:
+        cursor.execute("SELECT * FROM google_watch_channels WHERE UserID = ?", (str(user_id),))
+    rows = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return rows
+
+def _delete_channel_row(channel_id: str):
+    conn = get_db_connection()
+    conn.execute("DELETE FROM google_watch_channels WHERE ChannelID = ?", (channel_id,))
+    conn.commit()
+    conn.close()
+
+def stop_watch_channel(channel: dict, service=None):
+    """Menghentikan channel di sisi Google (best effort) dan menghapusnya dari database."""
+    service = service or get_google_service(channel["UserID"])
+    if service and channel.get("ResourceID"):
+        try:
+            google_scheduler.execute(
+                service.channels().stop(body={"id": channel["ChannelID"], "resourceId": channel["ResourceID"]}),
+                channel["UserID"])
+        except Exception as e:
+            # Channel yang sudah kedaluwarsa di Google akan mengembalikan 404, aman diabaikan
+            logger.error(f"Error stopping Google watch channel {channel['ChannelID']}: {e}")
+    _delete_channel_row(channel["ChannelID"])
+
+def register_watch_channel(user_id, calendar_id: str = 'primary'):
+    """
+    Mendaftarkan watch channel baru untuk kalender user dan menghentikan channel lama
+    (setelah channel baru aktif, agar tidak ada celah notifikasi).
+    Mengembalikan ChannelID atau None jika gagal / push tidak dikonfigurasi.
+    """
+    if not GOOGLE_PUSH_ADDRESS:
+        return None
+    service = get_google_service(user_id)
+    if not service:
+        return None
+
+    # Pastikan ada syncToken awal supaya notifikasi pertama bisa langsung diproses inkremental
+    if get_sync_token(user_id, calendar_id) is None:
+        fetch_incremental_changes(user_id, calendar_id, service=service)
+
+    channel_id = str(uuid.uuid4())
+    token = secrets.token_urlsafe(24)
+    body = {
+        "id": channel_id,
+        "type": "web_hook",
+        "address": GOOGLE_PUSH_ADDRESS,
+        "token": token,
+        "params": {"ttl": str(int(GOOGLE_WATCH_TTL.total_seconds()))},
+    }
+    try:
+        response = google_scheduler.execute(service.events().watch(calendarId=calendar_id, body=body), user_id)
+    except Exception as e:
+        logger.error(f"Error registering Google watch channel for user {user_id}: {e}")
+        return None
+
+    # 'expiration' dari Google dalam milidetik sejak epoch
+    expiration = datetime.fromtimestamp(int(response["expiration"]) / 1000, tz=TZ)
+    old_channels = _get_user_channels(user_id, calendar_id)
+
+    conn = get_db_connection()
+    conn.execute("""
+        INSERT INTO google_watch_channels (ChannelID, UserID, CalendarID, ResourceID, Token, Expiration)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (channel_id, str(user_id), calendar_id, response.get("resourceId"), token,
+          expiration.isoformat(timespec='seconds')))
+    conn.commit()
+    conn.close()
+
+    for old_channel in old_channels:
+        stop_watch_channel(old_channel, service=service)
+
+    logger.info(f"Google watch channel {channel_id} registered for user {user_id} (until {expiration}).")
+    return channel_id
+
+def schedule_watch_registration(user_id, calendar_id: str = 'primary'):
+    """Mendaftarkan watch channel di background (misal tepat setelah OAuth callback)."""
+    if GOOGLE_PUSH_ADDRESS:
+        # Context disalin agar log di thread background membawa correlation ID request asal
+        _fetch_executor.submit(contextvars.copy_context().run, register_watch_channel, user_id, calendar_id)
+
+def renew_expiring_channels():
+    """
+    Memastikan setiap user terhubung memiliki channel aktif, dan memperbarui channel
+    yang akan kedaluwarsa dalam GOOGLE_WATCH_RENEW_MARGIN. Dipanggil berkala oleh scheduler bot.
+    Mengembalikan jumlah channel yang didaftarkan.
+    """
+    if not GOOGLE_PUSH_ADDRESS:
+        return 0
+    renew_before = datetime.now(TZ) + GOOGLE_WATCH_RENEW_MARGIN
+    registered = 0
+
+    for user_id in list_connected_user_ids():
+        for calendar_id in get_selected_calendars(user_id):
+            channels = _get_user_channels(user_id, calendar_id)
+            needs_renewal = not channels or all(
+                datetime.fromisoformat(c["Expiration"]) <= renew_before for c in channels
+            )
+            if needs_renewal and register_watch_channel(user_id, calendar_id):
+                registered += 1
+    return registered
+
+def apply_calendar_selection(user_id, calendars: list[dict]):
+    """
+    Menyimpan pilihan kalender user, menghentikan channel & sync state kalender yang dilepas,
+    dan mendaftarkan channel untuk kalender yang baru dipilih (di background).
+    """
+    added, removed = set_selected_calendars(user_id, calendars)
+    for calendar_id in removed:
+        for channel in _get_user_channels(user_id, calendar_id):
+            stop_watch_channel(channel)
+        clear_sync_state(user_id, calendar_id)
+    for calendar_id in added:
+        schedule_watch_registration(user_id, calendar_id)
+    return added, removed
+
+def sync_selected_calendars(user_id) -> int:
+    """Menjalankan fetch inkremental untuk semua kalender yang dipilih user. Mengembalikan total perubahan."""
+    return sum(fetch_incremental_changes(user_id, calendar_id) for calendar_id in get_selected_calendars(user_id))
+
+# --- Notifikasi masuk & fetch inkremental ---
+
+def handle_push_notification(headers) -> bool:
+    """
+    Memvalidasi notifikasi push dari Google (header X-Goog-*) dan menjadwalkan fetch
+    inkremental untuk user/kalender pemilik channel.
+    Mengembalikan False jika channel tidak dikenal atau token tidak cocok.
+    """
+    channel_id = headers.get("X-Goog-Channel-ID")
+    channel = get_watch_channel(channel_id) if channel_id else None
+    if not channel:
+        return False
+    if not secrets.compare_digest(headers.get("X-Goog-Channel-Token", ""), channel["Token"]):
+        return False
+    if channel["ResourceID"] and headers.get("X-Goog-Resource-ID") != channel["ResourceID"]:
+        return False
+
+    # State 'sync' hanya handshake saat channel baru dibuat, tidak ada perubahan data
+    if headers.get("X-Goog-Resource-State") == "sync":
+        return True
+
+    schedule_incremental_fetch(channel["UserID"], channel["CalendarID"])
+    return True
+
+def schedule_incremental_fetch(user_id, calendar_id: str = 'primary'):
+    """Menjadwalkan fetch inkremental di background; notifikasi beruntun untuk kalender yang sama digabung."""
+    key = (str(user_id), calendar_id)
+    with _pending_lock:
+        if key in _pending_fetches:
+            return
+        _pending_fetches.add(key)
+
+    def _run():
+        with _pending_lock:
+            _pending_fetches.discard(key)
+        try:
+            fetch_incremental_changes(user_id, calendar_id)
+        except Exception as e:
+            logger.error(f"Error during incremental Google fetch for user {user_id}: {e}")
+
+    _fetch_executor.submit(contextvars.copy_context().run, _run)
+
+def _apply_google_event_change(event: dict) -> bool:
+    """Menerapkan perubahan satu event Google ke agenda lokal yang terhubung. True jika ada yang berubah."""
+    event_id = get_event_id_by_google_event_id(event["id"])
+    if not event_id:
+        return False # Event tidak dibuat oleh bot, abaikan
+
+    if event.get("status") == "cancelled":
+        return delete_agenda_item(event_id)
+
+    changes = {}
+    if event.get("summary"):
+        changes["Deskripsi"] = event["summary"]
+    start = event.get("start", {})
+    if start.get("dateTime"):
+        start_dt = datetime.fromisoformat(start["dateTime"].replace("Z", "+00:00")).astimezone(TZ)
+        changes["Tanggal"] = start_dt.isoformat(timespec='minutes')
+    if not changes:
+        return False
+    return update_agenda_fields(event_id, **changes) is not None
+
+def fetch_incremental_changes(user_id, calendar_id: str = 'primary', service=None) -> int:
+    """
+    Mengambil event yang berubah sejak syncToken terakhir dan menerapkannya ke agenda lokal.
+    Tanpa syncToken (pertama kali atau token kedaluwarsa / 410), hanya membuat baseline baru.
+    Mengembalikan jumlah agenda lokal yang berubah.
+    """
+    service = service or get_google_service(user_id)
+    if not service:
+        return 0
+
+    sync_token = get_sync_token(user_id, calendar_id)
+    is_baseline = sync_token is None
+    page_token = None
+    applied = 0
+
+    while True:
+        params = {"calendarId": calendar_id, "pageToken": page_token, "showDeleted": True}
+        if sync_token:
+            params["syncToken"] = sync_token
+        try:
+            result = google_scheduler.execute(service.events().list(**params), user_id)
+        except HttpError as e:
+            if e.resp.status == 410: # syncToken tidak berlaku lagi, buat baseline ulang
+                logger.info(f"Google sync token for user {user_id} expired, rebuilding baseline.")
+                save_sync_token(user_id, calendar_id, None)
+                return fetch_incremental_changes(user_id, calendar_id, service=service)
+            raise
+
+        if not is_baseline:
+            for event in result.get("items", []):
+                if _apply_google_event_change(event):
+                    applied += 1
+
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            save_sync_token(user_id, calendar_id, result.get("nextSyncToken"))
+            break
+
+    if applied:
+        logger.info(f"Applied {applied} Google Calendar change(s) for user {user_id}.")
+    return applied
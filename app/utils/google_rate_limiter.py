@@ -0,0 +1,199 @@
+# app/utils/google_rate_limiter.py
+
+import json
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+
+from googleapiclient.errors import HttpError
+
+from app.utils.config import (
+    GOOGLE_API_QPS, GOOGLE_API_BURST, GOOGLE_API_USER_QPS, GOOGLE_API_USER_BURST,
+    GOOGLE_API_MAX_RETRIES, GOOGLE_API_BACKOFF_BASE, GOOGLE_API_BACKOFF_MAX
+)
+from app.utils.metrics import track, metrics_registry
+
+# ===============================
+# 🚦 Scheduler Request Google API (rate limit & kuota)
+# ===============================
+# Semua panggilan Google Calendar API lewat google_scheduler.execute(...) / execute_async(...):
+# - token bucket global (kuota per project) + token bucket per user (kuota per user)
+# - antrean round-robin antar user, jadi user yang sedang sinkron banyak tidak menahan user lain
+# - retry dengan backoff eksponensial untuk rateLimitExceeded/429/5xx, menghormati Retry-After
+# - metrik antrean/throttle lewat get_metrics()
+
+_RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded"}
+
+class _TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+def _rate_limit_reason(error: HttpError):
+    """Mengambil 'reason' dari body error Google (misal 'rateLimitExceeded'), atau None."""
+    try:
+        data = json.loads(error.content.decode("utf-8"))
+        errors = data.get("error", {}).get("errors", [])
+        return errors[0].get("reason") if errors else None
+    except (ValueError, AttributeError):
+        return None
+
+def _is_retryable(error: HttpError) -> bool:
+    status = error.resp.status
+    if status == 429 or status >= 500:
+        return True
+    return status == 403 and _rate_limit_reason(error) in _RATE_LIMIT_REASONS
+
+def _retry_after_seconds(error: HttpError):
+    value = error.resp.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None # Format tanggal HTTP jarang dipakai Google; jatuh ke backoff eksponensial
+
+class GoogleRequestScheduler:
+    def __init__(self, qps: float = GOOGLE_API_QPS, burst: float = GOOGLE_API_BURST,
+                 user_qps: float = GOOGLE_API_USER_QPS, user_burst: float = GOOGLE_API_USER_BURST,
+                 max_retries: int = GOOGLE_API_MAX_RETRIES, backoff_base: float = GOOGLE_API_BACKOFF_BASE,
+                 backoff_max: float = GOOGLE_API_BACKOFF_MAX):
+        self.user_qps = user_qps
+        self.user_burst = user_burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._global_bucket = _TokenBucket(qps, burst)
+        self._user_buckets = {} # user_id -> _TokenBucket
+        self._waiting = {} # user_id -> deque tiket yang menunggu
+        self._ring = deque() # Urutan round-robin user yang punya tiket menunggu
+        self._cond = threading.Condition()
+        self._metrics = {
+            "requests": 0, # Request yang dikirim ke Google (termasuk retry)
+            "queued": 0, # Request yang sedang menunggu token saat ini
+            "max_queued": 0,
+            "throttled": 0, # Request yang harus menunggu token bucket
+            "throttled_seconds": 0.0,
+            "rate_limited": 0, # Respons 403 rateLimitExceeded / 429 dari Google
+            "retries": 0,
+            "failures": 0, # Request yang tetap gagal setelah semua retry
+        }
+
+    # --- Token bucket & fairness ---
+
+    def _user_bucket(self, user_id):
+        bucket = self._user_buckets.get(user_id)
+        if bucket is None:
+            bucket = self._user_buckets[user_id] = _TokenBucket(self.user_qps, self.user_burst)
+        return bucket
+
+    def _next_grant(self):
+        """Tiket yang boleh jalan sekarang (user pertama di ring yang bucket-nya punya token), dan waktu tunggu minimum."""
+        min_wait = self._global_bucket.wait_time()
+        if min_wait > 0:
+            return None, min_wait
+        min_wait = None
+        for user_id in self._ring:
+            wait = self._user_bucket(user_id).wait_time()
+            if wait == 0:
+                return user_id, 0.0
+            min_wait = wait if min_wait is None else min(min_wait, wait)
+        return None, min_wait
+
+    def acquire(self, user_id=None):
+        """Memblok sampai request user ini boleh dikirim sesuai kuota global, per user, dan giliran round-robin."""
+        user_id = str(user_id) if user_id is not None else "_system"
+        ticket = object()
+        started = time.monotonic()
+        with self._cond:
+            queue = self._waiting.setdefault(user_id, deque())
+            if not queue:
+                self._ring.append(user_id)
+            queue.append(ticket)
+            self._metrics["queued"] += 1
+            self._metrics["max_queued"] = max(self._metrics["max_queued"], self._metrics["queued"])
+            throttled = False
+
+            while True:
+                now = time.monotonic()
+                self._global_bucket.refill(now)
+                for ring_user in self._ring:
+                    self._user_bucket(ring_user).refill(now)
+
+                granted_user, wait = self._next_grant()
+                if granted_user == user_id and queue[0] is ticket:
+                    self._global_bucket.tokens -= 1
+                    self._user_bucket(user_id).tokens -= 1
+                    queue.popleft()
+                    self._ring.remove(user_id)
+                    if queue:
+                        self._ring.append(user_id) # Pindah ke belakang: giliran user lain dulu
+                    else:
+                        del self._waiting[user_id]
+                    self._metrics["queued"] -= 1
+                    if throttled:
+                        self._metrics["throttled"] += 1
+                        self._metrics["throttled_seconds"] += time.monotonic() - started
+                    self._cond.notify_all()
+                    return
+
+                throttled = True
+                if granted_user is not None:
+                    # Giliran tiket lain (wait == 0): tunggu notify_all() dari pemegang giliran, jangan
+                    # berputar dengan timeout 0; timeout hanya jaring pengaman
+                    self._cond.wait(timeout=1.0)
+                else:
+                    self._cond.wait(timeout=wait)
+
+    def _count(self, name: str, value=1):
+        with self._cond:
+            self._metrics[name] += value
+
+    # --- Eksekusi ---
+
+    def execute(self, request, user_id=None):
+        """
+        Menjalankan HttpRequest googleapiclient (hasil service.events().insert(...) dsb.)
+        dengan rate limit dan retry. Melempar HttpError jika tetap gagal.
+        """
+        attempt = 0
+        while True:
+            self.acquire(user_id)
+            self._count("requests")
+            try:
+                with track("google", getattr(request, "methodId", None) or "request"):
+                    return request.execute()
+            except HttpError as e:
+                if not _is_retryable(e):
+                    raise
+                if e.resp.status in (403, 429):
+                    self._count("rate_limited")
+                if attempt >= self.max_retries:
+                    self._count("failures")
+                    raise
+                delay = _retry_after_seconds(e)
+                if delay is None:
+                    delay = min(self.backoff_base * (2 ** attempt), self.backoff_max) + random.uniform(0, 1)
+                attempt += 1
+                self._count("retries")
+                time.sleep(delay)
+
+    async def execute_async(self, request, user_id=None):
+        """Versi async dari execute(); request blocking dijalankan di thread agar event loop tidak tertahan."""
+        return await asyncio.to_thread(self.execute, request, user_id)
+
+    def get_metrics(self) -> dict:
+        with self._cond:
+            return dict(self._metrics, waiting_users=len(self._ring))
+
+google_scheduler = GoogleRequestScheduler()
+metrics_registry.register_collector("agenda_google_scheduler", google_scheduler.get_metrics)
@@ -64,3 +64,14 @@ def _keyboard_status():
     rows = [[InlineKeyboardButton(s, callback_data=f"status:{s}")] for s in PRESET_STATUS]
     rows.append([InlineKeyboardButton("❌ Batal", callback_data="cancel_edit")])
     return InlineKeyboardMarkup(rows)
+
+def _keyboard_kalender(calendars: list[dict], selected_ids: set):
+    """Membuat keyboard inline untuk memilih kalender Google yang disinkronkan (toggle)."""
+    rows = []
+    for index, calendar in enumerate(calendars):
+        mark = "✅" if calendar["id"] in selected_ids else "⬜"
+        # Pakai indeks, bukan CalendarID, karena callback_data dibatasi 64 byte
+        rows.append([InlineKeyboardButton(f"{mark} {calendar.get('summary', calendar['id'])}", callback_data=f"cal:{index}")])
+    rows.append([InlineKeyboardButton("💾 Simpan", callback_data="cal:done")])
+    rows.append([InlineKeyboardButton("❌ Batal", callback_data="cancel")])
+    return InlineKeyboardMarkup(rows)
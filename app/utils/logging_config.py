@@ -0,0 +1,148 @@
+# app/utils/logging_config.py
+
+import copy
+import json
+import uuid
+import zlib
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from app.utils.config import LOG_LEVEL, LOG_FORMAT, LOG_DEBUG_SAMPLE_RATE
+
+# ===============================
+# 📝 Logging Terstruktur & Correlation ID
+# ===============================
+# - setup_logging() memasang satu QueueHandler di root logger; penulisan ke stderr dilakukan
+#   thread QueueListener, jadi logger.info(...) di event loop hanya memasukkan record ke antrean.
+# - Output default berupa JSON per baris (LOG_FORMAT=text untuk format lama yang mudah dibaca).
+# - correlation_id (ContextVar) diisi per update Telegram (lihat metrics._instrument_callback)
+#   dan per request web; asyncio.to_thread menyalin context, sehingga log dari data_manager
+#   dan panggilan Google di thread ikut membawa ID yang sama.
+# - Log DEBUG disampling per correlation ID (LOG_DEBUG_SAMPLE_RATE): jika sebuah update
+#   terpilih, semua log DEBUG-nya ditulis utuh.
+
+correlation_id = ContextVar("correlation_id", default=None)
+
+# Atribut bawaan LogRecord; atribut lain (dari extra=...) ikut ditulis sebagai field JSON
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "correlation_id"}
+
+_listener = None
+
+def new_correlation_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+def update_correlation_id(update) -> str:
+    """Correlation ID untuk sebuah update Telegram: berbasis update_id agar bisa dicocokkan dengan log webhook."""
+    update_id = getattr(update, "update_id", None)
+    return f"u{update_id}" if update_id is not None else new_correlation_id()
+
+@contextmanager
+def correlation_scope(value: str = None):
+    """Menjalankan blok dengan correlation ID tertentu (atau ID baru), lalu mengembalikan ID sebelumnya."""
+    token = correlation_id.set(value or new_correlation_id())
+    try:
+        yield correlation_id.get()
+    finally:
+        correlation_id.reset(token)
+
+class ContextFilter(logging.Filter):
+    """Menempelkan correlation ID dan menyaring sampel DEBUG; berjalan di thread pemanggil sebelum masuk antrean."""
+
+    def __init__(self, debug_sample_rate: float = LOG_DEBUG_SAMPLE_RATE):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def _sampled(self, current_id) -> bool:
+        if self.debug_sample_rate >= 1.0:
+            return True
+        if current_id is None:
+            return random.random() < self.debug_sample_rate
+        # Keputusan deterministik per ID: satu update tercatat lengkap atau tidak sama sekali
+        return zlib.crc32(current_id.encode()) % 10000 < self.debug_sample_rate * 10000
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        current_id = correlation_id.get()
+        if record.levelno <= logging.DEBUG and not self._sampled(current_id):
+            return False
+        record.correlation_id = current_id or "-"
+        return True
+
+class JsonFormatter(logging.Formatter):
+    def __init__(self, process_name: str = None):
+        super().__init__()
+        self.process_name = process_name
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if self.process_name:
+            entry["process"] = self.process_name
+        if getattr(record, "correlation_id", "-") != "-":
+            entry["correlation_id"] = record.correlation_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Pesan dan traceback dibentuk di thread pemanggil (argumen bisa berubah setelahnya),
+        # tapi traceback disimpan terpisah agar JsonFormatter bisa menaruhnya di field sendiri
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop() # Menulis sisa record di antrean sebelum proses selesai
+        _listener = None
+
+def setup_logging(process_name: str = None, level: str = LOG_LEVEL, log_format: str = LOG_FORMAT,
+                  debug_sample_rate: float = LOG_DEBUG_SAMPLE_RATE):
+    """Mengganti handler root logger dengan QueueHandler -> QueueListener -> stderr. Aman dipanggil ulang."""
+    global _listener
+    _stop_listener()
+
+    output = logging.StreamHandler()
+    if log_format == "json":
+        output.setFormatter(JsonFormatter(process_name))
+    else:
+        prefix = f"{process_name} - " if process_name else ""
+        output.setFormatter(logging.Formatter(
+            f'%(asctime)s - {prefix}%(name)s - %(levelname)s - [%(correlation_id)s] %(message)s'
+        ))
+
+    log_queue = queue.SimpleQueue() # Tanpa batas: put() tidak pernah memblok event loop
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter(debug_sample_rate))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+
+atexit.register(_stop_listener)
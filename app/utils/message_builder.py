@@ -0,0 +1,169 @@
+# app/utils/message_builder.py
+
+import re
+import html
+import logging
+from datetime import datetime
+
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ParseMode
+from telegram.error import BadRequest
+
+from app.utils.config import TZ, TELEGRAM_MAX_MESSAGE_LENGTH, TELEGRAM_MAX_INLINE_BUTTONS
+
+logger = logging.getLogger(__name__)
+
+# ===============================
+# ✂️ Pembangun Pesan Daftar Agenda (batas Telegram)
+# ===============================
+# Daftar agenda (/lihat, /cari) dipecah di batas item menjadi beberapa pesan HTML:
+# - panjang teks dihitung dalam unit UTF-16 setelah tag HTML dibuang, seperti Telegram
+#   menghitung batas 4096 karakter (emoji seperti 🗓️ bernilai 2-3 unit, bukan 1)
+# - tombol Edit/Hapus setiap item ikut ke pesan yang sama dengan teksnya, maksimal
+#   TELEGRAM_MAX_INLINE_BUTTONS tombol per pesan
+# - item diisi serakah (greedy) berurutan, jadi jumlah pesan minimum untuk urutan item itu
+# Satu item yang sendirian pun melebihi batas dipotong per baris (baris terlalu panjang
+# dipotong sebagai teks polos) agar pesan tetap terkirim.
+
+_TAG_RE = re.compile(r"<[^>]*>")
+_EDIT_FALLBACK_ERRORS = ("message to edit not found", "message can't be edited") # BadRequest yang dijawab dengan pesan baru
+ITEM_SEPARATOR = "---\n\n"
+_TRUNCATION_MARK = "…"
+
+def utf16_len(text: str) -> int:
+    """Panjang teks dalam unit UTF-16 (karakter di luar BMP, misal emoji, bernilai 2)."""
+    return len(text.encode("utf-16-le")) // 2
+
+def visible_length(html_text: str) -> int:
+    """Panjang teks HTML seperti dihitung Telegram: tanpa tag, entitas (&amp; dst.) sebagai satu karakter."""
+    return utf16_len(html.unescape(_TAG_RE.sub("", html_text)))
+
+def _truncate_plain(text: str, limit: int) -> str:
+    """Memotong teks polos ke maksimal `limit` unit UTF-16 (tidak memotong di tengah surrogate pair)."""
+    result, used = [], 0
+    for char in text:
+        size = utf16_len(char)
+        if used + size > limit - 1: # Sisakan satu unit untuk tanda potong
+            return "".join(result) + _TRUNCATION_MARK
+        result.append(char)
+        used += size
+    return text
+
+def _fit_item_text(text: str, limit: int) -> str:
+    """Item tunggal yang melebihi batas: ambil baris utuh selama muat, baris terlalu panjang jadi teks polos terpotong."""
+    lines, used = [], 0
+    for line in text.splitlines(keepends=True):
+        size = visible_length(line)
+        if used + size > limit:
+            remaining = limit - used
+            if remaining > 1:
+                plain = html.unescape(_TAG_RE.sub("", line))
+                lines.append(html.escape(_truncate_plain(plain, remaining), quote=False))
+            break
+        lines.append(line)
+        used += size
+    return "".join(lines)
+
+# ===============================
+# 📝 Format item agenda
+# ===============================
+
+def _jarak_waktu(selisih_hari: int) -> str:
+    if selisih_hari == 0:
+        return "Hari Ini"
+    if selisih_hari == 1:
+        return "Besok"
+    if selisih_hari > 1:
+        return f"Dalam {selisih_hari} hari"
+    return f"{abs(selisih_hari)} hari yang lalu"
+
+def _escape(value) -> str:
+    """Nilai isian user (Deskripsi, Kategori, ...) sebagai teks HTML aman: '<', '>' dan '&' tidak merusak parse_mode HTML."""
+    return html.escape(str(value), quote=False)
+
+def format_agenda_item(row, hari_ini=None):
+    """Teks HTML satu agenda (baris DataFrame get_agenda_items) dan baris tombol Edit/Hapus-nya."""
+    hari_ini = hari_ini or datetime.now(TZ).date()
+    tanggal = row["Tanggal"]
+    agenda_text = (
+        f"🗓️ Hari: <b>{tanggal.strftime('%A')}</b> ({_jarak_waktu((tanggal.date() - hari_ini).days)})\n"
+        f"🕒 Waktu: <b>{tanggal.strftime('%d %b %Y')}</b> {tanggal.strftime('%H:%M')}\n"
+        f"📌 Deskripsi: <b>{_escape(row['Deskripsi'])}</b>\n"
+        f"📂 Kategori: <b>{_escape(row['Kategori'])}</b> | 🔥 Prioritas: <b>{_escape(row['Prioritas'])}</b>\n"
+        f"🆔 Event ID: <code>{_escape(row['EventID'])}</code>\n"
+        f"📊 Status: {_escape(row['Status'])}\n"
+    )
+
+    deskripsi_singkat = str(row['Deskripsi']) # Pastikan string
+    if len(deskripsi_singkat) > 20: # Batas 20 karakter untuk tombol
+        deskripsi_singkat = deskripsi_singkat[:17] + "..."
+    buttons = [
+        InlineKeyboardButton(f"✏️ Edit: {deskripsi_singkat}", callback_data=f"edit_id:{row['EventID']}"),
+        InlineKeyboardButton(f"🗑️ Hapus: {deskripsi_singkat}", callback_data=f"hapus_id:{row['EventID']}"),
+    ]
+    return agenda_text, buttons
+
+def format_agenda_items(df) -> list:
+    """Semua baris DataFrame agenda sebagai list (teks HTML, baris tombol) untuk build_messages()."""
+    hari_ini = datetime.now(TZ).date()
+    return [format_agenda_item(row, hari_ini) for _, row in df.iterrows()]
+
+# ===============================
+# 📦 Pemecahan pesan
+# ===============================
+
+def build_messages(header: str, items: list, separator: str = ITEM_SEPARATOR,
+                   max_length: int = TELEGRAM_MAX_MESSAGE_LENGTH,
+                   max_buttons: int = TELEGRAM_MAX_INLINE_BUTTONS) -> list:
+    """
+    Menyusun list (teks, reply_markup) dari header dan item (teks HTML, baris tombol).
+    Header hanya di pesan pertama; item tidak pernah terbelah antar pesan.
+    """
+    messages = []
+    text, rows = header, []
+    length, buttons, count = visible_length(header), 0, 0
+
+    for item_text, item_buttons in items:
+        chunk = item_text + separator
+        chunk_length = visible_length(chunk)
+        if count and (length + chunk_length > max_length or buttons + len(item_buttons) > max_buttons):
+            messages.append((text, InlineKeyboardMarkup(rows) if rows else None))
+            text, rows, length, buttons, count = "", [], 0, 0, 0
+        if length + chunk_length > max_length: # Item sendirian pun terlalu panjang
+            chunk = _fit_item_text(chunk, max_length - length)
+            chunk_length = visible_length(chunk)
+        text += chunk
+        length += chunk_length
+        count += 1
+        if item_buttons:
+            rows.append(list(item_buttons))
+            buttons += len(item_buttons)
+    messages.append((text, InlineKeyboardMarkup(rows) if rows else None))
+    return messages
+
+async def send_messages(update: Update, messages: list):
+    """
+    Mengirim hasil build_messages(): pesan pertama mengedit pesan tombol (callback query) atau
+    membalas pesan user, sisanya dikirim sebagai pesan baru berurutan di chat yang sama.
+    """
+    first_text, first_markup = messages[0]
+    if update.callback_query:
+        message = update.callback_query.message
+        try:
+            await update.callback_query.edit_message_text(first_text, reply_markup=first_markup, parse_mode=ParseMode.HTML)
+        except BadRequest as e:
+            error = str(e).lower()
+            if "message is not modified" in error: # Isi sama persis, tidak ada yang perlu dikirim ulang
+                pass
+            elif any(reason in error for reason in _EDIT_FALLBACK_ERRORS):
+                # Pesan lama tidak bisa diedit lagi (misal sudah terlalu lama atau dihapus), kirim pesan baru
+                logger.warning(f"Error editing message, sending new one: {e}")
+                await message.reply_text(first_text, reply_markup=first_markup, parse_mode=ParseMode.HTML)
+            else: # Misal error parse HTML: mengirim ulang teks yang sama juga akan gagal
+                raise
+    else:
+        message = update.message
+        await message.reply_text(first_text, reply_markup=first_markup, parse_mode=ParseMode.HTML)
+
+    for text, markup in messages[1:]:
+        await message.reply_text(text, reply_markup=markup, parse_mode=ParseMode.HTML)
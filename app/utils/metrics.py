@@ -0,0 +1,296 @@
+# app/utils/metrics.py
+
+import time
+import asyncio
+import logging
+import functools
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from telegram.request import HTTPXRequest
+
+from app.utils.config import METRICS_LATENCY_BUCKETS, EVENT_LOOP_LAG_INTERVAL
+from app.utils.logging_config import correlation_scope, update_correlation_id
+from app.utils.profiling import handler_profiler
+
+logger = logging.getLogger(__name__)
+
+# ===============================
+# 📈 Metrik & Instrumentasi (per proses)
+# ===============================
+# - Setiap callback handler dibungkus (instrument_handlers): durasi total per handler, dipecah
+#   menjadi fase db / telegram / google / render. "render" adalah sisa waktu di luar ketiga
+#   fase itu (menyusun pesan & keyboard, ditambah menunggu giliran di event loop).
+# - Panggilan DB (fungsi data_manager yang diberi @timed_db), request Bot API
+#   (InstrumentedRequest) dan request Google (google_scheduler) dicatat per operasi.
+# - Event-loop lag diukur oleh loop_lag_monitor yang berjalan di event loop bot.
+# - Semua agregat bisa dibaca lewat /metrics (format Prometheus) atau perintah /stats.
+# - Wrapper handler juga memasang correlation ID per update (logging_config), dan setiap
+#   operasi yang dicatat ditulis sebagai log DEBUG (tersampling) dengan ID tersebut.
+# - Profiling opt-in per handler (profiling.handler_profiler) juga dipasang di wrapper yang sama.
+
+_HANDLER_PHASES = ("db", "telegram", "google")
+
+# Jenis operasi -> (nama metrik, nama label)
+_OPERATION_METRICS = {
+    "db": ("agenda_db_duration_seconds", "operation"),
+    "telegram": ("agenda_telegram_api_duration_seconds", "method"),
+    "google": ("agenda_google_api_duration_seconds", "operation"),
+}
+
+_phase_times = ContextVar("handler_phase_times", default=None) # dict fase -> detik milik handler aktif
+_active_operation = ContextVar("active_operation", default=None) # Mencegah hitung ganda pada panggilan bersarang
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count", "max")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * (buckets + 1) # Bucket terakhir = +Inf
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(labels: tuple, extra: str = "") -> str:
+    parts = [f'{key}="{_escape_label(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class MetricsRegistry:
+    def __init__(self, buckets: tuple = METRICS_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._histograms = {} # (nama, label) -> _Histogram
+        self._counters = {} # (nama, label) -> nilai
+        self._collectors = {} # prefix -> fungsi tanpa argumen yang mengembalikan dict angka (gauge)
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(len(self.buckets))
+            histogram.counts[index] += 1
+            histogram.total += seconds
+            histogram.count += 1
+            histogram.max = max(histogram.max, seconds)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def register_collector(self, prefix: str, collect):
+        """collect() dipanggil saat metrik dibaca; nilai numeriknya ditampilkan sebagai gauge <prefix>_<kunci>."""
+        self._collectors[prefix] = collect
+
+    def _quantile(self, histogram: _Histogram, fraction: float) -> float:
+        """Perkiraan kuantil dari bucket (batas atas bucket; bucket +Inf memakai nilai maksimum)."""
+        target = fraction * histogram.count
+        cumulative = 0
+        for index, count in enumerate(histogram.counts):
+            cumulative += count
+            if cumulative >= target and count:
+                return self.buckets[index] if index < len(self.buckets) else histogram.max
+        return histogram.max
+
+    def summary(self, name: str) -> list[dict]:
+        """Ringkasan semua seri sebuah histogram (untuk /stats), diurutkan dari total waktu terbesar."""
+        with self._lock:
+            rows = [
+                {"labels": dict(labels), "count": histogram.count, "avg": histogram.total / histogram.count,
+                 "p95": self._quantile(histogram, 0.95), "max": histogram.max, "total": histogram.total}
+                for (metric, labels), histogram in self._histograms.items()
+                if metric == name and histogram.count
+            ]
+        return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            snapshots = [(key, histogram.counts[:], histogram.total, histogram.count) for key, histogram in histograms]
+
+        current = None
+        for (name, labels), counts, total, count in snapshots:
+            if name != current:
+                lines.append(f"# TYPE {name} histogram")
+                current = name
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le_label = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{name}_bucket{_format_labels(labels, le_label)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        current = None
+        for (name, labels), value in counters:
+            if name != current:
+                lines.append(f"# TYPE {name} counter")
+                current = name
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for prefix, collect in sorted(self._collectors.items()):
+            try:
+                values = collect()
+            except Exception as e:
+                logger.warning(f"Error collecting metrics '{prefix}': {e}")
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+metrics_registry = MetricsRegistry()
+
+# ===============================
+# ⏱️ Pencatatan operasi (DB, Bot API, Google)
+# ===============================
+
+@contextmanager
+def track(kind: str, operation: str):
+    """Mencatat durasi satu operasi (kind: db/telegram/google) dan menambahkannya ke fase handler aktif."""
+    if _active_operation.get() == kind: # Misal get_agenda_items -> get_agenda_item: cukup dicatat sekali
+        yield
+        return
+    token = _active_operation.set(kind)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _active_operation.reset(token)
+        metric, label = _OPERATION_METRICS[kind]
+        metrics_registry.observe(metric, elapsed, **{label: operation})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{kind} {operation} {elapsed * 1000:.1f} ms",
+                         extra={"kind": kind, "operation": operation, "duration_ms": round(elapsed * 1000, 2)})
+        phases = _phase_times.get()
+        if phases is not None: # asyncio.to_thread menyalin context, jadi dict fase handler tetap sama
+            with metrics_registry._lock:
+                phases[kind] = phases.get(kind, 0.0) + elapsed
+
+def timed_db(func):
+    """Decorator untuk fungsi data_manager: durasi dicatat sebagai operasi DB bernama sama dengan fungsinya."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with track("db", func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest yang mencatat durasi setiap request Bot API per metode (sendMessage, ...)."""
+
+    async def do_request(self, url: str, method: str, request_data=None, *args, **kwargs):
+        with track("telegram", url.rsplit("/", 1)[-1]):
+            return await super().do_request(url, method, request_data, *args, **kwargs)
+
+# ===============================
+# 🧩 Instrumentasi handler
+# ===============================
+
+_instrumented_names = set() # Nama callback yang sudah dibungkus (label 'handler' di metrik & profiler)
+
+def instrumented_handler_names() -> list[str]:
+    """Nama semua callback handler yang diinstrumentasi, untuk validasi input seperti /profile."""
+    return sorted(_instrumented_names)
+
+def _instrument_callback(callback):
+    if getattr(callback, "_metrics_instrumented", False):
+        return callback # Objek handler dibuat sekali per modul; jangan dibungkus dua kali
+    name = callback.__name__
+    _instrumented_names.add(name)
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        phases = {}
+        token = _phase_times.set(phases)
+        started = time.perf_counter()
+        try:
+            with correlation_scope(update_correlation_id(update)), handler_profiler.maybe_profile(name):
+                return await callback(update, context)
+        except Exception:
+            metrics_registry.inc("agenda_handler_errors_total", handler=name)
+            raise
+        finally:
+            total = time.perf_counter() - started
+            _phase_times.reset(token)
+            metrics_registry.observe("agenda_handler_duration_seconds", total, handler=name)
+            for phase in _HANDLER_PHASES:
+                metrics_registry.observe("agenda_handler_phase_seconds", phases.get(phase, 0.0), handler=name, phase=phase)
+            render = max(0.0, total - sum(phases.values()))
+            metrics_registry.observe("agenda_handler_phase_seconds", render, handler=name, phase="render")
+
+    wrapper._metrics_instrumented = True
+    return wrapper
+
+def _instrument_handler(handler):
+    # ConversationHandler tidak punya callback sendiri; bungkus semua handler di dalamnya
+    nested = getattr(handler, "entry_points", None)
+    if nested is not None:
+        for child in list(handler.entry_points) + list(handler.fallbacks):
+            _instrument_handler(child)
+        for children in handler.states.values():
+            for child in children:
+                _instrument_handler(child)
+        return
+    if getattr(handler, "callback", None) is not None:
+        handler.callback = _instrument_callback(handler.callback)
+
+def instrument_handlers(application):
+    """Membungkus callback semua handler terdaftar (termasuk di dalam ConversationHandler) dengan pencatat waktu."""
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            _instrument_handler(handler)
+
+# ===============================
+# 🐢 Event-loop lag
+# ===============================
+
+class EventLoopLagMonitor:
+    def __init__(self, interval: float = EVENT_LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            # Keterlambatan bangun = lama event loop tertahan oleh kode blocking / antrean task
+            lag = max(0.0, loop.time() - expected)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            metrics_registry.observe("agenda_event_loop_lag_seconds", lag)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="event_loop_lag_monitor")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_metrics(self) -> dict:
+        return {"last_seconds": self.last_lag, "max_seconds": self.max_lag}
+
+loop_lag_monitor = EventLoopLagMonitor()
+metrics_registry.register_collector("agenda_event_loop_lag", loop_lag_monitor.get_metrics)
+metrics_registry.register_collector("agenda_profiler", handler_profiler.get_metrics)
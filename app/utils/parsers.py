@@ -1,12 +1,14 @@
 # app/utils/parsers.py
 
 from datetime import datetime, date, time
-from dateparser.search import search_dates
 import re
 from app.utils.config import TZ # Mengimpor TZ dari config karena parse_custom_time mungkin membutuhkannya
 
 def parse_custom_date(text: str) -> date | None:
     """Menguraikan teks menjadi objek tanggal menggunakan dateparser."""
+    # Impor saat pertama dipakai: dateparser memuat data bahasa & zona waktu (~0,4 detik saat startup)
+    from dateparser.search import search_dates
+
     # settings={'PREFER_DATES_FROM': 'future'} akan memprioritaskan tanggal di masa depan jika ambigu
     hasil = search_dates(text, languages=["id"], settings={'PREFER_DATES_FROM': 'future', 'STRICT_PARSING': False})
     return hasil[0][1].date() if hasil else None
@@ -26,6 +28,15 @@ def parse_custom_time(text: str) -> time | None:
             return time(hour, 0)
     return None
 
+def parse_agenda_datetime(value) -> datetime | None:
+    """Menguraikan kolom Tanggal agenda (string ISO dari database) tanpa pandas; None jika kosong/tidak valid."""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
 def cleanup_description(text: str) -> str:
     """Membersihkan teks deskripsi dari tag, jam, atau angka tunggal."""
     text = re.sub(r"[#@!]\w+", "", text) # Hapus #tag, @mention, !bang
@@ -0,0 +1,190 @@
+# app/utils/persistence.py
+
+import logging
+import json
+import pickle
+import asyncio
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from app.utils.config import (
+    PERSISTENCE_UPDATE_INTERVAL, PERSISTENCE_FLUSH_INTERVAL, PERSISTENCE_FLUSH_THRESHOLD
+)
+from app.utils.data_manager import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# ===============================
+# 💾 Persistence Percakapan (SQLite, write-behind)
+# ===============================
+# Menyimpan state ConversationHandler, user_data, dan chat_data di database agenda,
+# sehingga user yang sedang di tengah /catat, /edit, dst. tidak kehilangan alurnya saat
+# bot restart/deploy. Berbeda dengan PicklePersistence yang menulis ulang satu file utuh,
+# hanya baris yang berubah yang ditulis, dan penulisan ditunda (write-behind): perubahan
+# dikumpulkan di memori lalu ditulis dalam satu transaksi setiap PERSISTENCE_FLUSH_INTERVAL
+# detik atau setelah PERSISTENCE_FLUSH_THRESHOLD perubahan, di thread terpisah.
+# bot_data tidak disimpan: isinya diatur ulang setiap start (misal penanda worker utama).
+
+_TABLES = {
+    "conversations": "ptb_conversations",
+    "user_data": "ptb_user_data",
+    "chat_data": "ptb_chat_data",
+}
+
+class SQLitePersistence(BasePersistence):
+    def __init__(self, update_interval: float = PERSISTENCE_UPDATE_INTERVAL,
+                 flush_interval: float = PERSISTENCE_FLUSH_INTERVAL, flush_threshold: int = PERSISTENCE_FLUSH_THRESHOLD):
+        super().__init__(store_data=PersistenceInput(bot_data=False, callback_data=False), update_interval=update_interval)
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._pending = {} # (tabel, kunci) -> data pickle, atau None untuk dihapus
+        self._write_lock = None # asyncio.Lock, dibuat di event loop
+        self._flush_handle = None
+        self._flush_tasks = set() # Task flush terjadwal yang sedang berjalan
+        self._initialized = False
+        self.flush_count = 0
+
+    # --- Database ---
+
+    def _ensure_initialized(self):
+        if self._initialized:
+            return
+        conn = get_db_connection()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ptb_conversations (
+                    Name TEXT NOT NULL,
+                    Key TEXT NOT NULL, -- JSON dari tuple kunci percakapan (chat_id, user_id, ...)
+                    State BLOB NOT NULL,
+                    PRIMARY KEY (Name, Key)
+                )
+            """)
+            for table in ("ptb_user_data", "ptb_chat_data"):
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (ID INTEGER PRIMARY KEY, Data BLOB NOT NULL)")
+        conn.close()
+        self._initialized = True
+
+    def _load_rows(self, table: str) -> dict:
+        self._ensure_initialized()
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT ID, Data FROM {table}")
+        data = {}
+        for row in cursor.fetchall():
+            try:
+                data[row["ID"]] = pickle.loads(row["Data"])
+            except Exception as e:
+                logger.warning(f"Stored {table} for {row['ID']} is invalid and ignored: {e}")
+        conn.close()
+        return data
+
+    def _write(self, batch: dict):
+        self._ensure_initialized()
+        conn = get_db_connection()
+        with conn: # Satu transaksi untuk seluruh batch
+            for (kind, key), value in batch.items():
+                if kind == "conversations":
+                    name, conversation_key = key
+                    if value is None:
+                        conn.execute("DELETE FROM ptb_conversations WHERE Name = ? AND Key = ?", (name, conversation_key))
+                    else:
+                        conn.execute("INSERT OR REPLACE INTO ptb_conversations (Name, Key, State) VALUES (?, ?, ?)",
+                                     (name, conversation_key, value))
+                elif value is None:
+                    conn.execute(f"DELETE FROM {_TABLES[kind]} WHERE ID = ?", (key,))
+                else:
+                    conn.execute(f"INSERT OR REPLACE INTO {_TABLES[kind]} (ID, Data) VALUES (?, ?)", (key, value))
+        conn.close()
+
+    # --- Write-behind ---
+
+    async def _stage(self, kind: str, key, value):
+        self._pending[(kind, key)] = None if value is None else pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(self._pending) >= self.flush_threshold:
+            await self._flush_pending()
+        elif self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.flush_interval, self._start_timed_flush)
+
+    def _start_timed_flush(self):
+        # Event loop hanya menyimpan weak reference ke task; simpan referensinya sampai selesai
+        task = asyncio.get_running_loop().create_task(self._flush_pending())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush_pending(self):
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        async with self._write_lock: # Batch ditulis berurutan agar data lama tidak menimpa yang baru
+            if self._flush_handle:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            try:
+                await asyncio.to_thread(self._write, batch)
+                self.flush_count += 1
+            except Exception as e:
+                logger.error(f"Error writing conversation persistence, retrying on next flush: {e}")
+                batch.update(self._pending) # Perubahan yang lebih baru tetap menang
+                self._pending = batch
+
+    # --- BasePersistence ---
+
+    async def get_user_data(self):
+        return await asyncio.to_thread(self._load_rows, "ptb_user_data")
+
+    async def get_chat_data(self):
+        return await asyncio.to_thread(self._load_rows, "ptb_chat_data")
+
+    async def get_bot_data(self):
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name: str):
+        def load():
+            self._ensure_initialized()
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT Key, State FROM ptb_conversations WHERE Name = ?", (name,))
+            conversations = {tuple(json.loads(row["Key"])): pickle.loads(row["State"]) for row in cursor.fetchall()}
+            conn.close()
+            return conversations
+        return await asyncio.to_thread(load)
+
+    async def update_conversation(self, name: str, key, new_state):
+        await self._stage("conversations", (name, json.dumps(list(key))), new_state)
+
+    async def update_user_data(self, user_id: int, data: dict):
+        await self._stage("user_data", user_id, data)
+
+    async def update_chat_data(self, chat_id: int, data: dict):
+        await self._stage("chat_data", chat_id, data)
+
+    async def update_bot_data(self, data):
+        pass
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def drop_user_data(self, user_id: int):
+        await self._stage("user_data", user_id, None)
+
+    async def drop_chat_data(self, chat_id: int):
+        await self._stage("chat_data", chat_id, None)
+
+    async def refresh_user_data(self, user_id: int, user_data: dict):
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict):
+        pass
+
+    async def refresh_bot_data(self, bot_data):
+        pass
+
+    async def flush(self):
+        """Dipanggil saat Application berhenti: tulis semua perubahan yang masih tertunda."""
+        await self._flush_pending()
@@ -0,0 +1,66 @@
+# app/utils/preload.py
+
+import time
+import logging
+import importlib
+import threading
+
+from app.utils.config import HEAVY_MODULE_PRELOAD_DELAY
+
+logger = logging.getLogger(__name__)
+
+# ===============================
+# 🐢 Preload Modul Berat (setelah startup)
+# ===============================
+# pandas, dateparser, dan library Google diimpor di dalam fungsi yang memakainya agar bot
+# bisa melayani update pertama tanpa menunggu ~1,5 detik impor. Supaya update pertama yang
+# membutuhkannya tidak menahan event loop saat impor, modul-modul itu dimuat di thread
+# background beberapa saat setelah bot siap (HEAVY_MODULE_PRELOAD_DELAY).
+# Ukur ulang dengan: python -m tools.measure_import_time
+
+HEAVY_MODULES = (
+    "pandas",
+    "dateparser.search",
+    "google.oauth2.credentials",
+    "google.auth.transport.requests",
+    "googleapiclient.discovery",
+    "google_auth_oauthlib.flow",
+)
+
+def _warm_dateparser():
+    # Panggilan pertama search_dates memuat data bahasa Indonesia (~0,1 detik)
+    from app.utils.parsers import parse_custom_date
+    parse_custom_date("besok")
+
+def preload_heavy_modules(modules: tuple = HEAVY_MODULES) -> dict:
+    """Mengimpor modul berat satu per satu; mengembalikan nama modul -> detik (None jika gagal/tidak terinstal)."""
+    timings = {}
+    for name in modules:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            timings[name] = round(time.perf_counter() - started, 3)
+        except ImportError as e:
+            timings[name] = None
+            logger.warning(f"Preload modul {name} gagal: {e}")
+    try:
+        _warm_dateparser()
+    except Exception as e:
+        logger.warning(f"Pemanasan dateparser gagal: {e}")
+    return timings
+
+def start_background_preload(delay: float = HEAVY_MODULE_PRELOAD_DELAY):
+    """Menjalankan preload_heavy_modules di thread daemon setelah jeda; delay < 0 menonaktifkan."""
+    if delay < 0:
+        return None
+
+    def run():
+        time.sleep(delay)
+        started = time.perf_counter()
+        timings = preload_heavy_modules()
+        logger.info(f"Modul berat dimuat di background dalam {time.perf_counter() - started:.2f} detik",
+                    extra={"modules": timings})
+
+    thread = threading.Thread(target=run, name="heavy_module_preload", daemon=True)
+    thread.start()
+    return thread
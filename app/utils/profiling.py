@@ -0,0 +1,158 @@
+# app/utils/profiling.py
+
+import os
+import sys
+import time
+import random
+import cProfile
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.config import (
+    PROFILE_SAMPLE_RATE, PROFILE_MODE, PROFILE_DIR, PROFILE_MAX_FILES, PROFILE_STACK_INTERVAL
+)
+from app.utils.logging_config import correlation_id
+from app.utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# ===============================
+# 🔬 Profiling Handler (opt-in, tersampling)
+# ===============================
+# Sebagian kecil update per handler diprofil lalu disimpan ke PROFILE_DIR, satu file per update:
+# - mode 'stack': thread sampler mengambil stack thread event loop setiap PROFILE_STACK_INTERVAL
+#   dan menyimpannya dalam format folded ("a;b;c jumlah") -> <waktu>_<handler>_<id>.folded
+# - mode 'cprofile': cProfile selama handler berjalan -> <waktu>_<handler>_<id>.prof (pstats)
+# Hanya satu update diprofil pada satu waktu per proses: cProfile memang tidak bisa bertumpuk,
+# dan sampel stack event loop tidak bisa dibedakan antar handler. Keduanya juga menangkap
+# coroutine lain yang berjalan saat handler menunggu (await), jadi baca hasilnya sebagai
+# "apa yang dikerjakan event loop selama handler ini berjalan".
+# Aktif lewat PROFILE_SAMPLE_RATE atau perintah admin /profile; gabungkan hasilnya dengan
+# tools/profile_aggregate.py.
+
+def _collapse_stack(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+class HandlerProfiler:
+    def __init__(self, sample_rate: float = PROFILE_SAMPLE_RATE, mode: str = PROFILE_MODE,
+                 directory: str = PROFILE_DIR, max_files: int = PROFILE_MAX_FILES,
+                 stack_interval: float = PROFILE_STACK_INTERVAL):
+        self.sample_rate = sample_rate
+        self.handler_rates = {} # Nama handler -> fraksi, mengalahkan sample_rate
+        self.mode = mode
+        self._directory = directory
+        self.max_files = max_files
+        self.stack_interval = stack_interval
+        self._busy = threading.Lock() # Dipegang selama satu update diprofil
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile_writer")
+        self.profiled = 0
+        self.skipped_busy = 0
+
+    @property
+    def directory(self) -> str:
+        # Diselesaikan saat dipakai: get_settings() mewajibkan AGENDA_PATH, modul ini ikut diimpor tools/
+        return self._directory or os.path.join(get_settings().agenda_path, "profiles")
+
+    def set_rate(self, rate: float, handler: str = None):
+        """Mengatur fraksi sampling global, atau untuk satu handler saja (rate 0 mematikannya)."""
+        if handler:
+            self.handler_rates[handler] = rate
+        else:
+            self.sample_rate = rate
+            self.handler_rates.clear()
+
+    def rate_for(self, handler: str) -> float:
+        return self.handler_rates.get(handler, self.sample_rate)
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or any(rate > 0 for rate in self.handler_rates.values())
+
+    def _path(self, handler: str, extension: str) -> str:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return os.path.join(self.directory, f"{stamp}_{handler}_{correlation_id.get() or 'none'}.{extension}")
+
+    def _rotate(self):
+        files = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith((".prof", ".folded"))),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in files[:max(0, len(files) - self.max_files)]:
+            os.remove(entry.path)
+
+    def _write(self, path: str, write):
+        # Dijalankan di thread writer agar disk I/O tidak menahan event loop
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            write(path)
+            self._rotate()
+        except OSError as e:
+            logger.error(f"Gagal menyimpan profil {path}: {e}")
+
+    @contextmanager
+    def _cprofile(self, handler: str):
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._writer.submit(self._write, self._path(handler, "prof"), profile.dump_stats)
+
+    @contextmanager
+    def _stack_sampler(self, handler: str):
+        target = threading.get_ident() # Thread event loop yang menjalankan handler
+        stop = threading.Event()
+        samples = Counter()
+        path = self._path(handler, "folded")
+
+        def sample():
+            while not stop.wait(self.stack_interval):
+                frame = sys._current_frames().get(target)
+                if frame is not None:
+                    samples[_collapse_stack(frame)] += 1
+            self._write(path, lambda file_path: self._write_folded(file_path, samples))
+
+        threading.Thread(target=sample, name="profile_sampler", daemon=True).start()
+        try:
+            yield
+        finally:
+            stop.set() # Thread sampler menulis file sendiri setelah berhenti, tanpa join di event loop
+
+    @staticmethod
+    def _write_folded(path: str, samples: Counter):
+        with open(path, "w", encoding="utf-8") as handle:
+            for stack, count in samples.most_common():
+                handle.write(f"{stack} {count}\n")
+
+    @contextmanager
+    def maybe_profile(self, handler: str):
+        """Memprofil blok ini jika update terpilih sampel dan tidak ada update lain yang sedang diprofil."""
+        rate = self.rate_for(handler)
+        if rate <= 0 or random.random() >= rate:
+            yield
+            return
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            yield
+            return
+        try:
+            self.profiled += 1
+            session = self._cprofile(handler) if self.mode == "cprofile" else self._stack_sampler(handler)
+            with session:
+                yield
+        finally:
+            self._busy.release()
+
+    def get_metrics(self) -> dict:
+        return {"profiled": self.profiled, "skipped_busy": self.skipped_busy, "sample_rate": self.sample_rate}
+
+handler_profiler = HandlerProfiler()
@@ -0,0 +1,89 @@
+# app/utils/settings.py
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+# ===============================
+# ⚙️ Settings (satu kali muat per proses)
+# ===============================
+# Satu-satunya tempat env/.env dibaca untuk pengaturan deployment (token, path data, kredensial
+# OAuth). .env di-parse sekali (load_env_file) saat app.utils.config pertama diimpor, sehingga
+# konstanta berbasis env di config.py dan get_settings() melihat nilai yang sama, apa pun
+# urutan impor modulnya. Nilai yang sudah ada di environment proses tidak ditimpa .env.
+# get_settings() di-cache; validate_settings() dipanggil entry point (bot, server, dashboard)
+# agar konfigurasi yang salah gagal di awal, bukan di tengah request pertama.
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ENV_FILE_PATH = os.path.join(PROJECT_ROOT, "env", ".env")
+
+class SettingsError(ValueError):
+    """Konfigurasi wajib tidak ada atau tidak valid."""
+
+@dataclass(frozen=True)
+class Settings:
+    agenda_path: str # Folder data (database SQLite, migrasi CSV lama)
+    db_path: str
+    telegram_token: str | None
+    google_client_id: str | None
+    google_client_secret: str | None
+    google_credentials_key: str | None # Opsional: enkripsi token Google di credential store
+    flask_secret_key: str
+
+    @property
+    def google_oauth_configured(self) -> bool:
+        return bool(self.google_client_id and self.google_client_secret)
+
+@lru_cache(maxsize=None)
+def load_env_file(path: str = ENV_FILE_PATH) -> bool:
+    """Mem-parse .env sekali per proses; True jika file ditemukan."""
+    return load_dotenv(dotenv_path=path)
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Settings proses ini (dimuat dan divalidasi dasar sekali). Gagal cepat jika AGENDA_PATH kosong."""
+    from app.utils.config import SQLITE_DB_NAME # config memanggil load_env_file() saat diimpor
+
+    agenda_path = os.getenv("AGENDA_PATH", "").strip()
+    if not agenda_path:
+        raise SettingsError(f"AGENDA_PATH wajib diisi (environment atau {ENV_FILE_PATH})")
+    agenda_path = os.path.abspath(agenda_path)
+
+    return Settings(
+        agenda_path=agenda_path,
+        db_path=os.path.join(agenda_path, SQLITE_DB_NAME),
+        telegram_token=os.getenv("TELEGRAM_TOKEN") or None,
+        google_client_id=os.getenv("GOOGLE_CLIENT_ID") or None,
+        google_client_secret=os.getenv("GOOGLE_CLIENT_SECRET") or None,
+        google_credentials_key=os.getenv("GOOGLE_CREDENTIALS_KEY") or None,
+        flask_secret_key=os.getenv("FLASK_SECRET_KEY", "supersecretkeythatisnotsecureforproduction"),
+    )
+
+def validate_settings(require_telegram: bool = True) -> Settings:
+    """
+    Memeriksa kombinasi pengaturan saat startup dan melempar SettingsError berisi semua masalah
+    sekaligus. require_telegram=False untuk proses yang hanya melayani dashboard/API.
+    """
+    from app.utils import config
+
+    settings = get_settings()
+    problems = []
+    if os.path.exists(settings.agenda_path) and not os.path.isdir(settings.agenda_path):
+        problems.append(f"AGENDA_PATH bukan folder: {settings.agenda_path}")
+    if require_telegram and not settings.telegram_token:
+        problems.append("TELEGRAM_TOKEN tidak ditemukan di file .env")
+    if config.TELEGRAM_MODE not in ("polling", "webhook"):
+        problems.append(f"TELEGRAM_MODE harus 'polling' atau 'webhook', bukan '{config.TELEGRAM_MODE}'")
+    elif require_telegram and config.TELEGRAM_MODE == "webhook" and not config.WEBHOOK_URL:
+        problems.append("WEBHOOK_URL wajib diisi untuk TELEGRAM_MODE=webhook")
+    if config.LOG_FORMAT not in ("json", "text"):
+        problems.append(f"LOG_FORMAT harus 'json' atau 'text', bukan '{config.LOG_FORMAT}'")
+    if config.GOOGLE_PUSH_ADDRESS and not config.GOOGLE_PUSH_ADDRESS.startswith("https://"):
+        problems.append("GOOGLE_PUSH_ADDRESS harus berupa URL HTTPS")
+    if bool(settings.google_client_id) != bool(settings.google_client_secret):
+        problems.append("GOOGLE_CLIENT_ID dan GOOGLE_CLIENT_SECRET harus diisi bersamaan")
+    if problems:
+        raise SettingsError("Konfigurasi tidak valid:\n- " + "\n- ".join(problems))
+    return settings
@@ -0,0 +1,273 @@
+# app/utils/telegram_send_queue.py
+
+import time
+import asyncio
+import logging
+import warnings
+from datetime import timedelta
+from contextlib import asynccontextmanager
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+from telegram.warnings import PTBDeprecationWarning
+
+from app.utils.config import (
+    TELEGRAM_GLOBAL_RATE, TELEGRAM_GLOBAL_BURST, TELEGRAM_CHAT_RATE, TELEGRAM_CHAT_BURST,
+    TELEGRAM_GROUP_PER_MINUTE, TELEGRAM_GROUP_BURST, TELEGRAM_SEND_MAX_RETRIES, TELEGRAM_RETRY_AFTER_MAX
+)
+from app.utils.metrics import track
+
+logger = logging.getLogger(__name__)
+
+# ===============================
+# 📮 Antrean Kirim Telegram (flood control)
+# ===============================
+# Dipasang sebagai rate limiter Bot (ApplicationBuilder.rate_limiter), jadi SEMUA panggilan
+# Bot API dengan chat_id lewat sini: reply_text/edit_message_text di handler, notifikasi, dan
+# job broadcast/digest nanti, tanpa perlu mengubah pemanggilnya.
+# - token bucket global (~30 pesan/detik), per chat (~1 pesan/detik, boleh burst kecil) dan
+#   per grup/channel (~20 pesan/menit)
+# - request ke satu chat dikirim berurutan satu per satu (FIFO), jadi urutan pesan terjaga
+#   juga saat ada retry; chat berbeda tetap paralel
+# - edit berurutan pada pesan yang sama yang masih menunggu giliran digabung: hanya isi
+#   terbaru yang dikirim (pada slot edit pertama), semua pemanggil menerima hasil yang sama
+# - RetryAfter dari Telegram: chat itu dijeda selama retry_after lalu dicoba ulang
+#   (maksimum TELEGRAM_SEND_MAX_RETRIES, atau rate_limit_args=<int> per panggilan)
+# Request tanpa chat_id (answerCallbackQuery, getMe, setWebhook, ...) tidak dibatasi.
+
+_EDIT_ENDPOINTS = {"editMessageText", "editMessageReplyMarkup"}
+
+class _Bucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """Memesan satu token (boleh berutang) dan mengembalikan detik tunggu sampai slot itu tiba."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def idle(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+class _PendingEdit:
+    """Edit yang masih menunggu giliran; edit berikutnya pada pesan yang sama menimpa call-nya."""
+    __slots__ = ("endpoint", "call", "future", "coalesced")
+
+    def __init__(self, endpoint: str, call: tuple):
+        self.endpoint = endpoint
+        self.call = call # (callback, args, kwargs) yang akan dikirim
+        self.future = asyncio.get_running_loop().create_future()
+        self.coalesced = 0 # Jumlah pemanggil lain yang menunggu hasil edit ini
+
+def _edit_key(endpoint: str, data: dict):
+    if endpoint not in _EDIT_ENDPOINTS:
+        return None
+    if data.get("inline_message_id"):
+        return ("inline", data["inline_message_id"])
+    if data.get("chat_id") is not None and data.get("message_id") is not None:
+        return (str(data["chat_id"]), int(data["message_id"]))
+    return None
+
+def _can_coalesce(pending_endpoint: str, endpoint: str) -> bool:
+    # editMessageText mengganti teks DAN keyboard, jadi boleh menimpa edit apa pun;
+    # editMessageReplyMarkup hanya boleh menimpa edit keyboard (teks yang tertunda tidak boleh hilang)
+    return endpoint == "editMessageText" or pending_endpoint == "editMessageReplyMarkup"
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    # Atribut retry_after bisa int (detik) atau timedelta, tergantung versi/pengaturan PTB (deprecation PTB 22.2);
+    # kedua tipe sudah ditangani, jadi peringatan deprecation-nya tidak perlu muncul di setiap retry
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", PTBDeprecationWarning)
+        retry_after = error.retry_after
+    return retry_after.total_seconds() if isinstance(retry_after, timedelta) else float(retry_after)
+
+class TelegramSendQueue(BaseRateLimiter[int]):
+    def __init__(self, global_rate: float = TELEGRAM_GLOBAL_RATE, global_burst: float = TELEGRAM_GLOBAL_BURST,
+                 chat_rate: float = TELEGRAM_CHAT_RATE, chat_burst: float = TELEGRAM_CHAT_BURST,
+                 group_per_minute: float = TELEGRAM_GROUP_PER_MINUTE, group_burst: float = TELEGRAM_GROUP_BURST,
+                 max_retries: int = TELEGRAM_SEND_MAX_RETRIES, retry_after_max: float = TELEGRAM_RETRY_AFTER_MAX):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_per_minute / 60
+        self.group_burst = group_burst
+        self.max_retries = max_retries
+        self.retry_after_max = retry_after_max
+        self._global_bucket = _Bucket(global_rate, global_burst)
+        self._chat_buckets = {} # chat_id -> _Bucket
+        self._group_buckets = {} # chat_id grup/channel -> _Bucket (batas per menit)
+        self._paused_until = {} # chat_id (None = semua request) -> time.monotonic() akhir jeda RetryAfter
+        self._chat_locks = {} # chat_id -> [asyncio.Lock, jumlah request yang memakai/menunggu]
+        self._pending_edits = {} # kunci pesan -> _PendingEdit
+        self._metrics = {
+            "requests": 0, # Request ber-chat_id yang dikirim ke Telegram (termasuk retry)
+            "queued": 0, # Request ber-chat_id yang sedang mengantre atau dikirim saat ini
+            "max_queued": 0,
+            "throttled": 0, # Request yang harus menunggu token bucket atau jeda RetryAfter
+            "throttled_seconds": 0.0,
+            "coalesced": 0, # Edit yang tidak dikirim karena ditimpa edit yang lebih baru
+            "retry_after": 0, # Respons flood control (429) dari Telegram
+            "retries": 0,
+            "failures": 0, # Request yang tetap kena RetryAfter setelah semua retry
+        }
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    # --- Token bucket & jeda ---
+
+    def _bucket(self, buckets: dict, chat_id, rate: float, burst: float) -> _Bucket:
+        bucket = buckets.get(chat_id)
+        if bucket is None:
+            if len(buckets) > 1024: # Buang bucket chat yang sudah penuh lagi agar dict tidak terus membesar
+                now = time.monotonic()
+                for key in [key for key, old in buckets.items() if old.idle(now)]:
+                    del buckets[key]
+            bucket = buckets[chat_id] = _Bucket(rate, burst)
+        return bucket
+
+    def _pause_remaining(self, chat_id, now: float) -> float:
+        return max(self._paused_until.get(chat_id, 0.0), self._paused_until.get(None, 0.0)) - now
+
+    @asynccontextmanager
+    async def _chat_turn(self, chat_id):
+        """Giliran eksklusif satu chat: request berikutnya ke chat ini menunggu sampai yang ini selesai."""
+        entry = self._chat_locks.get(chat_id)
+        if entry is None:
+            entry = self._chat_locks[chat_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        self._metrics["queued"] += 1
+        self._metrics["max_queued"] = max(self._metrics["max_queued"], self._metrics["queued"])
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            self._metrics["queued"] -= 1
+            entry[1] -= 1
+            if not entry[1]:
+                del self._chat_locks[chat_id]
+
+    async def _wait_turn(self, chat_id):
+        """Menunggu jeda RetryAfter, lalu slot per grup, per chat dan global (urutan ini agar slot global tidak terbuang)."""
+        started = time.monotonic()
+        while (pause := self._pause_remaining(chat_id, time.monotonic())) > 0:
+            await asyncio.sleep(pause) # Jeda bisa diperpanjang RetryAfter lain selama menunggu
+
+        is_group = isinstance(chat_id, str) or chat_id < 0 # @username atau id negatif: grup/channel
+        if is_group and self.group_rate > 0:
+            await self._sleep(self._bucket(self._group_buckets, chat_id, self.group_rate, self.group_burst))
+        if self.chat_rate > 0:
+            await self._sleep(self._bucket(self._chat_buckets, chat_id, self.chat_rate, self.chat_burst))
+        if self._global_bucket.rate > 0:
+            await self._sleep(self._global_bucket)
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            self._metrics["throttled"] += 1
+            self._metrics["throttled_seconds"] += waited
+
+    @staticmethod
+    async def _sleep(bucket: _Bucket):
+        wait = bucket.reserve(time.monotonic())
+        if wait > 0:
+            with track("telegram", "queue_wait"): # Muncul di /stats & fase 'telegram' handler
+                await asyncio.sleep(wait)
+
+    def _pause(self, chat_id, seconds: float):
+        until = time.monotonic() + seconds
+        self._paused_until[chat_id] = max(self._paused_until.get(chat_id, 0.0), until)
+        now = time.monotonic()
+        for key in [key for key, value in self._paused_until.items() if value <= now]:
+            del self._paused_until[key]
+
+    # --- Eksekusi ---
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        """Dipanggil ExtBot untuk setiap request Bot API (selain getUpdates)."""
+        chat_id = data.get("chat_id")
+        if chat_id is not None:
+            try:
+                chat_id = int(chat_id)
+            except (TypeError, ValueError):
+                pass # '@username' channel dibiarkan string
+
+        key = _edit_key(endpoint, data)
+        if key is None:
+            return await self._send(chat_id, callback, args, kwargs, rate_limit_args)
+
+        pending = self._pending_edits.get(key)
+        if pending is not None and _can_coalesce(pending.endpoint, endpoint):
+            # Edit sebelumnya belum terkirim: kirim isi terbaru di slotnya dan tunggu hasilnya
+            pending.endpoint = endpoint
+            pending.call = (callback, args, kwargs)
+            pending.coalesced += 1
+            self._metrics["coalesced"] += 1
+            return await asyncio.shield(pending.future)
+
+        entry = self._pending_edits[key] = _PendingEdit(endpoint, (callback, args, kwargs))
+        try:
+            result = await self._send(chat_id, None, None, None, rate_limit_args, edit=(key, entry))
+        except BaseException as e:
+            if entry.coalesced:
+                if isinstance(e, asyncio.CancelledError):
+                    entry.future.cancel()
+                else:
+                    entry.future.set_exception(e)
+            raise
+        finally:
+            if self._pending_edits.get(key) is entry:
+                del self._pending_edits[key]
+        if entry.coalesced:
+            entry.future.set_result(result)
+        return result
+
+    async def _send(self, chat_id, callback, args, kwargs, rate_limit_args, edit=None):
+        if chat_id is None:
+            return await self._send_with_retry(chat_id, callback, args, kwargs, rate_limit_args, edit)
+        async with self._chat_turn(chat_id):
+            return await self._send_with_retry(chat_id, callback, args, kwargs, rate_limit_args, edit)
+
+    async def _send_with_retry(self, chat_id, callback, args, kwargs, rate_limit_args, edit):
+        max_retries = self.max_retries if rate_limit_args is None else rate_limit_args
+        attempt = 0
+        while True:
+            if chat_id is not None:
+                await self._wait_turn(chat_id)
+                self._metrics["requests"] += 1
+            elif (pause := self._pause_remaining(None, time.monotonic())) > 0:
+                await asyncio.sleep(pause)
+
+            if edit is not None:
+                key, entry = edit
+                if self._pending_edits.get(key) is entry:
+                    del self._pending_edits[key] # Edit yang datang setelah ini menjadi request baru
+                callback, args, kwargs = entry.call
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                self._metrics["retry_after"] += 1
+                delay = _retry_after_seconds(e) + 0.1
+                if attempt >= max_retries or delay > self.retry_after_max:
+                    self._metrics["failures"] += 1
+                    logger.warning(f"Flood control Telegram untuk chat {chat_id}, retry_after {delay:.1f} detik; menyerah")
+                    raise
+                # Jeda chat ini (atau semua request jika tanpa chat_id) agar request lain ikut menunggu
+                self._pause(chat_id, delay)
+                attempt += 1
+                self._metrics["retries"] += 1
+                logger.info(f"Flood control Telegram untuk chat {chat_id}, dicoba lagi dalam {delay:.1f} detik")
+                if edit is not None and self._pending_edits.get(key) is None:
+                    self._pending_edits[key] = entry # Edit baru selama jeda boleh digabung lagi
+
+    def get_metrics(self) -> dict:
+        now = time.monotonic()
+        return dict(self._metrics, pending_edits=len(self._pending_edits),
+                    paused_chats=sum(1 for until in self._paused_until.values() if until > now))
@@ -0,0 +1,140 @@
+# app/utils/token_refresher.py
+
+import logging
+import asyncio
+import heapq
+import random
+import time
+from datetime import timezone
+
+from app.utils.config import (
+    GOOGLE_TOKEN_REFRESH_MARGIN, GOOGLE_TOKEN_REFRESH_JITTER,
+    GOOGLE_TOKEN_REFRESH_CONCURRENCY, GOOGLE_TOKEN_REFRESH_RETRY
+)
+from app.utils.credential_store import (
+    load_credentials, save_credentials, list_user_ids, add_save_listener, remove_save_listener
+)
+
+logger = logging.getLogger(__name__)
+
+# ===============================
+# 🔄 Background Token Refresher
+# ===============================
+# Menyimpan jadwal refresh semua user terhubung dalam min-heap (waktu refresh, user_id)
+# dan me-refresh token sebelum kedaluwarsa, sehingga get_google_service hampir selalu
+# menemukan token yang masih valid tanpa round trip refresh di dalam request user.
+# Margin refresh (10 menit) sengaja lebih besar dari TTL cache credential_store (5 menit),
+# jadi proses lain yang masih memegang token lama tetap memakai token yang belum kedaluwarsa.
+
+class TokenRefresher:
+    def __init__(self, margin=GOOGLE_TOKEN_REFRESH_MARGIN, jitter=GOOGLE_TOKEN_REFRESH_JITTER,
+                 concurrency: int = GOOGLE_TOKEN_REFRESH_CONCURRENCY, retry_delay=GOOGLE_TOKEN_REFRESH_RETRY):
+        self.margin = margin.total_seconds()
+        self.jitter = jitter.total_seconds()
+        self.retry_delay = retry_delay.total_seconds()
+        self.concurrency = concurrency
+        self._heap = [] # (refresh_at epoch, user_id)
+        self._scheduled = {} # user_id -> refresh_at terbaru; entri heap yang tidak cocok dianggap basi
+        self._failures = {} # user_id -> jumlah kegagalan beruntun
+        self._wakeup = None
+        self._loop = None
+        self._task = None
+        self._semaphore = None
+        self.refreshed_count = 0
+        self.failed_count = 0
+
+    # --- Penjadwalan ---
+
+    def schedule(self, user_id, expiry):
+        """Menjadwalkan refresh user berdasarkan waktu kedaluwarsa token (datetime UTC naive seperti di google-auth)."""
+        if expiry is None:
+            return
+        expiry_ts = expiry.replace(tzinfo=timezone.utc).timestamp()
+        refresh_at = expiry_ts - self.margin - random.uniform(0, self.jitter)
+        self._push(str(user_id), refresh_at)
+
+    def _push(self, user_id: str, refresh_at: float):
+        self._scheduled[user_id] = refresh_at
+        heapq.heappush(self._heap, (refresh_at, user_id))
+        if self._wakeup:
+            self._wakeup.set() # Bangunkan loop jika jadwal baru lebih awal dari yang sedang ditunggu
+
+    def _on_credentials_saved(self, user_id, creds):
+        # Dipanggil dari thread mana pun (callback OAuth, to_thread refresh), serahkan ke event loop
+        if self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self.schedule, user_id, creds.expiry)
+
+    # --- Siklus hidup ---
+
+    async def start(self):
+        """Memuat jadwal semua user terhubung lalu menjalankan loop refresh di background."""
+        if self._task:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        user_ids = await asyncio.to_thread(list_user_ids)
+        for user_id in user_ids:
+            creds = await asyncio.to_thread(load_credentials, user_id)
+            if creds and creds.refresh_token:
+                self.schedule(user_id, creds.expiry)
+
+        add_save_listener(self._on_credentials_saved)
+        self._task = asyncio.create_task(self._run(), name="google_token_refresher")
+
+    async def stop(self):
+        remove_save_listener(self._on_credentials_saved)
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        pending = set()
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                refresh_at, user_id = heapq.heappop(self._heap)
+                if self._scheduled.get(user_id) != refresh_at:
+                    continue # Entri basi (sudah dijadwal ulang atau user dihapus)
+                del self._scheduled[user_id]
+                task = asyncio.create_task(self._refresh(user_id))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refresh(self, user_id: str):
+        async with self._semaphore:
+            try:
+                # Refresh google-auth bersifat blocking (requests), jalankan di thread
+                await asyncio.to_thread(self._refresh_blocking, user_id)
+                self._failures.pop(user_id, None)
+                self.refreshed_count += 1
+            except Exception as e:
+                self.failed_count += 1
+                failures = self._failures.get(user_id, 0) + 1
+                self._failures[user_id] = failures
+                logger.warning(f"Background refresh of Google token for user {user_id} failed ({failures}x): {e}")
+                # Backoff eksponensial, dibatasi 1 jam
+                delay = min(self.retry_delay * (2 ** (failures - 1)), 3600)
+                self._push(user_id, time.time() + delay + random.uniform(0, self.jitter))
+
+    def _refresh_blocking(self, user_id: str):
+        from google.auth.transport.requests import Request as GoogleAuthRequest
+        creds = load_credentials(user_id)
+        if not creds or not creds.refresh_token:
+            return # User sudah memutus koneksi; tidak dijadwalkan ulang
+        creds.refresh(GoogleAuthRequest())
+        save_credentials(user_id, creds) # Listener menjadwalkan refresh berikutnya dari expiry baru
+
+token_refresher = TokenRefresher()
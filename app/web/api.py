@@ -0,0 +1,265 @@
+# app/web/api.py
+
+import gzip
+import json
+import base64
+import hashlib
+import hmac
+import uuid
+from datetime import datetime, date
+
+from flask import Blueprint, request, jsonify, url_for, current_app
+
+from app.utils.config import (
+    TZ, PRESET_STATUS, API_TOKEN, API_DEFAULT_LIMIT, API_MAX_LIMIT, API_MAX_BULK, API_GZIP_MIN_SIZE
+)
+from app.utils.data_manager import (
+    get_agenda_item, get_agenda_after, bulk_write_agenda, save_agenda_item, delete_agenda_item,
+    update_agenda_fields
+)
+from app.web.cache import response_cache
+
+# ===============================
+# 🌐 REST API JSON Agenda (/api/v1)
+# ===============================
+# - GET    /api/v1/agendas              daftar agenda (cursor keyset, filter start/end/status/kategori)
+# - GET    /api/v1/agendas/<event_id>   satu agenda
+# - POST   /api/v1/agendas              membuat agenda
+# - PATCH  /api/v1/agendas/<event_id>   mengubah sebagian field agenda
+# - DELETE /api/v1/agendas/<event_id>   menghapus agenda
+# - POST   /api/v1/agendas/bulk         create/update/delete sekaligus dalam satu transaksi
+# Tanpa API_TOKEN hanya GET yang dilayani; tulis wajib token (Authorization: Bearer <API_TOKEN>).
+# Respons GET membawa ETag (If-None-Match -> 304) dan dikompres gzip jika klien mendukung.
+# API hanya mengubah data lokal; sinkronisasi Google Calendar tetap lewat bot.
+
+api_bp = Blueprint("api_v1", __name__, url_prefix="/api/v1")
+
+# Field yang boleh diisi klien; EventID, Timestamp, dan GoogleEventID dikelola server
+WRITABLE_FIELDS = ("Tanggal", "Kategori", "Prioritas", "Deskripsi", "Tag", "Status", "Keterangan")
+REQUIRED_FIELDS = ("Tanggal", "Kategori", "Prioritas", "Deskripsi")
+
+class ApiError(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+@api_bp.errorhandler(ApiError)
+def handle_api_error(error: ApiError):
+    return jsonify({"error": error.message}), error.status
+
+# --- Autentikasi, ETag & gzip ---
+
+@api_bp.before_request
+def check_api_token():
+    if not API_TOKEN:
+        # Tanpa token API hanya boleh membaca; tulis (POST/PATCH/DELETE/bulk) ditolak agar
+        # siapa pun yang bisa menjangkau port dashboard tidak bisa mengubah data
+        if request.method in ("GET", "HEAD", "OPTIONS"):
+            return None
+        return jsonify({"error": "API tulis dinonaktifkan: set API_TOKEN untuk mengaktifkannya."}), 403
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(supplied, API_TOKEN):
+        return jsonify({"error": "Token API tidak valid."}), 401
+
+@api_bp.after_request
+def finalize_response(response):
+    # ETag lemah dihitung dari body JSON asli, jadi sama untuk versi gzip maupun tidak.
+    # Respons dari response_cache sudah membawa ETag berbasis versi agenda.
+    if (request.method == "GET" and response.status_code == 200 and not response.direct_passthrough
+            and "ETag" not in response.headers):
+        response.set_etag(hashlib.sha1(response.get_data()).hexdigest(), weak=True)
+        response.headers["Cache-Control"] = "no-cache" # Boleh disimpan, tapi wajib divalidasi ulang
+        response = response.make_conditional(request) # If-None-Match cocok -> 304 tanpa body
+    return _gzip_response(response)
+
+def _gzip_response(response):
+    response.vary.add("Accept-Encoding")
+    if (response.status_code != 200 or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or "gzip" not in request.headers.get("Accept-Encoding", "").lower()):
+        return response
+    data = response.get_data()
+    if len(data) < API_GZIP_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers["Content-Encoding"] = "gzip"
+    return response
+
+# --- Helper ---
+
+def _encode_cursor(row: dict) -> str:
+    raw = json.dumps([row["Tanggal"], row["EventID"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        tanggal, event_id = json.loads(raw)
+        return str(tanggal), str(event_id)
+    except (ValueError, TypeError):
+        raise ApiError("Parameter cursor tidak valid.")
+
+def _parse_date_arg(name: str):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ApiError(f"Parameter {name} harus berformat YYYY-MM-DD.")
+
+def _parse_limit() -> int:
+    try:
+        limit = int(request.args.get("limit", API_DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError("Parameter limit harus berupa angka.")
+    return min(max(limit, 1), API_MAX_LIMIT)
+
+def _json_body():
+    data = request.get_json(silent=True)
+    if data is None:
+        raise ApiError("Body request harus berupa JSON.")
+    return data
+
+def _normalize_tanggal(value) -> str:
+    """Menerima tanggal ISO 8601; tanpa zona waktu dianggap waktu lokal (TZ). Disimpan seperti bot menyimpannya."""
+    try:
+        dt = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ApiError("Tanggal harus berformat ISO 8601, misal 2025-01-31T13:00.")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=TZ)
+    return dt.isoformat(timespec='minutes')
+
+def _validate_fields(data, partial: bool) -> dict:
+    """Memvalidasi field agenda dari klien; partial=True untuk PATCH (field wajib boleh tidak ada)."""
+    if not isinstance(data, dict):
+        raise ApiError("Agenda harus berupa objek JSON.")
+    unknown = set(data) - set(WRITABLE_FIELDS) - {"EventID"}
+    if unknown:
+        raise ApiError(f"Field tidak dikenal atau tidak boleh diubah: {', '.join(sorted(unknown))}.")
+    if not partial:
+        missing = [field for field in REQUIRED_FIELDS if not data.get(field)]
+        if missing:
+            raise ApiError(f"Field wajib belum diisi: {', '.join(missing)}.")
+
+    fields = {field: data[field] for field in WRITABLE_FIELDS if field in data}
+    for field, value in fields.items():
+        if field in REQUIRED_FIELDS and (not isinstance(value, str) or not value.strip()):
+            raise ApiError(f"Field {field} harus berupa teks yang tidak kosong.")
+        if field not in REQUIRED_FIELDS and value is not None and not isinstance(value, str):
+            raise ApiError(f"Field {field} harus berupa teks.")
+    if "Tanggal" in fields:
+        fields["Tanggal"] = _normalize_tanggal(fields["Tanggal"])
+    if "Status" in fields and fields["Status"] not in PRESET_STATUS:
+        raise ApiError(f"Status harus salah satu dari: {', '.join(PRESET_STATUS)}.")
+    return fields
+
+def _new_item(data) -> dict:
+    item = _validate_fields(data, partial=False)
+    item["EventID"] = str(uuid.uuid4())
+    return item
+
+def _require_item(event_id: str) -> dict:
+    item = get_agenda_item(event_id)
+    if not item:
+        raise ApiError("Agenda tidak ditemukan.", 404)
+    return item
+
+# --- Endpoint ---
+
+def _cached_json(render):
+    """Menyajikan GET lewat response_cache (kunci = path + query) dengan body JSON dari render()."""
+    return response_cache.respond(("api", request.full_path), lambda: current_app.json.dumps(render()),
+                                  mimetype="application/json")
+
+@api_bp.get("/agendas")
+def list_agendas():
+    limit = _parse_limit()
+    cursor = request.args.get("cursor")
+    after = _decode_cursor(cursor) if cursor else None
+    start_date, end_date = _parse_date_arg("start"), _parse_date_arg("end")
+
+    def render():
+        # Ambil satu baris ekstra untuk mengetahui apakah masih ada halaman berikutnya
+        rows = get_agenda_after(
+            after=after,
+            limit=limit + 1,
+            start_date=start_date,
+            end_date=end_date,
+            status=request.args.get("status") or None,
+            kategori=request.args.get("kategori") or None,
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {"data": rows, "next_cursor": _encode_cursor(rows[-1]) if has_more else None}
+
+    return _cached_json(render)
+
+@api_bp.get("/agendas/<event_id>")
+def get_agenda(event_id):
+    return _cached_json(lambda: {"data": _require_item(event_id)})
+
+@api_bp.post("/agendas")
+def create_agenda():
+    item = _new_item(_json_body())
+    save_agenda_item(item)
+    response = jsonify({"data": get_agenda_item(item["EventID"])})
+    response.status_code = 201
+    response.headers["Location"] = url_for("api_v1.get_agenda", event_id=item["EventID"])
+    return response
+
+@api_bp.patch("/agendas/<event_id>")
+def patch_agenda(event_id):
+    changes = _validate_fields(_json_body(), partial=True)
+    item = update_agenda_fields(event_id, **changes)
+    if not item:
+        raise ApiError("Agenda tidak ditemukan.", 404)
+    return jsonify({"data": item})
+
+@api_bp.delete("/agendas/<event_id>")
+def delete_agenda(event_id):
+    if not delete_agenda_item(event_id):
+        raise ApiError("Agenda tidak ditemukan.", 404)
+    return "", 204
+
+@api_bp.post("/agendas/bulk")
+def bulk_agendas():
+    """
+    Body: {"create": [agenda...], "update": [{"EventID": ..., field...}], "delete": [EventID...]}
+    Semua operasi divalidasi dulu lalu ditulis dalam satu transaksi; satu error membatalkan semuanya.
+    """
+    data = _json_body()
+    if not isinstance(data, dict):
+        raise ApiError("Body bulk harus berupa objek JSON.")
+    creates = data.get("create") or []
+    updates = data.get("update") or []
+    deletes = data.get("delete") or []
+    if not all(isinstance(ops, list) for ops in (creates, updates, deletes)):
+        raise ApiError("create, update, dan delete harus berupa list.")
+    if len(creates) + len(updates) + len(deletes) > API_MAX_BULK:
+        raise ApiError(f"Maksimum {API_MAX_BULK} operasi per request bulk.")
+    if not all(isinstance(event_id, str) for event_id in deletes):
+        raise ApiError("delete harus berisi daftar EventID.")
+
+    upserts = [_new_item(entry) for entry in creates]
+
+    # Update ditulis per kolom di dalam transaksi tulis (bukan baca-gabung-tulis baris penuh),
+    # agar perubahan bot/dashboard yang masuk di antaranya tidak tertimpa
+    field_updates = []
+    for entry in updates:
+        event_id = entry.get("EventID") if isinstance(entry, dict) else None
+        if not isinstance(event_id, str):
+            raise ApiError("Setiap update wajib berisi EventID.")
+        field_updates.append((event_id, _validate_fields(entry, partial=True)))
+
+    try:
+        saved_ids, deleted = bulk_write_agenda(upserts, deletes, updates=field_updates)
+    except LookupError as e:
+        raise ApiError(f"Agenda untuk update tidak ditemukan: {e.args[0]}.", 404)
+    return jsonify({
+        "created": saved_ids[:len(creates)],
+        "updated": saved_ids[len(creates):],
+        "deleted": deleted,
+    })
@@ -0,0 +1,105 @@
+# app/web/cache.py
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import current_app, request
+
+from app.utils.config import RESPONSE_CACHE_MAX_ENTRIES
+from app.utils.data_manager import get_agenda_version
+from app.utils.metrics import metrics_registry
+
+# ===============================
+# 🗄️ Cache Respons Web (dashboard & API)
+# ===============================
+# Respons disimpan per kunci (user, path + query, ...) bersama versi agenda saat dirender.
+# Versi agenda dinaikkan trigger SQLite pada setiap perubahan, jadi entri lama otomatis tidak
+# terpakai lagi dan cache dikosongkan begitu versi berubah, termasuk perubahan dari proses bot.
+# ETag diturunkan dari kunci + versi (bukan dari body), sehingga If-None-Match bisa dijawab
+# 304 tanpa merender ulang, bahkan oleh worker lain yang belum punya entri cache.
+# Tabel agenda belum punya kolom user, jadi satu perubahan agenda membatalkan cache semua user.
+
+_TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'templates')
+
+def _render_salt() -> str:
+    """Ikut dimasukkan ke ETag agar deploy dengan template baru tidak menjawab 304 dengan halaman lama."""
+    try:
+        mtimes = [os.path.getmtime(os.path.join(_TEMPLATES_DIR, name)) for name in os.listdir(_TEMPLATES_DIR)]
+    except OSError:
+        mtimes = []
+    return str(max(mtimes, default=0))
+
+class ResponseCache:
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # kunci -> (body, mimetype); urutan = LRU
+        self._version = None
+        self._lock = threading.Lock()
+        self._salt = _render_salt()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def _etag(self, key, version) -> str:
+        return hashlib.sha1(repr((key, version, self._salt)).encode("utf-8")).hexdigest()
+
+    def _get(self, key, version):
+        with self._lock:
+            if version != self._version:
+                self._entries.clear() # Agenda berubah: semua respons lama tidak berlaku
+                self._version = version
+                return None
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, version, entry):
+        with self._lock:
+            if version != self._version:
+                return # Agenda berubah selama render; jangan simpan hasil yang sudah basi
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def respond(self, key, render, mimetype: str = "text/html"):
+        """
+        Mengembalikan Response untuk kunci ini: 304 jika klien sudah punya versi terbaru,
+        dari memori jika ada, atau hasil render() (string/bytes) yang lalu disimpan.
+        """
+        version, updated_at = get_agenda_version()
+        etag = self._etag(key, version)
+
+        response = current_app.response_class(mimetype=mimetype)
+        response.set_etag(etag, weak=True)
+        response.last_modified = updated_at
+        response.headers["Cache-Control"] = "no-cache" # Boleh disimpan, tapi wajib divalidasi ulang
+        if request.if_none_match.contains_weak(etag):
+            self.not_modified += 1
+            return response.make_conditional(request)
+
+        entry = self._get(key, version)
+        if entry is None:
+            self.misses += 1
+            entry = render()
+            self._put(key, version, entry)
+        else:
+            self.hits += 1
+        response.set_data(entry)
+        return response.make_conditional(request) # Menangani If-Modified-Since
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "not_modified": self.not_modified, "version": self._version}
+
+response_cache = ResponseCache()
+metrics_registry.register_collector("agenda_response_cache", response_cache.get_metrics)
@@ -0,0 +1,176 @@
+# app/web/webhook.py
+
+import logging
+import json
+import hmac
+import asyncio
+from collections import deque
+
+from telegram import Update
+
+from app.utils.config import (
+    WEBHOOK_PATH, WEBHOOK_MAX_BODY_SIZE, WEBHOOK_BATCH_MAX, WEBHOOK_BATCH_WINDOW
+)
+
+logger = logging.getLogger(__name__)
+
+# ===============================
+# 📨 Endpoint Webhook Telegram (ASGI)
+# ===============================
+# Aplikasi ASGI minimal (dijalankan uvicorn) yang menerima update dari Telegram:
+# - memvalidasi header X-Telegram-Bot-Api-Secret-Token
+# - langsung membalas 200 setelah body diterima; decoding dilakukan di task terpisah
+# - task batcher mengambil semua update yang sudah tiba (maks. WEBHOOK_BATCH_MAX),
+#   mengurutkan berdasarkan update_id, membuang duplikat (retry dari Telegram),
+#   lalu memasukkannya ke application.update_queue milik python-telegram-bot
+
+_RECENT_UPDATE_IDS = 1000
+
+async def _read_body(receive, max_size: int):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        body += message.get("body", b"")
+        if len(body) > max_size:
+            return False
+        if not message.get("more_body", False):
+            return bytes(body)
+
+async def _respond(send, status: int, body: bytes = b""):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"text/plain"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class TelegramWebhookApp:
+    def __init__(self, application, secret_token: str, path: str = WEBHOOK_PATH,
+                 batch_max: int = WEBHOOK_BATCH_MAX, batch_window: float = WEBHOOK_BATCH_WINDOW, deliver=None):
+        self.application = application
+        # deliver(list dict update), coroutine, menggantikan pengiriman ke application lokal (misal koordinator
+        # multi-worker). Selama deliver menunggu, update baru tertampung di _pending (backpressure tanpa memblok loop)
+        self._deliver = deliver or self._deliver_to_application
+        self.secret_token = secret_token
+        self.path = path
+        self.batch_max = batch_max
+        self.batch_window = batch_window
+        self._pending = None # asyncio.Queue body mentah, dibuat di event loop saat start()
+        self._task = None
+        self._recent_ids = deque(maxlen=_RECENT_UPDATE_IDS)
+        self._recent_set = set()
+        self.metrics = {"received": 0, "rejected": 0, "invalid": 0, "duplicates": 0, "batches": 0, "max_batch": 0}
+
+    # --- Siklus hidup ---
+
+    async def start(self):
+        self._pending = asyncio.Queue()
+        self._task = asyncio.create_task(self._batcher(), name="telegram_webhook_batcher")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Update yang sudah diterima (sudah dibalas 200) tetap diteruskan ke bot, per batch sampai antrean kosong
+        while self._pending and not self._pending.empty():
+            await self._dispatch(self._drain([]))
+
+    # --- ASGI ---
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+        if scope["path"] != self.path:
+            return await _respond(send, 404)
+        if scope["method"] != "POST":
+            return await _respond(send, 405)
+
+        headers = dict(scope["headers"])
+        supplied = headers.get(b"x-telegram-bot-api-secret-token", b"").decode("latin-1")
+        if not hmac.compare_digest(supplied, self.secret_token):
+            self.metrics["rejected"] += 1
+            return await _respond(send, 403)
+
+        body = await _read_body(receive, WEBHOOK_MAX_BODY_SIZE)
+        if body is None:
+            return # Klien memutus koneksi
+        if body is False:
+            return await _respond(send, 413)
+
+        self.metrics["received"] += 1
+        self._pending.put_nowait(body)
+        await _respond(send, 200)
+
+    async def _lifespan(self, receive, send):
+        # Siklus hidup diatur oleh pemanggil (start/stop), cukup konfirmasi ke server ASGI
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # --- Batching ---
+
+    def _drain(self, batch: list) -> list:
+        while len(batch) < self.batch_max:
+            try:
+                batch.append(self._pending.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = self._drain([await self._pending.get()])
+            if self.batch_window > 0:
+                deadline = loop.time() + self.batch_window
+                while len(batch) < self.batch_max and (remaining := deadline - loop.time()) > 0:
+                    try:
+                        batch.append(await asyncio.wait_for(self._pending.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                    self._drain(batch)
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch: list):
+        updates = []
+        for body in batch:
+            try:
+                data = json.loads(body)
+                update_id = data["update_id"]
+            except Exception as e:
+                self.metrics["invalid"] += 1
+                logger.warning(f"Invalid Telegram update payload ignored: {e}")
+                continue
+            if update_id in self._recent_set:
+                self.metrics["duplicates"] += 1
+                continue
+            if len(self._recent_ids) == self._recent_ids.maxlen:
+                self._recent_set.discard(self._recent_ids[0])
+            self._recent_ids.append(update_id)
+            self._recent_set.add(update_id)
+            updates.append(data)
+
+        # Telegram bisa mengirim lewat beberapa koneksi paralel; jaga urutan update dalam satu batch
+        updates.sort(key=lambda data: data["update_id"])
+        await self._deliver(updates)
+        self.metrics["batches"] += 1
+        self.metrics["max_batch"] = max(self.metrics["max_batch"], len(batch))
+
+    async def _deliver_to_application(self, updates: list[dict]):
+        """Meneruskan update (dict JSON, sudah terurut & unik) ke bot di proses ini."""
+        for data in updates:
+            update = Update.de_json(data, self.application.bot)
+            if update is not None:
+                self.application.update_queue.put_nowait(update)
@@ -1,80 +1,70 @@
 # app_server.py
 # Aplikasi Flask untuk Dashboard Web dan Google OAuth2 Callback
 
-import os
 import json
-import pickle
-from flask import Flask, redirect, request, url_for, session, render_template_string
-import requests
-from google_auth_oauthlib.flow import Flow
-from google.auth.transport.requests import Request as GoogleAuthRequest
-import pandas as pd # Diperlukan untuk menampilkan DataFrame
-from datetime import datetime, date, timedelta
+import logging
+import time
+import threading
+from flask import (
+    Flask, Response, redirect, request, render_template, stream_with_context
+)
+from datetime import datetime, date
 
 # --- Import dari modul-modul bot Anda ---
-from dotenv import load_dotenv
-from app.utils.data_manager import get_agenda_items, update_agenda_field, save_agenda_item, delete_agenda_item # Impor fungsi manajemen data
-from app.utils.config import TZ, GOOGLE_SCOPES, GOOGLE_TOKEN_DIR, GOOGLE_REDIRECT_URI # Impor GOOGLE_SCOPES dan GOOGLE_REDIRECT_URI
+from app.utils.data_manager import (
+    initialize_agenda_data, get_agenda_page, get_agenda_categories, get_agenda_changes, get_latest_change_seq,
+    AGENDA_SORT_COLUMNS
+) # Impor fungsi manajemen data
+from app.utils.config import (
+    PRESET_STATUS, SSE_HEARTBEAT_INTERVAL, SSE_MAX_STREAM_DURATION, SSE_MAX_CLIENTS, METRICS_TOKEN
+)
+from app.utils.agenda_notifier import agenda_notifier
+from app.utils.google_calendar_api import (
+    is_google_connected, generate_auth_url_for_user, save_google_token_from_callback, revoke_google_access
+)
+from app.utils.google_push import initialize_push_tables, handle_push_notification, schedule_watch_registration
+from app.utils.google_calendars import get_selected_calendars
+from app.web.api import api_bp
+from app.web.cache import response_cache
+from app.utils.metrics import metrics_registry
+from app.utils.logging_config import correlation_id, new_correlation_id, setup_logging
+from app.utils.settings import validate_settings
 
-# Load .env variables for this standalone Flask app.
-# Asumsi script ini berada di root proyek, 'env' adalah subdirectory langsung.
-load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'env', '.env'))
+# .env sudah dimuat sekali oleh app.utils.config (lihat app/utils/settings.py); dashboard
+# tidak butuh TELEGRAM_TOKEN, tapi konfigurasi lain yang salah tetap gagal di sini.
+settings = validate_settings(require_telegram=False)
 
-# Ambil variabel lingkungan yang diperlukan
-GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
-GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
-# GOOGLE_REDIRECT_URI sudah diimpor dari config.py di atas
-# GOOGLE_SCOPES juga diimpor dari config.py di atas
-# GOOGLE_TOKEN_DIR juga diimpor dari config.py di atas
+# Dijalankan sendiri (gunicorn/flask run): pasang logging terstruktur. Jika diimpor oleh
+# app/server.py, logging sudah dipasang oleh load_environment().
+if not logging.getLogger().handlers:
+    setup_logging("web")
+logger = logging.getLogger(__name__)
 
-# --- Pastikan folder GOOGLE_TOKEN_DIR ada ---
-os.makedirs(GOOGLE_TOKEN_DIR, exist_ok=True)
+# Kredensial Google (client ID/secret, token user) dikelola oleh google_calendar_api dan credential_store
+
+# --- Pastikan tabel agenda (beserta index-nya) dan tabel watch channel Google ada ---
+initialize_agenda_data(None)
+initialize_push_tables()
 
 app = Flask(__name__)
-app.secret_key = os.getenv("FLASK_SECRET_KEY", "supersecretkeythatisnotsecureforproduction") 
-
-# --- Fungsi Helper untuk Kredensial Google ---
-def get_google_credentials_path(user_id: str) -> str:
-    return os.path.join(GOOGLE_TOKEN_DIR, f"token_{user_id}.pickle")
-
-def get_google_service_from_web(user_id: str):
-    """
-    Mendapatkan service Google Calendar API untuk user tertentu dari konteks web.
-    Akan memuat kredensial dari file jika ada dan valid, atau None jika otentikasi diperlukan.
-    """
-    creds = None
-    token_path = get_google_credentials_path(user_id)
-
-    if os.path.exists(token_path):
-        try:
-            with open(token_path, 'rb') as token:
-                creds = pickle.load(token)
-        except (EOFError, pickle.UnpicklingError):
-            os.remove(token_path)
-            creds = None
-            print(f"Corrupted or empty Google token file for user {user_id} removed.")
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                creds.refresh(GoogleAuthRequest())
-                with open(token_path, 'wb') as token:
-                    pickle.dump(creds, token)
-                print(f"Google token for user {user_id} refreshed and saved.")
-            except Exception as e:
-                print(f"Error refreshing Google token for user {user_id}: {e}")
-                return None
-        else:
-            return None # Perlu otentikasi baru
-
-    if creds:
-        try:
-            service = build('calendar', 'v3', credentials=creds)
-            return service
-        except Exception as e:
-            print(f"Error building Google Calendar service for user {user_id}: {e}")
-            return None
-    return None
+app.secret_key = settings.flask_secret_key
+
+# --- Correlation ID per request (header X-Request-ID dari proxy dipakai jika ada) ---
+@app.before_request
+def _bind_correlation_id():
+    correlation_id.set(request.headers.get('X-Request-ID') or new_correlation_id())
+
+@app.after_request
+def _add_request_id_header(response):
+    response.headers['X-Request-ID'] = correlation_id.get() or ''
+    return response
+
+@app.teardown_request
+def _reset_correlation_id(exc=None):
+    correlation_id.set(None) # Thread WSGI dipakai ulang; jangan bawa ID ke request berikutnya
+
+# --- REST API JSON agenda (/api/v1) ---
+app.register_blueprint(api_bp)
 
 # --- Rute Flask untuk Google OAuth Callback (tetap ada) ---
 @app.route('/google_oauth_callback')
@@ -83,41 +73,63 @@ def google_oauth_callback():
     telegram_user_id = request.args.get('state')
 
     if not code or not telegram_user_id:
-        return render_template_string("<h1>Error: Kode otorisasi atau User ID tidak ditemukan.</h1><p>Mohon coba lagi proses otentikasi dari bot Telegram.</p>")
+        return render_template('message.html', title="Error: Kode otorisasi atau User ID tidak ditemukan.",
+                               lines=["Mohon coba lagi proses otentikasi dari bot Telegram."])
 
     try:
-        flow_config = {
-            "web": {
-                "client_id": GOOGLE_CLIENT_ID,
-                "client_secret": GOOGLE_CLIENT_SECRET,
-                "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                "token_uri": "https://oauth2.googleapis.com/token",
-                "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-                "redirect_uris": [GOOGLE_REDIRECT_URI]
-            }
-        }
-        flow = Flow.from_client_config(flow_config, scopes=GOOGLE_SCOPES, state=telegram_user_id)
-        flow.redirect_uri = GOOGLE_REDIRECT_URI
-
-        flow.fetch_token(code=code)
-        creds = flow.credentials
+        # Tukar kode otorisasi dengan token dan simpan di credential store
+        save_google_token_from_callback(telegram_user_id, code)
 
-        with open(get_google_credentials_path(telegram_user_id), 'wb') as token_file:
-            pickle.dump(creds, token_file)
+        # Daftarkan watch channel di background agar perubahan kalender di-push sejak awal
+        for calendar_id in get_selected_calendars(telegram_user_id):
+            schedule_watch_registration(telegram_user_id, calendar_id)
         
-        return render_template_string(f"""
-            <h1>✅ Otentikasi Google Berhasil!</h1>
-            <p>Anda berhasil mengizinkan bot Telegram untuk mengakses Google Calendar Anda.</p>
-            <p>Anda sekarang bisa menutup halaman ini.</p>
-            <p>User ID: {telegram_user_id}</p>
-            <p>Status: Token disimpan di server.</p>
-        """)
+        return render_template('message.html', title="✅ Otentikasi Google Berhasil!", user_id=telegram_user_id, lines=[
+            "Anda berhasil mengizinkan bot Telegram untuk mengakses Google Calendar Anda.",
+            "Anda sekarang bisa menutup halaman ini.",
+            "Status: Token disimpan di server.",
+        ])
 
     except Exception as e:
-        print(f"Error during Google OAuth callback: {e}")
-        return render_template_string(f"<h1>Error Otentikasi:</h1><p>{e}</p><p>Mohon coba lagi dari bot Telegram.</p>")
+        logger.error(f"Error during Google OAuth callback: {e}")
+        return render_template('message.html', title="Error Otentikasi:",
+                               lines=[str(e), "Mohon coba lagi dari bot Telegram."])
+
+# --- Rute Flask untuk Google Calendar Push Notification ---
+@app.route('/google_push', methods=['POST'])
+def google_push():
+    # Google hanya butuh status 2xx secepatnya; fetch inkremental berjalan di background.
+    if not handle_push_notification(request.headers):
+        return "", 404 # Channel tidak dikenal atau token tidak cocok
+    return "", 200
 
 # --- Rute Flask untuk Dashboard Web (BARU) ---
+DASHBOARD_PER_PAGE = 25
+DASHBOARD_MAX_PER_PAGE = 100
+
+def _parse_date_arg(name: str):
+    """Membaca parameter query tanggal (YYYY-MM-DD); None jika kosong atau tidak valid."""
+    try:
+        return date.fromisoformat(request.args.get(name, ''))
+    except ValueError:
+        return None
+
+def _parse_int_arg(name: str, default: int, minimum: int = 1, maximum: int = None):
+    try:
+        value = int(request.args.get(name, default))
+    except ValueError:
+        value = default
+    value = max(value, minimum)
+    return min(value, maximum) if maximum else value
+
+@app.template_filter('tanggal')
+def format_tanggal(value):
+    """Menampilkan Tanggal ISO dari database sebagai 'dd-mm-YYYY HH:MM'."""
+    try:
+        return datetime.fromisoformat(value).strftime('%d-%m-%Y %H:%M')
+    except (TypeError, ValueError):
+        return value
+
 @app.route('/')
 @app.route('/dashboard')
 def dashboard():
@@ -129,108 +141,149 @@ def dashboard():
     user_id_from_url = request.args.get('user_id')
     
     if not user_id_from_url:
-        return render_template_string("""
-            <h1>Selamat Datang di Dashboard Agenda Bot</h1>
-            <p>Untuk melihat agenda Anda, mohon sertakan ID Pengguna Telegram Anda di URL.</p>
-            <p>Contoh: <code>https://babageodomainesiacom-e76e6d7c07ef.nevacloud.io/dashboard?user_id=YOUR_TELEGRAM_USER_ID</code></p>
-            <p>Anda bisa mendapatkan ID Pengguna Telegram Anda dengan mengirimkan perintah /start ke bot Anda di Telegram.</p>
-        """)
-    
-    # Ambil semua agenda dari database untuk user_id ini (saat ini belum per user, tapi nanti bisa)
-    # Untuk sekarang, get_agenda_items tidak memfilter per user_id, jadi akan menampilkan semua.
-    agenda_items_df = get_agenda_items() 
-    
-    # Cek status koneksi Google Calendar untuk user_id ini
-    google_connected = False
-    google_service = get_google_service_from_web(user_id_from_url)
-    if google_service:
-        google_connected = True
-
-    # HTML dasar untuk dashboard
-    dashboard_html = f"""
-    <!DOCTYPE html>
-    <html lang="id">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Dashboard Agenda Bot</title>
-        <style>
-            body {{ font-family: sans-serif; margin: 20px; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 900px; margin: auto; background: #fff; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }}
-            h1, h2 {{ color: #0056b3; border-bottom: 2px solid #eee; padding-bottom: 10px; margin-bottom: 20px; }}
-            .button {{ display: inline-block; background-color: #007bff; color: white; padding: 10px 15px; border-radius: 5px; text-decoration: none; border: none; cursor: pointer; font-size: 16px; }}
-            .button:hover {{ background-color: #0056b3; }}
-            .google-status {{ margin-top: 20px; padding: 10px; border-radius: 5px; font-weight: bold; }}
-            .google-connected {{ background-color: #d4edda; color: #155724; border: 1px solid #c3e6cb; }}
-            .google-disconnected {{ background-color: #f8d7da; color: #721c24; border: 1px solid #f5c6cb; }}
-            table {{ width: 100%; border-collapse: collapse; margin-top: 20px; }}
-            th, td {{ border: 1px solid #ddd; padding: 10px; text-align: left; vertical-align: top; }}
-            th {{ background-color: #f2f2f2; }}
-            .no-agenda {{ text-align: center; color: #666; padding: 20px; }}
-            code {{ background-color: #eee; padding: 2px 4px; border-radius: 3px; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>Dashboard Agenda Bot</h1>
-            <p>Selamat datang, User ID: <code>{user_id_from_url}</code>!</p>
-
-            <div class="google-status {'google-connected' if google_connected else 'google-disconnected'}">
-                Status Google Calendar: {'Terhubung' if google_connected else 'Tidak Terhubung'}
-            </div>
-
-            <p style="margin-top: 20px;">
-                {'<a href="/google_auth_web?user_id=' + user_id_from_url + '" class="button">Sinkronkan dengan Google Calendar</a>' if not google_connected else '<a href="/google_disconnect_web?user_id=' + user_id_from_url + '" class="button" style="background-color: #dc3545;">Putuskan Koneksi Google</a>'}
-            </p>
-
-            <h2>Daftar Agenda Anda</h2>
-    """
-    
-    if not agenda_items_df.empty:
-        dashboard_html += agenda_items_df.to_html(classes='table table-striped', index=False)
-    else:
-        dashboard_html += "<p class='no-agenda'>Tidak ada agenda yang tersimpan.</p>"
+        return render_template('welcome.html')
+
+    # Filter, pengurutan, dan paginasi dikerjakan di SQLite; hanya satu halaman yang dimuat.
+    # Tabel agenda belum punya kolom user, jadi semua agenda masih ditampilkan.
+    start_date = _parse_date_arg('start')
+    end_date = _parse_date_arg('end')
+    status = request.args.get('status') or None
+    kategori = request.args.get('kategori') or None
+    sort_by = request.args.get('sort', 'Tanggal')
+    if sort_by not in AGENDA_SORT_COLUMNS:
+        sort_by = 'Tanggal'
+    descending = request.args.get('dir') == 'desc'
+    page = _parse_int_arg('page', 1)
+    per_page = _parse_int_arg('per_page', DASHBOARD_PER_PAGE, maximum=DASHBOARD_MAX_PER_PAGE)
+
+    # Cek status koneksi Google Calendar untuk user_id ini (dari credential store, tanpa build service)
+    google_connected = is_google_connected(user_id_from_url)
+
+    def render():
+        # Seq dibaca sebelum query halaman: perubahan di antaranya terkirim ulang lewat stream, bukan hilang
+        change_seq = get_latest_change_seq()
+        rows, total = get_agenda_page(page, per_page, start_date, end_date, status, kategori, sort_by, descending)
+
+        # Parameter query saat ini, dipakai ulang oleh link paginasi & header kolom di template
+        filters = {
+            'user_id': user_id_from_url,
+            'start': start_date.isoformat() if start_date else '',
+            'end': end_date.isoformat() if end_date else '',
+            'status': status or '',
+            'kategori': kategori or '',
+            'sort': sort_by,
+            'dir': 'desc' if descending else 'asc',
+            'per_page': per_page,
+        }
+        return render_template(
+            'dashboard.html',
+            user_id=user_id_from_url,
+            google_connected=google_connected,
+            rows=rows,
+            total=total,
+            page=page,
+            total_pages=max(1, -(-total // per_page)),
+            filters=filters,
+            status_options=PRESET_STATUS,
+            kategori_options=get_agenda_categories(),
+            change_seq=change_seq, # Titik awal stream live update
+        )
+
+    # Halaman yang sama disajikan dari memori (atau 304) selama agenda & status Google tidak berubah
+    return response_cache.respond(('dashboard', user_id_from_url, request.full_path, google_connected), render)
+
+# --- Rute Flask untuk Live Update Dashboard (Server-Sent Events) ---
+_sse_clients = 0
+_sse_lock = threading.Lock()
+
+def _sse_event(seq: int, data: dict) -> str:
+    return f"id: {seq}\nevent: agenda\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _stream_agenda_changes(last_seq: int):
+    """Generator SSE: mengirim perubahan agenda setelah last_seq, lalu menunggu perubahan berikutnya."""
+    started = time.monotonic()
+    yield "retry: 3000\n\n" # Jeda reconnect browser (ms)
+    while time.monotonic() - started < SSE_MAX_STREAM_DURATION:
+        latest = agenda_notifier.wait(last_seq, timeout=SSE_HEARTBEAT_INTERVAL)
+        if latest <= last_seq:
+            yield ": ping\n\n"
+            continue
+        while True:
+            changes = get_agenda_changes(last_seq)
+            if not changes:
+                last_seq = max(last_seq, latest)
+                break
+            for change in changes:
+                last_seq = change["Seq"]
+                yield _sse_event(change["Seq"], change)
+
+def _release_sse_client():
+    global _sse_clients
+    with _sse_lock:
+        _sse_clients -= 1
+
+@app.route('/dashboard/stream')
+def dashboard_stream():
+    # Tabel agenda belum punya kolom user, jadi semua perubahan agenda dikirim ke setiap dashboard.
+    global _sse_clients
+    if not request.args.get('user_id'):
+        return "", 400
+    # Browser mengirim Last-Event-ID saat reconnect; koneksi pertama memakai Seq dari halaman yang dirender
+    try:
+        last_seq = int(request.headers.get('Last-Event-ID') or request.args.get('since') or agenda_notifier.latest_seq())
+    except ValueError:
+        return "", 400
+
+    with _sse_lock:
+        if _sse_clients >= SSE_MAX_CLIENTS:
+            return "", 503 # Script dashboard mencoba menyambung lagi beberapa saat kemudian
+        _sse_clients += 1
+
+    response = Response(stream_with_context(_stream_agenda_changes(last_seq)), mimetype='text/event-stream')
+    response.call_on_close(_release_sse_client) # Dipanggil juga jika stream tidak pernah mulai dikirim
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no' # Matikan buffering nginx agar event langsung terkirim
+    return response
 
-    dashboard_html += """
-            <p style="margin-top: 30px;"><small>Data diambil dari database SQLite bot Telegram Anda.</small></p>
-        </div>
-    </body>
-    </html>
-    """
-    return render_template_string(dashboard_html)
+# --- Metrik proses (format Prometheus) ---
+# Saat bot berjalan dalam mode webhook, dashboard ini dilayani oleh proses yang sama,
+# sehingga metrik handler bot, Bot API dan event-loop lag ikut tampil di sini.
+@app.route('/metrics')
+def metrics():
+    if METRICS_TOKEN and request.headers.get('Authorization') != f"Bearer {METRICS_TOKEN}":
+        return "", 401
+    return Response(metrics_registry.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 # --- Rute Flask untuk Sync Google dari Web (BARU) ---
 @app.route('/google_auth_web')
 def google_auth_web():
     user_id = request.args.get('user_id')
     if not user_id:
-        return render_template_string("<h1>Error: User ID tidak ditemukan.</h1><p>Mohon sertakan ID Pengguna Telegram Anda di URL.</p>")
+        return render_template('message.html', title="Error: User ID tidak ditemukan.",
+                               lines=["Mohon sertakan ID Pengguna Telegram Anda di URL."])
     
     # Hasilkan URL otorisasi Google (menggunakan fungsi yang sama dari google_calendar_api.py)
-    auth_url = app.utils.google_calendar_api.generate_auth_url_for_user(int(user_id)) # Perlu impor generate_auth_url_for_user
+    auth_url = generate_auth_url_for_user(int(user_id))
     return redirect(auth_url)
 
 @app.route('/google_disconnect_web')
 def google_disconnect_web():
     user_id = request.args.get('user_id')
     if not user_id:
-        return render_template_string("<h1>Error: User ID tidak ditemukan.</h1><p>Mohon sertakan ID Pengguna Telegram Anda di URL.</p>")
+        return render_template('message.html', title="Error: User ID tidak ditemukan.",
+                               lines=["Mohon sertakan ID Pengguna Telegram Anda di URL."])
     
     # Putuskan koneksi Google (menggunakan fungsi yang sama dari google_calendar_api.py)
-    success = app.utils.google_calendar_api.revoke_google_access(int(user_id)) # Perlu impor revoke_google_access
+    success = revoke_google_access(int(user_id))
     
     if success:
-        return render_template_string(f"""
-            <h1>✅ Koneksi Google Diputuskan!</h1>
-            <p>Koneksi Google Calendar untuk User ID <code>{user_id}</code> telah berhasil diputuskan.</p>
-            <p><a href="/dashboard?user_id={user_id}" class="button">Kembali ke Dashboard</a></p>
-        """)
+        return render_template('message.html', title="✅ Koneksi Google Diputuskan!", user_id=user_id,
+                               lines=["Koneksi Google Calendar untuk user ini telah berhasil diputuskan."],
+                               dashboard_link=True)
     else:
-        return render_template_string(f"""
-            <h1>❌ Gagal Memutuskan Koneksi!</h1>
-            <p>Terjadi kesalahan saat memutuskan koneksi Google Calendar untuk User ID <code>{user_id}</code>.</p>
-            <p><a href="/dashboard?user_id={user_id}" class="button">Kembali ke Dashboard</a></p>
-        """)
+        return render_template('message.html', title="❌ Gagal Memutuskan Koneksi!", user_id=user_id,
+                               lines=["Terjadi kesalahan saat memutuskan koneksi Google Calendar untuk user ini."],
+                               dashboard_link=True)
 
 
 if __name__ == '__main__':
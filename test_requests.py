@@ -1,15 +1,9 @@
 # test_requests.py
 import os
 import requests
-from dotenv import load_dotenv # Hapus find_dotenv dari import
-
-# --- Load .env variables secara eksplisit untuk test_requests.py ---
-# Asumsi test_requests.py berada di root proyek (~/babageo_bot/)
-# Jadi, 'env/.env' adalah relatif terhadap lokasi skrip ini.
-project_root = os.path.dirname(os.path.abspath(__file__)) # Ini adalah ~/babageo_bot
-dotenv_path = os.path.join(project_root, 'env', '.env')
-load_dotenv(dotenv_path=dotenv_path) # Muat variabel dari path eksplisit ini
+from app.utils.settings import load_env_file # .env yang sama dengan bot, tanpa mewajibkan AGENDA_PATH
 
+load_env_file()
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_TOKEN")
 
 print(f"DEBUG_REQUESTS: Token yang akan diuji: {TELEGRAM_BOT_TOKEN}")
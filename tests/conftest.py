@@ -0,0 +1,8 @@
+# tests/conftest.py
+# Modul app membaca AGENDA_PATH saat diimpor (get_settings gagal cepat jika kosong);
+# arahkan ke folder sementara agar test tidak pernah menyentuh data sungguhan.
+
+import os
+import tempfile
+
+os.environ.setdefault("AGENDA_PATH", tempfile.mkdtemp(prefix="agenda-test-"))
@@ -0,0 +1,126 @@
+# tests/test_agenda_cache.py
+
+import sqlite3
+
+import pytest
+
+from app.utils.agenda_cache import AgendaReadCache
+
+class _Versions:
+    """Sumber versi agenda yang bisa dinaikkan test (pengganti agenda_meta)."""
+    def __init__(self):
+        self.value = 1
+
+    def __call__(self):
+        return self.value
+
+def _cache(versions, **kwargs):
+    return AgendaReadCache(versions, version_check_interval=0, **kwargs)
+
+def test_hit_mengembalikan_salinan():
+    cache = _cache(_Versions())
+    _, generation = cache.get_item("a")
+    cache.put_item("a", {"EventID": "a", "Status": "Belum"}, generation)
+
+    item, _ = cache.get_item("a")
+    item["Status"] = "Diubah"
+    assert cache.get_item("a")[0]["Status"] == "Belum"
+    assert (cache.hits, cache.misses) == (2, 1)
+
+def test_tulis_proses_lain_mengosongkan_cache():
+    versions = _Versions()
+    cache = _cache(versions)
+    _, generation = cache.get_item("a")
+    cache.put_item("a", {"EventID": "a"}, generation)
+    cache.put_range(("2026-10-01", "2026-10-31"), [{"EventID": "b"}], cache.get_range(("x",))[1])
+
+    versions.value += 1 # Trigger SQLite menaikkan versi karena proses lain menulis
+    assert cache.get_item("a")[0] is None
+    assert cache.get_range(("2026-10-01", "2026-10-31"))[0] is None
+    assert cache.invalidations == 1
+
+def test_tulis_lokal_tidak_mengosongkan_cache():
+    versions = _Versions()
+    cache = _cache(versions)
+    _, generation = cache.get_item("a")
+    cache.put_item("a", {"EventID": "a"}, generation)
+    cache.put_item("b", {"EventID": "b"}, generation)
+
+    versions.value += 1 # Tulis proses ini sendiri
+    cache.local_write(1, 2)
+    cache.item_written("b", {"EventID": "b", "Status": "Selesai"})
+
+    assert cache.get_item("a")[0] == {"EventID": "a"}
+    assert cache.get_item("b")[0]["Status"] == "Selesai"
+    assert cache.invalidations == 0
+
+def test_tulis_lokal_setelah_tulis_proses_lain_tetap_mengosongkan():
+    versions = _Versions()
+    cache = _cache(versions)
+    _, generation = cache.get_item("a")
+    cache.put_item("a", {"EventID": "a"}, generation)
+
+    versions.value = 3 # Proses lain menulis (2), lalu proses ini (3)
+    cache.local_write(2, 3) # Cache masih di versi 1: versi tidak diadopsi
+    assert cache.get_item("a")[0] is None
+    assert cache.invalidations == 1
+
+def test_hasil_query_yang_dimulai_sebelum_tulis_tidak_disimpan():
+    cache = _cache(_Versions())
+    _, generation = cache.get_item("a")
+    cache.item_written("a", None) # Tulis terjadi selama query berjalan
+    cache.put_item("a", {"EventID": "a", "Status": "Lama"}, generation)
+    assert cache.get_item("a")[0] is None
+
+def test_lru_membuang_entri_terlama():
+    cache = _cache(_Versions(), max_items=2)
+    generation = cache.get_item("a")[1]
+    cache.put_item("a", {"EventID": "a"}, generation)
+    cache.put_item("b", {"EventID": "b"}, generation)
+    cache.get_item("a") # 'a' jadi yang terbaru dipakai
+    cache.put_item("c", {"EventID": "c"}, generation)
+    assert cache.get_item("b")[0] is None
+    assert cache.get_item("a")[0] is not None
+
+# --- Lewat data_manager dan database SQLite sungguhan (AGENDA_PATH sementara dari conftest) ---
+
+@pytest.fixture
+def dm():
+    from app.utils import data_manager
+
+    data_manager.initialize_agenda_data(None)
+    interval = data_manager.agenda_cache.version_check_interval
+    data_manager.agenda_cache.version_check_interval = 0
+    data_manager.agenda_cache.clear()
+    yield data_manager
+    data_manager.agenda_cache.version_check_interval = interval
+
+def _seed(dm, event_id: str):
+    dm.save_agenda_item({
+        "EventID": event_id, "Tanggal": "2026-10-20T10:00+07:00", "Deskripsi": "Rapat",
+        "Kategori": "Kerja", "Prioritas": "Sedang", "Status": "Belum",
+    })
+    dm.get_agenda_item(event_id) # Isi cache (dan versi yang diketahui cache)
+
+def test_data_manager_tulis_lokal_mempertahankan_cache(dm):
+    _seed(dm, "cache-lokal-1")
+    _seed(dm, "cache-lokal-2")
+    before = dm.agenda_cache.invalidations
+
+    dm.update_agenda_fields("cache-lokal-1", Status="Selesai")
+    assert dm.get_agenda_item("cache-lokal-1")["Status"] == "Selesai"
+    assert dm.get_agenda_item("cache-lokal-2") is not None
+    assert dm.agenda_cache.invalidations == before
+
+def test_data_manager_tulis_proses_lain_terdeteksi(dm):
+    _seed(dm, "cache-asing")
+    before = dm.agenda_cache.invalidations
+
+    # Koneksi terpisah di luar pool = penulis lain (app_server / worker bot lain)
+    conn = sqlite3.connect(dm.DB_FILE_PATH)
+    with conn:
+        conn.execute("UPDATE agenda SET Status = 'Selesai' WHERE EventID = 'cache-asing'")
+    conn.close()
+
+    assert dm.get_agenda_item("cache-asing")["Status"] == "Selesai"
+    assert dm.agenda_cache.invalidations == before + 1
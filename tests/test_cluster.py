@@ -0,0 +1,41 @@
+# tests/test_cluster.py
+
+import os
+import subprocess
+import sys
+
+from app.cluster import shard_for, shard_key
+
+def _message(update_id: int, user_id: int, chat_id: int) -> dict:
+    return {"update_id": update_id, "message": {"from": {"id": user_id}, "chat": {"id": chat_id}}}
+
+def test_shard_key_memakai_pengirim_lalu_chat():
+    assert shard_key(_message(1, 7, -100)) == 7
+    assert shard_key({"update_id": 2, "callback_query": {"from": {"id": 8}, "message": {"chat": {"id": -5}}}}) == 8
+    assert shard_key({"update_id": 3, "message_reaction": {"chat": {"id": -1}, "user": {"id": 11}}}) == 11
+    assert shard_key({"update_id": 4, "channel_post": {"chat": {"id": -9}}}) == -9
+    assert shard_key({"update_id": 5}) == 5
+
+def test_update_satu_user_selalu_ke_worker_yang_sama():
+    # Chat pribadi dan grup berbeda, user sama: user_data & state percakapan tetap di satu worker
+    updates = [_message(1, 42, 42), _message(2, 42, -1001), _message(3, 42, -1002)]
+    assert len({shard_for(data, 4) for data in updates}) == 1
+
+def test_shard_for_stabil_dan_merata():
+    shards = [shard_for(_message(i, user_id, user_id), 4) for i, user_id in enumerate(range(1000, 3000))]
+    assert shards == [shard_for(_message(i, user_id, user_id), 4) for i, user_id in enumerate(range(1000, 3000))]
+    counts = [shards.count(index) for index in range(4)]
+    assert min(counts) > 400 # 2000 user, ~500 per worker
+
+def test_shard_for_sama_di_proses_lain():
+    # Koordinator dan worker dijalankan ulang dengan hash seed berbeda: hasil tidak boleh bergantung padanya
+    user_ids = [1, 42, 123456789, -1001234]
+    expected = [shard_for(_message(0, user_id, user_id), 8) for user_id in user_ids]
+    code = (
+        "from app.cluster import shard_for\n"
+        f"print([shard_for({{'update_id': 0, 'message': {{'from': {{'id': u}}, 'chat': {{'id': u}}}}}}, 8) for u in {user_ids}])"
+    )
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=project_root, env={**os.environ, "PYTHONHASHSEED": "123"}).stdout
+    assert output.strip() == str(expected)
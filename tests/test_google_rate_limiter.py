@@ -0,0 +1,52 @@
+# tests/test_google_rate_limiter.py
+
+import json
+import time
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from app.utils.google_rate_limiter import (
+    GoogleRequestScheduler, _TokenBucket, _is_retryable, _retry_after_seconds
+)
+
+def _http_error(status: int, reason: str = None, headers: dict = None) -> HttpError:
+    content = json.dumps({"error": {"errors": [{"reason": reason}] if reason else []}}).encode()
+    return HttpError(httplib2.Response({"status": status, **(headers or {})}), content)
+
+def test_bucket_refill_dibatasi_kapasitas():
+    bucket = _TokenBucket(rate=2.0, capacity=5)
+    start = bucket.updated
+    bucket.tokens = 0
+    bucket.refill(start + 1.5)
+    assert bucket.tokens == 3.0
+    bucket.refill(start + 100)
+    assert bucket.tokens == 5
+
+def test_bucket_wait_time_sampai_satu_token():
+    bucket = _TokenBucket(rate=4.0, capacity=1)
+    assert bucket.wait_time() == 0.0
+    bucket.tokens = 0.5
+    assert bucket.wait_time() == 0.125 # (1 - 0.5) / 4
+    bucket.tokens = -1 # Berutang: butuh 2 token lagi
+    assert bucket.wait_time() == 0.5
+
+def test_acquire_menunggu_setelah_burst_user_habis():
+    scheduler = GoogleRequestScheduler(qps=1000, burst=1000, user_qps=20, user_burst=2)
+    started = time.monotonic()
+    for _ in range(3):
+        scheduler.acquire("user-a")
+    elapsed = time.monotonic() - started
+    assert 0.04 <= elapsed < 1.0 # Token ketiga baru tersedia ~50 ms kemudian
+    scheduler.acquire("user-b") # User lain punya bucket sendiri, tidak ikut menunggu
+    assert scheduler.get_metrics()["throttled"] == 1
+
+def test_retry_after_dan_retryable():
+    assert _retry_after_seconds(_http_error(429, headers={"retry-after": "3"})) == 3.0
+    assert _retry_after_seconds(_http_error(429, headers={"retry-after": "Wed, 21 Oct 2026 07:28:00 GMT"})) is None
+    assert _retry_after_seconds(_http_error(503)) is None
+    assert _is_retryable(_http_error(429))
+    assert _is_retryable(_http_error(500))
+    assert _is_retryable(_http_error(403, "userRateLimitExceeded"))
+    assert not _is_retryable(_http_error(403, "forbidden"))
+    assert not _is_retryable(_http_error(404))
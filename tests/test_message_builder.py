@@ -0,0 +1,75 @@
+# tests/test_message_builder.py
+
+from datetime import date, datetime
+
+from telegram import InlineKeyboardButton
+
+from app.utils.message_builder import (
+    ITEM_SEPARATOR, build_messages, format_agenda_item, utf16_len, visible_length
+)
+
+def _item(index: int, text: str, buttons: int = 2):
+    return text, [InlineKeyboardButton(f"b{index}-{n}", callback_data=f"x:{index}:{n}") for n in range(buttons)]
+
+def _button_count(markup) -> int:
+    return sum(len(row) for row in markup.inline_keyboard) if markup else 0
+
+def test_utf16_len_menghitung_emoji_sebagai_surrogate_pair():
+    assert utf16_len("abc") == 3
+    assert utf16_len("🗓️") == 3 # U+1F5D3 (2 unit) + variation selector (1 unit)
+    assert visible_length("<b>a&amp;b</b>") == 3
+
+def test_semua_pesan_dalam_batas_dan_item_tidak_terbelah():
+    items = [_item(i, f"🗓️ <b>Agenda {i}</b> " + "🔥" * 150 + "\n") for i in range(60)]
+    messages = build_messages("<b>Header</b>\n\n", items, max_length=4096, max_buttons=100)
+
+    assert len(messages) > 1
+    for text, markup in messages:
+        assert visible_length(text) <= 4096
+        assert _button_count(markup) <= 100
+    joined = "".join(text for text, _ in messages)
+    assert joined == "<b>Header</b>\n\n" + "".join(text + ITEM_SEPARATOR for text, _ in items)
+    assert sum(_button_count(markup) for _, markup in messages) == 120
+
+def test_batas_tombol_memecah_pesan():
+    items = [_item(i, f"Agenda {i}\n") for i in range(10)]
+    messages = build_messages("", items, max_buttons=4)
+    assert [_button_count(markup) for _, markup in messages] == [4, 4, 4, 4, 4]
+
+def test_pengisian_serakah_memakai_pesan_minimum():
+    # Tiap item 100 unit (termasuk separator): 10 item per pesan 1000 unit
+    text = "x" * (100 - len(ITEM_SEPARATOR))
+    messages = build_messages("", [(text, []) for _ in range(25)], max_length=1000)
+    assert len(messages) == 3
+    assert all(markup is None for _, markup in messages)
+
+def test_item_tunggal_terlalu_panjang_dipotong():
+    long_line = "<b>Judul</b>\n" + "&lt;" * 5000 + "\n"
+    messages = build_messages("<b>Header</b>\n", [_item(0, long_line)], max_length=4096)
+
+    assert len(messages) == 1
+    text, markup = messages[0]
+    assert visible_length(text) <= 4096
+    assert text.endswith("…")
+    assert "&lt;" in text and "<lt;" not in text # Potongan baris tetap di-escape
+    assert _button_count(markup) == 2
+
+def test_item_terlalu_panjang_setelah_item_lain_pindah_ke_pesan_baru():
+    messages = build_messages("", [_item(0, "pendek\n"), _item(1, "y" * 5000)], max_length=4096)
+    assert len(messages) == 2
+    assert messages[0][0] == "pendek\n" + ITEM_SEPARATOR
+    assert visible_length(messages[1][0]) <= 4096
+
+def test_format_agenda_item_meng_escape_isian_user():
+    row = {
+        "Tanggal": datetime(2026, 10, 20, 9, 30), "Deskripsi": "R&D <rapat>", "Kategori": "<i>Kerja",
+        "Prioritas": "Tinggi", "EventID": "e<1>", "Status": "Belum & nanti",
+    }
+    text, buttons = format_agenda_item(row, hari_ini=date(2026, 10, 19))
+
+    assert "<b>R&amp;D &lt;rapat&gt;</b>" in text
+    assert "&lt;i&gt;Kerja" in text
+    assert "<code>e&lt;1&gt;</code>" in text
+    assert "Belum &amp; nanti" in text
+    assert "(Besok)" in text
+    assert buttons[0].callback_data == "edit_id:e<1>"
@@ -0,0 +1,80 @@
+# tests/test_telegram_send_queue.py
+
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+from telegram.error import RetryAfter
+
+from app.utils.telegram_send_queue import TelegramSendQueue, _Bucket, _retry_after_seconds
+
+# RetryAfter(<int>) sendiri memicu peringatan deprecation PTB 22.2 saat dibuat
+pytestmark = pytest.mark.filterwarnings("ignore::telegram.warnings.PTBDeprecationWarning")
+
+def test_bucket_reserve_burst_lalu_berutang():
+    bucket = _Bucket(rate=2.0, capacity=2)
+    now = bucket.updated
+    assert bucket.reserve(now) == 0.0
+    assert bucket.reserve(now) == 0.0
+    assert bucket.reserve(now) == 0.5 # Token ketiga: utang 1 token pada 2 token/detik
+    assert bucket.reserve(now) == 1.0 # Antre di belakang slot sebelumnya
+    assert bucket.reserve(now + 1.0) == 0.5 # 1 detik mengisi 2 token, habis untuk utang 2
+    assert bucket.reserve(now + 10.0) == 0.0 # Isi ulang dibatasi kapasitas
+
+def test_bucket_idle_setelah_penuh_lagi():
+    bucket = _Bucket(rate=1.0, capacity=1)
+    now = bucket.updated
+    bucket.reserve(now)
+    assert not bucket.idle(now + 0.5)
+    assert bucket.idle(now + 1.0)
+
+def test_retry_after_detik_dan_timedelta():
+    assert _retry_after_seconds(RetryAfter(3)) == 3.0
+    assert _retry_after_seconds(RetryAfter(timedelta(seconds=2.5))) == 2.5
+
+def _queue(**kwargs) -> TelegramSendQueue:
+    # Batas kirim dimatikan: test ini hanya menguji retry & urutan
+    return TelegramSendQueue(global_rate=0, chat_rate=0, group_per_minute=0, **kwargs)
+
+def test_retry_after_dicoba_ulang_dan_urutan_chat_terjaga():
+    sent = []
+    failures = {"pesan-1": 1}
+
+    def send(text):
+        async def callback():
+            if failures.get(text):
+                failures[text] -= 1
+                raise RetryAfter(0) # Jeda 0,1 detik (retry_after + margin)
+            sent.append(text)
+            return text
+        return callback
+
+    async def main():
+        queue = _queue()
+        started = time.monotonic()
+        results = await asyncio.gather(*(
+            queue.process_request(send(text), (), {}, "sendMessage", {"chat_id": 1}, None)
+            for text in ("pesan-1", "pesan-2", "pesan-3")
+        ))
+        return queue, results, time.monotonic() - started
+
+    queue, results, elapsed = asyncio.run(main())
+    assert results == ["pesan-1", "pesan-2", "pesan-3"]
+    assert sent == ["pesan-1", "pesan-2", "pesan-3"] # pesan-2 tidak menyalip pesan-1 yang dicoba ulang
+    assert elapsed >= 0.1
+    metrics = queue.get_metrics()
+    assert (metrics["retry_after"], metrics["retries"], metrics["failures"]) == (1, 1, 0)
+
+def test_retry_after_terlalu_lama_tidak_dicoba_ulang():
+    async def callback():
+        raise RetryAfter(60)
+
+    async def main():
+        queue = _queue(retry_after_max=10)
+        with pytest.raises(RetryAfter):
+            await queue.process_request(callback, (), {}, "sendMessage", {"chat_id": 1}, None)
+        return queue.get_metrics()
+
+    metrics = asyncio.run(main())
+    assert (metrics["retries"], metrics["failures"]) == (0, 1)
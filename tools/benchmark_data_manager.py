@@ -0,0 +1,258 @@
+# tools/benchmark_data_manager.py
+# Benchmark latensi & throughput fungsi data_manager pada database agenda sintetis.
+# Setiap ukuran database dijalankan di proses terpisah (AGENDA_PATH berbeda, karena path
+# database dibaca saat data_manager diimpor), lalu hasilnya digabung menjadi satu JSON
+# baseline berisi p50/p95/p99 per operasi. Baseline itu bisa dipakai untuk mendeteksi regresi.
+#
+# Contoh:
+#   python -m tools.benchmark_data_manager --rows 1000,10000,100000 --output benchmarks/baseline.json
+#   python -m tools.benchmark_data_manager --rows 1000000 --data-dir /tmp/agenda-bench   # DB dipakai ulang
+#   python -m tools.benchmark_data_manager --compare benchmarks/baseline.json --threshold 1.25
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import platform
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, date, timedelta
+
+_KATEGORI = ["Kerja", "Pribadi", "Kuliah", "Rapat", "Olahraga", "Keluarga", "Belanja", "Kesehatan"]
+_PRIORITAS = ["Tinggi", "Sedang", "Rendah"]
+_STATUS = ["Belum", "Proses", "Selesai"]
+_KATA = ["rapat", "laporan", "presentasi", "dokter", "gym", "belanja", "proyek", "klien", "review",
+         "deadline", "makan", "siang", "keluarga", "kuliah", "tugas", "ujian", "servis", "motor"]
+_SEARCH_TERMS = ["rapat", "laporan", "gym", "klien", "ujian", "tidak-ada-hasil"]
+
+_POPULATE_CHUNK = 10_000
+_DAY_SPAN = 730 # Agenda tersebar ±1 tahun dari hari ini
+
+# ===============================
+# 🧪 Data sintetis
+# ===============================
+# Tabel agenda belum punya kolom pemilik, jadi "banyak user" disimulasikan lewat tag
+# user-<n> (--users) dan variasi kategori/deskripsi, yang juga dipakai query pencarian.
+
+def _synthetic_item(rng: random.Random, index: int, users: int, today: date) -> dict:
+    from app.utils.config import TZ
+
+    day = today + timedelta(days=rng.randrange(-_DAY_SPAN // 2, _DAY_SPAN // 2))
+    tanggal = datetime(day.year, day.month, day.day, rng.randrange(6, 22), rng.choice((0, 15, 30, 45)), tzinfo=TZ)
+    return {
+        "Timestamp": (tanggal - timedelta(days=rng.randrange(0, 30))).strftime("%Y-%m-%d %H:%M:%S"),
+        "Tanggal": tanggal.isoformat(timespec='minutes'),
+        "Kategori": rng.choice(_KATEGORI),
+        "Prioritas": rng.choice(_PRIORITAS),
+        "Deskripsi": " ".join(rng.choices(_KATA, k=rng.randrange(2, 6))).capitalize(),
+        "Tag": f"user-{rng.randrange(users)}",
+        "EventID": f"bench-{index:08d}",
+        "Status": rng.choice(_STATUS),
+    }
+
+def _populate(rows: int, users: int, seed: int) -> float:
+    """Mengisi database sampai berisi `rows` agenda; mengembalikan lama pengisian (detik)."""
+    from app.utils.data_manager import get_db_connection, bulk_write_agenda
+
+    conn = get_db_connection()
+    existing = conn.execute("SELECT COUNT(*) FROM agenda").fetchone()[0]
+    conn.close()
+    if existing >= rows:
+        return 0.0
+
+    rng = random.Random(seed)
+    today = date.today()
+    started = time.perf_counter()
+    for offset in range(existing, rows, _POPULATE_CHUNK):
+        chunk = [_synthetic_item(rng, index, users, today) for index in range(offset, min(offset + _POPULATE_CHUNK, rows))]
+        bulk_write_agenda(upserts=chunk)
+    return time.perf_counter() - started
+
+# ===============================
+# ⏱️ Pengukuran
+# ===============================
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def _summarize(samples: list, elapsed: float) -> dict:
+    values = sorted(samples)
+    to_ms = 1000.0
+    return {
+        "n": len(values),
+        "mean_ms": round(sum(values) / len(values) * to_ms, 4) if values else 0.0,
+        "p50_ms": round(_percentile(values, 0.50) * to_ms, 4),
+        "p95_ms": round(_percentile(values, 0.95) * to_ms, 4),
+        "p99_ms": round(_percentile(values, 0.99) * to_ms, 4),
+        "max_ms": round(values[-1] * to_ms, 4) if values else 0.0,
+        "ops_per_sec": round(len(values) / elapsed, 1) if elapsed else 0.0,
+    }
+
+def _measure(operation, arguments: list, before=None, warmup: bool = False) -> dict:
+    """
+    Memanggil operation(*args) untuk setiap args; before() (tidak ikut diukur) dipanggil sebelum tiap panggilan.
+    warmup=True menjalankan satu putaran tanpa diukur dulu dengan argumen yang sama (untuk varian *_cached,
+    agar yang diukur memang cache hit, bukan miss pertama setiap kunci).
+    """
+    if warmup:
+        for args in arguments:
+            operation(*args)
+    samples = []
+    elapsed = 0.0
+    for args in arguments:
+        if before:
+            before()
+        started = time.perf_counter()
+        operation(*args)
+        duration = time.perf_counter() - started
+        samples.append(duration)
+        elapsed += duration
+    return _summarize(samples, elapsed)
+
+def run_benchmarks(rows: int, ops: int, users: int, seed: int) -> dict:
+    """Menjalankan semua benchmark pada database di AGENDA_PATH (proses ini); mengembalikan hasil per operasi."""
+    from app.utils import data_manager as dm
+
+    dm.initialize_agenda_data(None)
+    populate_seconds = _populate(rows, users, seed)
+
+    rng = random.Random(seed + rows)
+    today = date.today()
+    existing_ids = [f"bench-{rng.randrange(rows):08d}" for _ in range(ops)]
+    new_items = [_synthetic_item(rng, rows + 10_000_000 + index, users, today) for index in range(ops)]
+    ranges = []
+    for _ in range(ops):
+        start = today + timedelta(days=rng.randrange(-_DAY_SPAN // 2, _DAY_SPAN // 2))
+        ranges.append((start, start + timedelta(days=rng.choice((0, 0, 0, 6))))) # Kebanyakan 1 hari, kadang 1 minggu
+    search_terms = [rng.choice(_SEARCH_TERMS) for _ in range(max(ops // 10, 5))] # Full scan, jadi lebih sedikit sampel
+
+    clear_cache = dm.agenda_cache.clear
+    results = {
+        "save_agenda_item": _measure(dm.save_agenda_item, [(dict(item),) for item in new_items]),
+        "get_agenda_items_by_id": _measure(lambda event_id: dm.get_agenda_items(event_id=event_id),
+                                           [(event_id,) for event_id in existing_ids], before=clear_cache),
+        "get_agenda_items_by_id_cached": _measure(lambda event_id: dm.get_agenda_items(event_id=event_id),
+                                                  [(event_id,) for event_id in existing_ids], warmup=True),
+        "get_agenda_item_cached": _measure(dm.get_agenda_item, [(event_id,) for event_id in existing_ids], warmup=True),
+        "get_agenda_items_by_range": _measure(lambda start, end: dm.get_agenda_items(start_date=start, end_date=end),
+                                              ranges, before=clear_cache),
+        "get_agenda_items_by_range_cached": _measure(lambda start, end: dm.get_agenda_items(start_date=start, end_date=end),
+                                                     ranges, warmup=True),
+        "get_agenda_items_search": _measure(lambda term: dm.get_agenda_items(search_query=term),
+                                            [(term,) for term in search_terms]),
+        "update_agenda_field": _measure(dm.update_agenda_field,
+                                        [(event_id, "Status", rng.choice(_STATUS)) for event_id in existing_ids]),
+        "delete_agenda_item": _measure(dm.delete_agenda_item, [(item["EventID"],) for item in new_items]),
+    }
+    dm.close_db_pool()
+    return {"rows": rows, "populate_seconds": round(populate_seconds, 2), "operations": results}
+
+# ===============================
+# 📊 Baseline & perbandingan
+# ===============================
+
+def compare_to_baseline(current: dict, baseline: dict, threshold: float, metric: str = "p95_ms") -> list:
+    """Daftar regresi: operasi yang `metric`-nya lebih dari threshold x baseline pada ukuran yang sama."""
+    regressions = []
+    for size, result in current["results"].items():
+        base_result = baseline.get("results", {}).get(size)
+        if not base_result:
+            continue
+        for name, stats in result["operations"].items():
+            base_stats = base_result["operations"].get(name)
+            if not base_stats or not base_stats.get(metric):
+                continue
+            ratio = stats[metric] / base_stats[metric]
+            if ratio > threshold:
+                regressions.append({"rows": size, "operation": name, "metric": metric,
+                                    "baseline": base_stats[metric], "current": stats[metric], "ratio": round(ratio, 2)})
+    return regressions
+
+def _print_table(report: dict):
+    print(f"{'rows':>9}  {'operasi':<34}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>11}")
+    for size, result in report["results"].items():
+        for name, stats in result["operations"].items():
+            print(f"{size:>9}  {name:<34}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}"
+                  f"{stats['p99_ms']:>10.3f}{stats['ops_per_sec']:>11.1f}")
+
+def _run_size_in_subprocess(rows: int, args, data_dir: str) -> dict:
+    os.makedirs(data_dir, exist_ok=True)
+    result_file = os.path.join(data_dir, "result.json")
+    env = dict(os.environ, AGENDA_PATH=data_dir)
+    command = [sys.executable, "-m", "tools.benchmark_data_manager", "--single-size", str(rows),
+               "--ops", str(args.ops), "--users", str(args.users), "--seed", str(args.seed), "--result-file", result_file]
+    subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL)
+    with open(result_file) as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark data_manager pada database agenda sintetis")
+    parser.add_argument("--rows", default="1000,10000,100000", help="Daftar ukuran database, dipisah koma (maks. 1000000 wajar)")
+    parser.add_argument("--ops", type=int, default=300, help="Jumlah sampel per operasi")
+    parser.add_argument("--users", type=int, default=1000, help="Jumlah user sintetis (tag user-<n>)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", help="Simpan & pakai ulang database per ukuran di folder ini (default: folder sementara)")
+    parser.add_argument("--output", help="Tulis hasil (baseline) ke file JSON ini")
+    parser.add_argument("--compare", help="Bandingkan dengan baseline JSON; exit code 1 jika ada regresi")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Rasio p95 terhadap baseline yang dianggap regresi")
+    parser.add_argument("--single-size", type=int, help=argparse.SUPPRESS) # Mode internal: satu ukuran, di proses anak
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single_size:
+        result = run_benchmarks(args.single_size, args.ops, args.users, args.seed)
+        with open(args.result_file, "w") as f:
+            json.dump(result, f)
+        return
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "ops": args.ops,
+            "users": args.users,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    temp_dir = None if args.data_dir else tempfile.TemporaryDirectory(prefix="agenda-bench-")
+    base_dir = args.data_dir or temp_dir.name
+    try:
+        for rows in (int(value) for value in args.rows.split(",") if value.strip()):
+            print(f"Benchmark {rows} baris...", flush=True)
+            result = _run_size_in_subprocess(rows, args, os.path.join(base_dir, str(rows)))
+            if result["populate_seconds"]:
+                print(f"  database dibuat dalam {result['populate_seconds']} detik")
+            report["results"][str(rows)] = result
+    finally:
+        if temp_dir:
+            temp_dir.cleanup()
+
+    _print_table(report)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Hasil disimpan ke {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.threshold)
+        for item in regressions:
+            print(f"⚠️ Regresi {item['operation']} ({item['rows']} baris): {item['metric']} "
+                  f"{item['baseline']} -> {item['current']} ({item['ratio']}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"Tidak ada regresi di atas {args.threshold}x dibanding {args.compare}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# tools/fake_google_push.py
+# Stand-in lokal untuk push notification Google Calendar.
+# Mengirim notifikasi dengan header X-Goog-* yang sama seperti Google ke endpoint /google_push,
+# sehingga alur watch channel -> fetch inkremental bisa diuji tanpa domain HTTPS publik.
+#
+# Contoh:
+#   python -m tools.fake_google_push --target http://localhost:5000/google_push --user-id 12345 --register
+#   python -m tools.fake_google_push --target http://localhost:5000/google_push --serve --port 8089
+#   curl -X POST http://localhost:8089/notify/12345
+
+import argparse
+import json
+import secrets
+import uuid
+import urllib.request
+import urllib.error
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.utils.config import TZ, GOOGLE_WATCH_TTL
+from app.utils.data_manager import get_db_connection
+from app.utils.google_push import initialize_push_tables
+
+def register_fake_channel(user_id, calendar_id: str = 'primary') -> dict:
+    """Menyimpan watch channel palsu di database (tanpa memanggil Google) dan mengembalikannya."""
+    channel = {
+        "ChannelID": str(uuid.uuid4()),
+        "UserID": str(user_id),
+        "CalendarID": calendar_id,
+        "ResourceID": f"fake-resource-{uuid.uuid4().hex[:12]}",
+        "Token": secrets.token_urlsafe(24),
+        "Expiration": (datetime.now(TZ) + GOOGLE_WATCH_TTL).isoformat(timespec='seconds'),
+    }
+    conn = get_db_connection()
+    conn.execute("""
+        INSERT INTO google_watch_channels (ChannelID, UserID, CalendarID, ResourceID, Token, Expiration)
+        VALUES (:ChannelID, :UserID, :CalendarID, :ResourceID, :Token, :Expiration)
+    """, channel)
+    conn.commit()
+    conn.close()
+    return channel
+
+def get_channels_for_user(user_id) -> list[dict]:
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM google_watch_channels WHERE UserID = ?", (str(user_id),))
+    rows = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return rows
+
+def send_push_notification(target: str, channel: dict, state: str = "exists", message_number: int = 1) -> int:
+    """Mengirim satu notifikasi push ke target seperti yang dilakukan Google. Mengembalikan status HTTP."""
+    expiration = datetime.fromisoformat(channel["Expiration"])
+    headers = {
+        "X-Goog-Channel-ID": channel["ChannelID"],
+        "X-Goog-Channel-Token": channel["Token"],
+        "X-Goog-Channel-Expiration": expiration.strftime("%a, %d %b %Y %H:%M:%S GMT"),
+        "X-Goog-Resource-ID": channel["ResourceID"] or "",
+        "X-Goog-Resource-URI": f"https://www.googleapis.com/calendar/v3/calendars/{channel['CalendarID']}/events",
+        "X-Goog-Resource-State": state,
+        "X-Goog-Message-Number": str(message_number),
+    }
+    req = urllib.request.Request(target, data=b"", headers=headers, method="POST")
+    try:
+        with urllib.request.urlopen(req, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+class FakeGooglePushServer(ThreadingHTTPServer):
+    """
+    Server HTTP kecil yang meniru sisi Google:
+    POST /notify/<user_id>[?state=exists] -> kirim notifikasi untuk semua channel user ke target.
+    GET  /channels/<user_id>              -> daftar channel user (JSON).
+    """
+
+    def __init__(self, target: str, port: int = 8089, host: str = "127.0.0.1"):
+        self.target = target
+        self.message_number = 0
+        super().__init__((host, port), _FakeGooglePushHandler)
+
+    def notify_user(self, user_id, state: str = "exists") -> list[int]:
+        statuses = []
+        for channel in get_channels_for_user(user_id):
+            self.message_number += 1
+            statuses.append(send_push_notification(self.target, channel, state, self.message_number))
+        return statuses
+
+class _FakeGooglePushHandler(BaseHTTPRequestHandler):
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        path, _, query = self.path.partition("?")
+        parts = path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] != "notify":
+            return self._send_json(404, {"error": "not found"})
+        state = "sync" if "state=sync" in query else "exists"
+        statuses = self.server.notify_user(parts[1], state)
+        self._send_json(200, {"sent": len(statuses), "statuses": statuses})
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] != "channels":
+            return self._send_json(404, {"error": "not found"})
+        self._send_json(200, get_channels_for_user(parts[1]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulasi push notification Google Calendar")
+    parser.add_argument("--target", required=True, help="URL endpoint /google_push, misal http://localhost:5000/google_push")
+    parser.add_argument("--user-id", help="Kirim notifikasi untuk channel milik user ini")
+    parser.add_argument("--register", action="store_true", help="Buat channel palsu untuk --user-id terlebih dahulu")
+    parser.add_argument("--state", default="exists", choices=["sync", "exists", "not_exists"])
+    parser.add_argument("--serve", action="store_true", help="Jalankan server simulasi")
+    parser.add_argument("--port", type=int, default=8089)
+    args = parser.parse_args()
+
+    initialize_push_tables()
+
+    if args.user_id and args.register:
+        channel = register_fake_channel(args.user_id)
+        print(f"Channel palsu dibuat: {channel['ChannelID']}")
+
+    if args.user_id and not args.serve:
+        channels = get_channels_for_user(args.user_id)
+        if not channels:
+            print(f"Tidak ada channel untuk user {args.user_id}. Gunakan --register.")
+        for number, channel in enumerate(channels, start=1):
+            status = send_push_notification(args.target, channel, args.state, number)
+            print(f"Notifikasi {args.state} untuk channel {channel['ChannelID']} -> HTTP {status}")
+
+    if args.serve:
+        server = FakeGooglePushServer(args.target, args.port)
+        print(f"Fake Google push server berjalan di http://127.0.0.1:{args.port} -> {args.target}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+# tools/fake_telegram_api.py
+# Stand-in lokal untuk Telegram Bot API.
+# Bot diarahkan ke sini lewat TELEGRAM_API_BASE_URL=http://127.0.0.1:8081/bot, lalu update
+# disuntikkan ke bot: dikirim ke webhook (dengan secret token dari setWebhook) atau
+# diantrekan untuk getUpdates jika bot berjalan dalam mode polling.
+# Semua panggilan bot (sendMessage, editMessageText, ...) dicatat untuk diperiksa.
+# Dengan --flood-interval, pesan ke chat yang sama yang terlalu rapat dijawab 429 (RetryAfter)
+# seperti flood control Telegram, untuk menguji app/utils/telegram_send_queue.py.
+# Pesan di atas 4096 unit UTF-16 (setelah tag HTML dibuang) atau 100 tombol ditolak 400
+# seperti Telegram, untuk menguji app/utils/message_builder.py.
+#
+# Contoh:
+#   python -m tools.fake_telegram_api --port 8081
+#   TELEGRAM_MODE=webhook WEBHOOK_URL=http://127.0.0.1:8443 TELEGRAM_API_BASE_URL=http://127.0.0.1:8081/bot python -m app.main
+#   curl -X POST http://127.0.0.1:8081/_fake/message -d '{"chat_id": 12345, "text": "/start"}'
+#   curl http://127.0.0.1:8081/_fake/calls
+
+import re
+import html
+import argparse
+import json
+import time
+import threading
+import itertools
+import urllib.request
+import urllib.error
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BOT_USER = {"id": 100000001, "is_bot": True, "first_name": "Agenda Bot", "username": "fake_agenda_bot",
+            "can_join_groups": True, "can_read_all_group_messages": False, "supports_inline_queries": False}
+
+MAX_MESSAGE_LENGTH = 4096 # Unit UTF-16, seperti Bot API
+MAX_INLINE_BUTTONS = 100
+
+def _user(user_id: int) -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": f"User {user_id}", "language_code": "id"}
+
+def _chat(chat_id: int) -> dict:
+    return {"id": chat_id, "type": "private", "first_name": f"User {chat_id}"}
+
+class FakeTelegramAPI(ThreadingHTTPServer):
+    """
+    Server HTTP yang meniru Bot API:
+    POST /bot<token>/<method>  -> metode Bot API (getMe, setWebhook, getUpdates, sendMessage, ...)
+    POST /_fake/message        -> suntik pesan teks {"chat_id", "text", "user_id"?}
+    POST /_fake/callback       -> suntik callback query {"chat_id", "data", "message_id"?}
+    POST /_fake/update         -> suntik update mentah (JSON update Telegram)
+    GET  /_fake/calls          -> daftar panggilan bot yang tercatat
+    """
+    daemon_threads = True
+
+    def __init__(self, port: int = 8081, host: str = "127.0.0.1", flood_interval: float = None):
+        super().__init__((host, port), _FakeTelegramHandler)
+        self.flood_interval = flood_interval # Detik minimum antar pesan ke satu chat; None = tanpa flood control
+        self.flood_errors = 0
+        self._last_sent = {} # chat_id -> waktu pesan terakhir
+        self.webhook_url = None
+        self.webhook_secret = None
+        self.calls = [] # (waktu, metode, parameter)
+        self.record_calls = True # Bisa dimatikan saat simulasi beban besar agar memori tidak terus bertambah
+        self.on_call = None # Callback opsional (metode, parameter, hasil), dipanggil dari thread server
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._pending = [] # Update untuk getUpdates (mode polling)
+        self._cond = threading.Condition()
+
+    # --- Pembuat update ---
+
+    def message_update(self, chat_id: int, text: str, user_id: int = None) -> dict:
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": _chat(chat_id),
+            "from": _user(user_id or chat_id),
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return {"update_id": next(self._update_ids), "message": message}
+
+    def callback_update(self, chat_id: int, data: str, message_id: int = None, user_id: int = None) -> dict:
+        message = {
+            "message_id": message_id or next(self._message_ids),
+            "date": int(time.time()),
+            "chat": _chat(chat_id),
+            "from": BOT_USER,
+            "text": "...",
+        }
+        return {"update_id": next(self._update_ids), "callback_query": {
+            "id": str(next(self._update_ids)),
+            "from": _user(user_id or chat_id),
+            "chat_instance": str(chat_id),
+            "message": message,
+            "data": data,
+        }}
+
+    # --- Pengiriman update ke bot ---
+
+    def deliver(self, update: dict) -> int:
+        """Mengirim update ke webhook bot (status HTTP), atau mengantrekannya untuk getUpdates (0)."""
+        if not self.webhook_url:
+            with self._cond:
+                self._pending.append(update)
+                self._cond.notify_all()
+            return 0
+        headers = {"Content-Type": "application/json"}
+        if self.webhook_secret:
+            headers["X-Telegram-Bot-Api-Secret-Token"] = self.webhook_secret
+        req = urllib.request.Request(self.webhook_url, data=json.dumps(update).encode(), headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(req, timeout=10) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def get_updates(self, offset: int = 0, timeout: float = 0) -> list[dict]:
+        with self._cond:
+            self._pending = [u for u in self._pending if u["update_id"] >= offset]
+            if not self._pending and timeout:
+                self._cond.wait(timeout)
+            return list(self._pending)
+
+    def calls_for(self, method: str) -> list[dict]:
+        return [params for _, name, params in self.calls if name == method]
+
+    # --- Metode Bot API ---
+
+    def call(self, method: str, params: dict):
+        if self.record_calls:
+            self.calls.append((time.time(), method, params))
+        result = self._call(method, params)
+        if self.on_call:
+            self.on_call(method, params, result)
+        return result
+
+    def _call(self, method: str, params: dict):
+        if method == "getMe":
+            return BOT_USER
+        if method == "setWebhook":
+            self.webhook_url = params.get("url") or None
+            self.webhook_secret = params.get("secret_token")
+            return True
+        if method == "deleteWebhook":
+            self.webhook_url = self.webhook_secret = None
+            return True
+        if method == "getWebhookInfo":
+            return {"url": self.webhook_url or "", "has_custom_certificate": False, "pending_update_count": len(self._pending)}
+        if method == "getUpdates":
+            return self.get_updates(int(params.get("offset") or 0), min(float(params.get("timeout") or 0), 5))
+        if method in ("sendMessage", "editMessageText", "editMessageReplyMarkup"):
+            chat_id = int(params.get("chat_id") or 0)
+            self._check_limits(params)
+            self._check_flood(chat_id)
+            return {
+                "message_id": int(params.get("message_id") or next(self._message_ids)),
+                "date": int(time.time()),
+                "chat": _chat(chat_id),
+                "from": BOT_USER,
+                "text": params.get("text", ""),
+            }
+        return True # answerCallbackQuery, deleteMessage, sendChatAction, setMyCommands, ...
+
+    def _check_limits(self, params: dict):
+        text = params.get("text") or ""
+        if params.get("parse_mode") == "HTML":
+            text = html.unescape(re.sub(r"<[^>]*>", "", text))
+        if len(text.encode("utf-16-le")) // 2 > MAX_MESSAGE_LENGTH:
+            raise _ApiError(400, "Bad Request: message is too long")
+        markup = params.get("reply_markup") or {}
+        if isinstance(markup, str):
+            markup = json.loads(markup)
+        if sum(len(row) for row in markup.get("inline_keyboard", [])) > MAX_INLINE_BUTTONS:
+            raise _ApiError(400, "Bad Request: reply markup is too long")
+
+    def _check_flood(self, chat_id: int):
+        if not self.flood_interval:
+            return
+        with self._cond:
+            now = time.monotonic()
+            last = self._last_sent.get(chat_id)
+            if last is not None and now - last < self.flood_interval:
+                self.flood_errors += 1
+                retry_after = max(1, round(self.flood_interval))
+                raise _ApiError(429, f"Too Many Requests: retry after {retry_after}", {"retry_after": retry_after})
+            self._last_sent[chat_id] = now
+
+class _ApiError(Exception):
+    def __init__(self, code: int, description: str, parameters: dict = None):
+        super().__init__(description)
+        self.code = code
+        self.parameters = parameters
+
+class _FakeTelegramHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass # Terlalu ramai saat simulasi beban
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_params(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        content_type = self.headers.get("Content-Type", "")
+        if not raw:
+            return {}
+        if "application/json" in content_type:
+            return json.loads(raw)
+        # python-telegram-bot mengirim form-urlencoded; nilai non-string di-encode sebagai JSON
+        params = {}
+        for key, values in parse_qs(raw.decode("utf-8")).items():
+            try:
+                params[key] = json.loads(values[0])
+            except ValueError:
+                params[key] = values[0]
+        return params
+
+    def do_GET(self):
+        if self.path == "/_fake/calls":
+            return self._send_json(200, [{"time": t, "method": m, "params": p} for t, m, p in self.server.calls])
+        self.do_POST()
+
+    def do_POST(self):
+        path = self.path.partition("?")[0].strip("/")
+        params = self._read_params()
+        if path.startswith("_fake/"):
+            return self._handle_fake(path.removeprefix("_fake/"), params)
+
+        parts = path.split("/")
+        if len(parts) != 2 or not parts[0].startswith("bot"):
+            return self._send_json(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+        try:
+            result = self.server.call(parts[1], params)
+        except _ApiError as e:
+            error = {"ok": False, "error_code": e.code, "description": str(e)}
+            if e.parameters:
+                error["parameters"] = e.parameters
+            return self._send_json(e.code, error)
+        self._send_json(200, {"ok": True, "result": result})
+
+    def _handle_fake(self, action: str, params: dict):
+        server = self.server
+        if action == "message":
+            update = server.message_update(int(params["chat_id"]), params["text"], params.get("user_id"))
+        elif action == "callback":
+            update = server.callback_update(int(params["chat_id"]), params["data"], params.get("message_id"), params.get("user_id"))
+        elif action == "update":
+            update = params
+        else:
+            return self._send_json(404, {"error": "not found"})
+        status = server.deliver(update)
+        self._send_json(200, {"update_id": update.get("update_id"), "webhook_status": status})
+
+def main():
+    parser = argparse.ArgumentParser(description="Server Telegram Bot API palsu untuk pengujian end-to-end")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--flood-interval", type=float, default=None,
+                        help="Detik minimum antar pesan ke satu chat; lebih rapat dijawab 429 retry_after")
+    args = parser.parse_args()
+
+    server = FakeTelegramAPI(args.port, args.host, args.flood_interval)
+    print(f"Fake Telegram Bot API berjalan di http://{args.host}:{args.port}/bot<token>/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+# tools/load_simulator.py
+# Simulasi beban end-to-end: menjalankan Application bot dari app/main.py (handler, persistence,
+# post_init sama seperti produksi) terhadap tools/fake_telegram_api.py, lalu memutar ulang
+# percakapan /catat, /lihat, /cari, /edit dan /status untuk ribuan chat secara bersamaan.
+# Latensi diukur per langkah percakapan (update disuntikkan -> balasan teks bot diterima
+# fake API), ditambah event-loop lag proses bot selama simulasi.
+#
+# Contoh:
+#   python -m tools.load_simulator --chats 2000 --concurrency 500
+#   python -m tools.load_simulator --chats 500 --scenarios edit,status --ingress polling --output /tmp/load.json
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+from tools.fake_telegram_api import FakeTelegramAPI
+
+_TOKEN = "123456:LOAD-TEST-TOKEN"
+_TEXT_METHODS = ("sendMessage", "editMessageText") # Balasan yang menandai satu langkah selesai
+_LAG_INTERVAL = 0.05 # Detik antar sampel event-loop lag
+_FIRST_CHAT_ID = 500_000
+
+# ===============================
+# 📜 Skenario percakapan
+# ===============================
+# Setiap langkah: (nama, jenis "message"/"callback", isi). Isi boleh berupa fungsi(chat) agar
+# tiap chat memakai data berbeda (misal Event ID agenda yang diedit).
+
+SCENARIOS = {
+    "catat": [
+        ("start", "message", "/catat"),
+        ("kategori", "callback", "k:kerja"),
+        ("tanggal", "callback", "t:tomorrow"),
+        ("jam", "callback", "j:10:00"),
+        ("prioritas", "callback", "p:sedang"),
+        ("deskripsi", "message", lambda chat: f"Rapat simulasi beban {chat.chat_id}"),
+    ],
+    "lihat": [
+        ("start", "message", "/lihat"),
+        ("7hari", "callback", "lihat:7days"),
+    ],
+    "cari": [
+        ("start", "message", "/cari"),
+        ("query", "message", lambda chat: chat.rng.choice(["rapat", "laporan", "klien", "tidak-ada"])),
+    ],
+    "edit": [
+        ("start", "message", "/edit"),
+        ("event_id", "message", lambda chat: chat.event_id),
+        ("pilih_bidang", "callback", "edit_field:prioritas"),
+        ("prioritas", "callback", lambda chat: chat.rng.choice(["p:rendah", "p:sedang", "p:tinggi"])),
+        ("selesai", "callback", "edit_field:done"),
+    ],
+    "status": [
+        ("start", "message", "/status"),
+        ("event_id", "message", lambda chat: chat.event_id),
+        ("pilih_status", "callback", lambda chat: chat.rng.choice(["set_status:Belum", "set_status:Selesai"])),
+    ],
+}
+
+class _SimulatedChat:
+    def __init__(self, chat_id: int, scenario: str, event_id: str, rng: random.Random):
+        self.chat_id = chat_id
+        self.scenario = scenario
+        self.event_id = event_id
+        self.rng = rng
+        self.last_message_id = None # Pesan bot terakhir, sasaran callback berikutnya
+
+# ===============================
+# 📈 Statistik
+# ===============================
+
+def _percentiles(values: list) -> dict:
+    if not values:
+        return {"n": 0}
+    values = sorted(values)
+    pick = lambda fraction: values[min(len(values) - 1, round(fraction * (len(values) - 1)))]
+    return {
+        "n": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 2),
+        "p50_ms": round(pick(0.50) * 1000, 2),
+        "p95_ms": round(pick(0.95) * 1000, 2),
+        "p99_ms": round(pick(0.99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2),
+    }
+
+async def _measure_loop_lag(samples: list, stop: asyncio.Event):
+    """Mengukur keterlambatan event loop: selisih antara waktu bangun yang diminta dan yang terjadi."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + _LAG_INTERVAL
+        await asyncio.sleep(_LAG_INTERVAL)
+        samples.append(max(0.0, loop.time() - expected))
+
+# ===============================
+# 🏃 Simulator
+# ===============================
+
+class LoadSimulator:
+    def __init__(self, api: FakeTelegramAPI, application, ingress: str, step_timeout: float, think_time: float):
+        self.api = api
+        self.application = application
+        self.ingress = ingress
+        self.step_timeout = step_timeout
+        self.think_time = think_time
+        self.latencies = {} # "skenario:langkah" -> list detik
+        self.conversations = {} # skenario -> list durasi percakapan
+        self.timeouts = {}
+        self.completed = 0
+        self._waiters = {} # chat_id -> Future balasan berikutnya
+        self._loop = None
+
+    # --- Balasan bot (dipanggil dari thread fake API) ---
+
+    def _on_call(self, method, params, result):
+        if method in _TEXT_METHODS and params.get("chat_id") is not None:
+            self._loop.call_soon_threadsafe(self._resolve, int(params["chat_id"]), result)
+
+    def _resolve(self, chat_id: int, result):
+        waiter = self._waiters.pop(chat_id, None)
+        if waiter and not waiter.done():
+            waiter.set_result(result)
+
+    # --- Pengiriman update ---
+
+    def _inject(self, update: dict):
+        if self.ingress == "polling":
+            self.api.deliver(update) # Diantrekan untuk getUpdates bot
+        else:
+            from telegram import Update
+            self.application.update_queue.put_nowait(Update.de_json(update, self.application.bot))
+
+    async def _run_step(self, chat: _SimulatedChat, name: str, kind: str, payload):
+        value = payload(chat) if callable(payload) else payload
+        if kind == "message":
+            update = self.api.message_update(chat.chat_id, value)
+        else:
+            update = self.api.callback_update(chat.chat_id, value, message_id=chat.last_message_id)
+
+        waiter = self._loop.create_future()
+        self._waiters[chat.chat_id] = waiter
+        started = time.perf_counter()
+        self._inject(update)
+        key = f"{chat.scenario}:{name}"
+        try:
+            result = await asyncio.wait_for(waiter, self.step_timeout)
+        except asyncio.TimeoutError:
+            self._waiters.pop(chat.chat_id, None)
+            self.timeouts[key] = self.timeouts.get(key, 0) + 1
+            return False
+        self.latencies.setdefault(key, []).append(time.perf_counter() - started)
+        if isinstance(result, dict) and result.get("message_id"):
+            chat.last_message_id = result["message_id"]
+        return True
+
+    async def run_chat(self, chat: _SimulatedChat, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            started = time.perf_counter()
+            for name, kind, payload in SCENARIOS[chat.scenario]:
+                if not await self._run_step(chat, name, kind, payload):
+                    return # Percakapan macet; langkah berikutnya tidak bermakna
+                if self.think_time:
+                    await asyncio.sleep(chat.rng.uniform(0, self.think_time))
+            self.conversations.setdefault(chat.scenario, []).append(time.perf_counter() - started)
+            self.completed += 1
+
+    async def run(self, chats: list, concurrency: int) -> float:
+        self._loop = asyncio.get_running_loop()
+        self.api.on_call = self._on_call
+        semaphore = asyncio.Semaphore(concurrency)
+        started = time.perf_counter()
+        await asyncio.gather(*(self.run_chat(chat, semaphore) for chat in chats))
+        return time.perf_counter() - started
+
+def _seed_agendas(count: int, seed: int) -> list[str]:
+    """Mengisi agenda untuk /lihat, /cari, /edit dan /status; mengembalikan Event ID-nya."""
+    from app.utils.config import TZ
+    from app.utils.data_manager import bulk_write_agenda
+
+    rng = random.Random(seed)
+    now = datetime.now(TZ).replace(minute=0, second=0, microsecond=0)
+    items = []
+    for index in range(count):
+        tanggal = now + timedelta(days=rng.randrange(-3, 10), hours=rng.randrange(-6, 6))
+        items.append({
+            "Tanggal": tanggal.isoformat(timespec='minutes'),
+            "Kategori": rng.choice(["Kerja", "Kuliah", "Personal"]),
+            "Prioritas": rng.choice(["Rendah", "Sedang", "Tinggi"]),
+            "Deskripsi": rng.choice(["Rapat tim", "Laporan mingguan", "Telepon klien", "Belajar"]) + f" #{index}",
+            "EventID": f"load-{index:06d}",
+        })
+    bulk_write_agenda(upserts=items)
+    return [item["EventID"] for item in items]
+
+async def simulate(args) -> dict:
+    from app.main import build_application
+    from app.utils.data_manager import initialize_agenda_data
+
+    logging.getLogger("httpx").setLevel(logging.WARNING) # Satu baris log per request Bot API terlalu ramai
+    api = FakeTelegramAPI(args.port)
+    api.record_calls = False
+    threading.Thread(target=api.serve_forever, name="fake_telegram_api", daemon=True).start()
+
+    initialize_agenda_data(None)
+    event_ids = _seed_agendas(args.seed_agendas, args.seed)
+
+    application = build_application(_TOKEN)
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+    if args.ingress == "polling":
+        await application.updater.start_polling(poll_interval=0.0, timeout=5)
+
+    rng = random.Random(args.seed)
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    chats = [
+        _SimulatedChat(_FIRST_CHAT_ID + index, scenarios[index % len(scenarios)], rng.choice(event_ids),
+                       random.Random(args.seed + index))
+        for index in range(args.chats)
+    ]
+
+    simulator = LoadSimulator(api, application, args.ingress, args.step_timeout, args.think_time)
+    lag_samples = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_measure_loop_lag(lag_samples, stop))
+    try:
+        elapsed = await simulator.run(chats, args.concurrency)
+    finally:
+        stop.set()
+        await lag_task
+        if application.updater and application.updater.running:
+            await application.updater.stop()
+        await application.stop()
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+        api.shutdown()
+
+    steps = sum(len(values) for values in simulator.latencies.values())
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec='seconds'),
+            "chats": args.chats,
+            "concurrency": args.concurrency,
+            "scenarios": scenarios,
+            "ingress": args.ingress,
+            "think_time": args.think_time,
+            "flood_limits": not args.no_flood_limits,
+            "seed_agendas": args.seed_agendas,
+        },
+        "elapsed_seconds": round(elapsed, 2),
+        "completed_conversations": simulator.completed,
+        "updates_per_second": round(steps / elapsed, 1) if elapsed else 0.0,
+        "timeouts": simulator.timeouts,
+        "steps": {key: _percentiles(values) for key, values in sorted(simulator.latencies.items())},
+        "conversations": {key: _percentiles(values) for key, values in sorted(simulator.conversations.items())},
+        "event_loop_lag": _percentiles(lag_samples),
+    }
+
+def _print_report(report: dict):
+    print(f"\n{report['completed_conversations']}/{report['meta']['chats']} percakapan selesai dalam "
+          f"{report['elapsed_seconds']} detik ({report['updates_per_second']} update/detik)")
+    print(f"{'langkah':<28}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for key, stats in report["steps"].items():
+        print(f"{key:<28}{stats['n']:>7}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}"
+              f"{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}")
+    lag = report["event_loop_lag"]
+    if lag["n"]:
+        print(f"Event-loop lag: p50 {lag['p50_ms']} ms, p95 {lag['p95_ms']} ms, p99 {lag['p99_ms']} ms, max {lag['max_ms']} ms")
+    if report["timeouts"]:
+        print(f"⚠️ Timeout: {report['timeouts']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulasi beban percakapan bot terhadap fake Telegram Bot API")
+    parser.add_argument("--chats", type=int, default=1000, help="Jumlah chat simulasi (satu percakapan per chat)")
+    parser.add_argument("--concurrency", type=int, default=200, help="Maksimum percakapan yang berjalan bersamaan")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Skenario dipisah koma: {', '.join(SCENARIOS)}")
+    parser.add_argument("--ingress", choices=["queue", "polling"], default="queue",
+                        help="queue: update langsung ke update_queue; polling: lewat getUpdates fake API")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Jeda acak maksimum (detik) antar langkah")
+    parser.add_argument("--step-timeout", type=float, default=30.0)
+    parser.add_argument("--seed-agendas", type=int, default=2000, help="Jumlah agenda awal di database simulasi")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, default=8091, help="Port fake Telegram Bot API")
+    parser.add_argument("--data-dir", help="Folder database simulasi (default: folder sementara)")
+    parser.add_argument("--output", help="Tulis laporan JSON ke file ini")
+    parser.add_argument("--no-flood-limits", action="store_true",
+                        help="Matikan batas kirim global/per chat (ukur bot saja, tanpa antrean flood control Telegram)")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios.split(",")) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Skenario tidak dikenal: {', '.join(sorted(unknown))}")
+
+    temp_dir = None if args.data_dir else tempfile.TemporaryDirectory(prefix="agenda-load-")
+    # Harus diset sebelum modul app diimpor (config & data_manager membaca environment saat impor)
+    os.environ["AGENDA_PATH"] = args.data_dir or temp_dir.name
+    os.environ["TELEGRAM_API_BASE_URL"] = f"http://127.0.0.1:{args.port}/bot"
+    os.environ["GOOGLE_PUSH_ADDRESS"] = "" # Tanpa job watch channel Google selama simulasi
+    if args.no_flood_limits:
+        os.environ["TELEGRAM_GLOBAL_RATE"] = os.environ["TELEGRAM_CHAT_RATE"] = "0"
+    try:
+        report = asyncio.run(simulate(args))
+    finally:
+        if temp_dir:
+            temp_dir.cleanup()
+
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Laporan disimpan ke {args.output}")
+    if report["timeouts"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# tools/measure_import_time.py
+# Mengukur biaya startup bot:
+# 1. Waktu impor per modul saat app.main dimuat dan Application dibangun (build_application),
+#    dari output `python -X importtime`; ditampilkan per modul dan per paket teratas, dan
+#    modul berat yang seharusnya dimuat lazy (app/utils/preload.py) ditandai jika ikut terimpor.
+# 2. Time-to-first-update: `python -m app.main` dijalankan (polling) terhadap
+#    tools/fake_telegram_api.py yang sudah menyimpan satu update /start; diukur dari proses
+#    dibuat sampai balasan sendMessage pertama diterima.
+#
+# Contoh:
+#   python -m tools.measure_import_time
+#   python -m tools.measure_import_time --top 40 --skip-first-update
+#   python -m tools.measure_import_time --target 1.0 --output startup.json   # exit 1 jika > 1 detik
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+from collections import defaultdict
+
+from tools.fake_telegram_api import FakeTelegramAPI
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_TOKEN = "123456:startup-measure"
+_CHAT_ID = 4242
+
+_IMPORT_SNIPPET = (
+    "from app.main import build_application; build_application({token!r})"
+)
+
+def _child_env(data_dir: str, **extra) -> dict:
+    env = dict(os.environ, AGENDA_PATH=data_dir, LOG_LEVEL="WARNING", HEAVY_MODULE_PRELOAD_DELAY="-1", **extra)
+    env["PYTHONPATH"] = _PROJECT_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+# ===============================
+# 📦 -X importtime
+# ===============================
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Mem-parse baris 'import time: self [us] | cumulative | imported package' menjadi list dict."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            modules.append({
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2, # Indentasi 2 spasi per tingkat
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            })
+        except ValueError:
+            continue
+    return modules
+
+def measure_imports(data_dir: str) -> dict:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _IMPORT_SNIPPET.format(token=_TOKEN)],
+        cwd=_PROJECT_ROOT, env=_child_env(data_dir), capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"Gagal mengimpor app.main:\n{result.stderr[-2000:]}")
+
+    modules = parse_importtime(result.stderr)
+    per_package = defaultdict(float)
+    for module in modules:
+        per_package[module["module"].split(".")[0]] += module["self_ms"]
+
+    from app.utils.preload import HEAVY_MODULES
+    imported = {module["module"] for module in modules}
+    return {
+        "wall_seconds": round(wall, 3),
+        "total_import_ms": round(sum(module["self_ms"] for module in modules), 1),
+        "modules": modules,
+        "packages": dict(sorted(per_package.items(), key=lambda item: item[1], reverse=True)),
+        "heavy_imported": [name for name in HEAVY_MODULES if name in imported],
+    }
+
+# ===============================
+# ⏱️ Time-to-first-update
+# ===============================
+
+def measure_first_update(data_dir: str, port: int, timeout: float) -> float:
+    api = FakeTelegramAPI(port)
+    api.record_calls = False
+    replied = threading.Event()
+    api.on_call = lambda method, params, result: (
+        replied.set() if method == "sendMessage" and int(params.get("chat_id") or 0) == _CHAT_ID else None
+    )
+    threading.Thread(target=api.serve_forever, name="fake_telegram_api", daemon=True).start()
+    api.deliver(api.message_update(_CHAT_ID, "/start")) # Sudah menunggu di getUpdates saat bot start
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.main"], cwd=_PROJECT_ROOT,
+        env=_child_env(data_dir, TELEGRAM_TOKEN=_TOKEN, TELEGRAM_MODE="polling",
+                       TELEGRAM_API_BASE_URL=f"http://127.0.0.1:{port}/bot"),
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    try:
+        if not replied.wait(timeout):
+            process.terminate()
+            raise RuntimeError(f"Tidak ada balasan dalam {timeout} detik:\n{process.communicate(timeout=10)[1][-2000:]}")
+        return time.perf_counter() - started
+    finally:
+        if process.poll() is None:
+            process.terminate()
+            process.wait(timeout=10)
+        api.shutdown()
+
+# ===============================
+# 🧾 Laporan
+# ===============================
+
+def _print_report(report: dict, top: int):
+    imports = report["imports"]
+    print(f"Impor app.main + build_application: {imports['total_import_ms']:.0f} ms impor, "
+          f"{imports['wall_seconds']:.2f} detik proses (termasuk start interpreter)")
+    print(f"\n{'modul (kumulatif)':<60}{'kumulatif ms':>14}{'self ms':>10}")
+    for module in sorted(imports["modules"], key=lambda m: m["cumulative_ms"], reverse=True)[:top]:
+        print(f"{'  ' * module['depth'] + module['module']:<60}{module['cumulative_ms']:>14.1f}{module['self_ms']:>10.1f}")
+    print(f"\n{'paket (total self)':<60}{'ms':>14}")
+    for package, self_ms in list(imports["packages"].items())[:top // 2]:
+        print(f"{package:<60}{self_ms:>14.1f}")
+    if imports["heavy_imported"]:
+        print(f"\n⚠️ Modul berat ikut terimpor saat startup: {', '.join(imports['heavy_imported'])}")
+    if "first_update_seconds" in report:
+        print(f"\nTime-to-first-update (proses dibuat -> balasan /start): {report['first_update_seconds']:.2f} detik")
+
+def main():
+    parser = argparse.ArgumentParser(description="Ukur waktu impor per modul dan time-to-first-update bot")
+    parser.add_argument("--top", type=int, default=25, help="Jumlah modul teratas yang ditampilkan")
+    parser.add_argument("--skip-first-update", action="store_true", help="Hanya ukur waktu impor")
+    parser.add_argument("--port", type=int, default=8097, help="Port fake Telegram Bot API")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--target", type=float, help="Batas time-to-first-update (detik); exit code 1 jika terlampaui")
+    parser.add_argument("--output", help="Tulis laporan JSON ke file ini")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="agenda-startup-") as data_dir:
+        report = {"imports": measure_imports(data_dir)}
+        if not args.skip_first_update:
+            report["first_update_seconds"] = round(measure_first_update(data_dir, args.port, args.timeout), 3)
+
+    _print_report(report, args.top)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.target is not None and report.get("first_update_seconds", 0) > args.target:
+        print(f"❌ Time-to-first-update melebihi target {args.target} detik")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
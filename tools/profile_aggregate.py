@@ -0,0 +1,107 @@
+# tools/profile_aggregate.py
+# Menggabungkan file profil yang ditulis app/utils/profiling.py (PROFILE_DIR).
+# - File .folded (mode 'stack') dijumlahkan per stack dan ditulis ulang dalam format folded
+#   dengan nama handler sebagai frame paling bawah, siap untuk flamegraph.pl, speedscope,
+#   atau inferno:  flamegraph.pl profiles.folded > flame.svg
+# - File .prof (mode 'cprofile') digabung dengan pstats; ringkasan fungsi teratas dicetak dan
+#   hasil gabungan bisa disimpan (--pstats-output) untuk snakeviz / gprof2dot.
+#
+# Contoh:
+#   python -m tools.profile_aggregate $AGENDA_PATH/profiles --output profiles.folded
+#   python -m tools.profile_aggregate $AGENDA_PATH/profiles --handler handle_lihat_tombol --since 20261019-120000
+#   python -m tools.profile_aggregate $AGENDA_PATH/profiles --pstats-output merged.prof --top 30
+
+import os
+import sys
+import pstats
+import argparse
+from collections import Counter
+
+def _parse_name(filename: str):
+    """'<waktu>_<handler>_<correlation id>.<ext>' -> (waktu, handler); None jika bukan file profil."""
+    stem, _, extension = filename.rpartition(".")
+    parts = stem.split("_")
+    if extension not in ("folded", "prof") or len(parts) < 3:
+        return None
+    return parts[0], "_".join(parts[1:-1])
+
+def _select_files(directory: str, handler: str = None, since: str = None) -> dict:
+    selected = {"folded": [], "prof": []}
+    for filename in sorted(os.listdir(directory)):
+        parsed = _parse_name(filename)
+        if parsed is None:
+            continue
+        stamp, file_handler = parsed
+        if (handler and file_handler != handler) or (since and stamp < since):
+            continue
+        selected[filename.rpartition(".")[2]].append((file_handler, os.path.join(directory, filename)))
+    return selected
+
+def aggregate_folded(files: list) -> tuple:
+    """Menjumlahkan sampel semua file .folded; mengembalikan (Counter stack -> sampel, Counter handler -> sampel)."""
+    stacks = Counter()
+    per_handler = Counter()
+    for handler, path in files:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if not stack or not count.isdigit():
+                    continue
+                stacks[f"{handler};{stack}"] += int(count)
+                per_handler[handler] += int(count)
+    return stacks, per_handler
+
+def aggregate_pstats(files: list):
+    stats = None
+    for _, path in files:
+        try:
+            if stats is None:
+                stats = pstats.Stats(path, stream=sys.stdout)
+            else:
+                stats.add(path)
+        except (OSError, EOFError, TypeError, ValueError) as e: # File terpotong saat proses berhenti
+            print(f"⚠️ Dilewati {path}: {e}", file=sys.stderr)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Gabungkan profil handler menjadi format flame graph / pstats")
+    parser.add_argument("directory", nargs="?", help="Folder profil (default: PROFILE_DIR, atau $AGENDA_PATH/profiles)")
+    parser.add_argument("--handler", help="Hanya file dari handler ini")
+    parser.add_argument("--since", help="Hanya file dengan waktu >= YYYYMMDD-HHMMSS")
+    parser.add_argument("--output", help="Tulis stack folded gabungan ke file ini (default: stdout)")
+    parser.add_argument("--pstats-output", help="Simpan gabungan file .prof ke file ini")
+    parser.add_argument("--top", type=int, default=20, help="Jumlah fungsi teratas yang dicetak dari file .prof")
+    args = parser.parse_args()
+    if not args.directory: # Sama dengan default app/utils/profiling.py
+        args.directory = os.getenv("PROFILE_DIR") or os.path.join(os.getenv("AGENDA_PATH", "data"), "profiles")
+
+    files = _select_files(args.directory, args.handler, args.since)
+    if not files["folded"] and not files["prof"]:
+        print("Tidak ada file profil yang cocok.", file=sys.stderr)
+        sys.exit(1)
+
+    if files["folded"]:
+        stacks, per_handler = aggregate_folded(files["folded"])
+        print(f"{len(files['folded'])} file stack, {sum(per_handler.values())} sampel:", file=sys.stderr)
+        for handler, count in per_handler.most_common():
+            print(f"  {handler:<40}{count:>8}", file=sys.stderr)
+        lines = [f"{stack} {count}\n" for stack, count in sorted(stacks.items())]
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+            print(f"Stack folded ditulis ke {args.output}", file=sys.stderr)
+        else:
+            sys.stdout.writelines(lines)
+
+    if files["prof"]:
+        stats = aggregate_pstats(files["prof"])
+        if stats is not None:
+            print(f"\n{len(files['prof'])} file cProfile digabung", file=sys.stderr)
+            if args.pstats_output:
+                stats.dump_stats(args.pstats_output)
+                print(f"Gabungan pstats ditulis ke {args.pstats_output}", file=sys.stderr)
+            stats.stream = sys.stderr
+            stats.sort_stats("cumulative").print_stats(args.top)
+
+if __name__ == "__main__":
+    main()